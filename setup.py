@@ -45,8 +45,18 @@ tests_require = [
     'check-manifest>=0.40'
 ]
 
+parquet_require = [
+    'pyarrow>=12'
+]
+
+netcdf_require = [
+    'netCDF4>=1.6'
+]
+
 extras_require = {
     'docs': docs_require,
+    'parquet': parquet_require,
+    'netcdf': netcdf_require,
     'dev': dev_env_require,
     'tests': tests_require
 }
@@ -89,7 +99,11 @@ setup(
     zip_safe=False,
     include_package_data=True,
     platforms='any',
-    entry_points={},
+    entry_points={
+        'console_scripts': [
+            'wtss-batch = wtss_plugin.helpers.batch_helper:main'
+        ]
+    },
     extras_require=extras_require,
     install_requires=install_requires,
     setup_requires=setup_requires,
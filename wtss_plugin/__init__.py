@@ -33,7 +33,8 @@ def classFactory(iface):
     installDependencies.set_lib_path()
     try:
         #
-        # Test import of dependencies
+        # Test dependencies, they are imported on first use
+        installDependencies.check_modules()
         from .wtss_qgis import WTSSQgis
     except (ModuleNotFoundError, ImportError) as error:
         #
@@ -19,12 +19,40 @@
 """Python QGIS Plugin for WTSS."""
 
 import importlib
+import importlib.util
 import os
 import sys
+import types
 from pathlib import Path
 
-import pip
-from PyQt5.QtWidgets import QCheckBox, QMessageBox
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the module on the first attribute access.
+
+    The placeholder is not added to ``sys.modules``, so the imports done by
+    other packages, including submodules, are not affected by it.
+    """
+
+    def __getattr__(self, attribute):
+        """Import the module and return its attribute."""
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+
+def lazy_import(name):
+    """Return a module that is only loaded on the first attribute access.
+
+    Used for the heavy dependencies, so loading the plugin in QGIS does
+    not import them until the user opens WTSS.
+
+    :param name<str>: the top level module name.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return LazyModule(name)
 
 
 class Config:
@@ -43,6 +71,57 @@ class Config:
 
     PYTHONPATH_WTSS_PLUGIN = os.getenv("PYTHONPATH_WTSS_PLUGIN", None)
 
+    REQUIRED_MODULES = ["numpy", "pandas", "shapely", "matplotlib", "seaborn", "requests", "pystac_client", "wtss"]
+
+    CACHE_ENABLED = os.getenv("WTSS_CACHE_ENABLED", "1") == "1"
+
+    CACHE_DIR = os.getenv("WTSS_CACHE_DIR", str(Path.home() / '.cache' / 'wtss_plugin'))
+
+    CACHE_MAX_SIZE = int(os.getenv("WTSS_CACHE_MAX_SIZE", 512 * 1024 * 1024))
+
+    CACHE_TTL = int(os.getenv("WTSS_CACHE_TTL", 7 * 24 * 60 * 60))
+
+    METADATA_CACHE_TTL = int(os.getenv("WTSS_METADATA_CACHE_TTL", 60 * 60))
+
+    STAC_CACHE_PERSIST = os.getenv("WTSS_STAC_CACHE_PERSIST", "1") == "1"
+
+    VRT_MAX_FILES = int(os.getenv("WTSS_VRT_MAX_FILES", 100))
+
+    TRACE_ENABLED = os.getenv("WTSS_TRACE", "1") == "1"
+
+    TRACE_DIR = os.getenv("WTSS_TRACE_DIR", os.path.join(CACHE_DIR, 'trace'))
+
+    TRACE_MAX_SIZE = int(os.getenv("WTSS_TRACE_MAX_SIZE", 5 * 1024 * 1024))
+
+    PROFILE_ENABLED = os.getenv("WTSS_PROFILE", "0") == "1"
+
+    STAC_CHIP_MODE = os.getenv("WTSS_STAC_CHIP_MODE", "0") == "1"
+
+    STAC_CHIP_BUFFER = float(os.getenv("WTSS_STAC_CHIP_BUFFER", 0.01))
+
+    WTSS_MAX_WORKERS = int(os.getenv("WTSS_MAX_WORKERS", 8))
+
+    BATCH_WORKERS = int(os.getenv("WTSS_BATCH_WORKERS", 4))
+
+    CHUNK_MAX_POINTS = int(os.getenv("WTSS_CHUNK_MAX_POINTS", 250))
+
+    CHUNK_MAX_DATES = int(os.getenv("WTSS_CHUNK_MAX_DATES", 250))
+
+    CHUNK_TILE_DEGREES = float(os.getenv("WTSS_CHUNK_TILE_DEGREES", 0.05))
+
+    HTTP_TIMEOUT = (
+        float(os.getenv("WTSS_HTTP_CONNECT_TIMEOUT", 10)),
+        float(os.getenv("WTSS_HTTP_READ_TIMEOUT", 120))
+    )
+
+    HTTP_POOL_SIZE = int(os.getenv("WTSS_HTTP_POOL_SIZE", 16))
+
+    HTTP_MAX_PER_HOST = int(os.getenv("WTSS_HTTP_MAX_PER_HOST", 8))
+
+    HTTP_RETRIES = int(os.getenv("WTSS_HTTP_RETRIES", 3))
+
+    HOLDINGS_MAX_BYTES = int(os.getenv("WTSS_HOLDINGS_MAX_BYTES", 256 * 1024 * 1024))
+
 class InstallDependencies:
     """Easy install for python packages dependencies."""
 
@@ -67,6 +146,7 @@ class InstallDependencies:
 
     def warning(self, type_message, title, message, checkbox = None, **add_buttons):
         """Show a simple warning when ImportError."""
+        from PyQt5.QtWidgets import QMessageBox
         msg = QMessageBox()
         if type_message == 'error':
             msg.setIcon(QMessageBox.Critical)
@@ -89,6 +169,7 @@ class InstallDependencies:
 
     def raise_restart(self):
         """Raise a warning requesting restart."""
+        from PyQt5.QtWidgets import QMessageBox
         restart, _, buttons_ = self.warning(
             "warning",
             "Restart Required!",
@@ -101,6 +182,12 @@ class InstallDependencies:
             python = sys.executable
             os.execl(python, python, *sys.argv)
 
+    def check_modules(self, modules = Config.REQUIRED_MODULES):
+        """Raise ImportError when a required module is not installed, without importing it."""
+        for module in modules:
+            if importlib.util.find_spec(module) is None:
+                raise ModuleNotFoundError(f"No module named '{module}'", name=module)
+
     def set_lib_path(self):
         """Setting lib path for installed libraries."""
         if self.lib_path() in sys.path:
@@ -122,6 +209,7 @@ class InstallDependencies:
             options.append('--force-reinstall')
         if break_:
             options.append('--break-system-packages')
+        import pip
         pip.main(
             ['install'] + options +
             [f"{pkg_name}{pkg_version_rule}"]
@@ -154,6 +242,7 @@ class InstallDependencies:
 
     def run_install_pkgs_process(self, error_msg=""):
         """Run subprocess to install packages through."""
+        from PyQt5.QtWidgets import QCheckBox, QMessageBox
         install_requirements, checkbox, buttons = self.warning(
             "error",
             "ImportError!",
@@ -170,6 +259,7 @@ class InstallDependencies:
         if not checkbox.isChecked():
             target = ['--target', self.lib_path()]
         if install_requirements.clickedButton() == buttons['install_all']:
+            import pip
             pip.main(['install', '-r', self.requirements_file()] + target)
             #
             # Request restart
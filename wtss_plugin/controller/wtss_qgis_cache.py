@@ -0,0 +1,358 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+
+import requests
+import shapely.geometry
+
+from ..config import Config
+from .wtss_qgis_session import SessionWTSS, open_stac
+
+
+class TimeSeriesCache:
+    """Persistent store for WTSS responses using SQLite.
+
+    The entries are content-addressed by the normalized query, evicted by
+    least recent access when the store is bigger than ``max_size`` bytes
+    and expired after ``ttl`` seconds.
+
+    :Methods:
+        make_key
+        get
+        set
+        purge
+        statistics
+    """
+
+    def __init__(self, path = None, max_size = Config.CACHE_MAX_SIZE, ttl = Config.CACHE_TTL):
+        """Set the store location, the connection is opened on first use.
+
+        :param path<str>: the SQLite file path.
+        :param max_size<int>: the max size of stored values in bytes.
+        :param ttl<int>: the time to live of entries in seconds.
+        """
+        self.path = path or os.path.join(Config.CACHE_DIR, 'timeseries.sqlite')
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @staticmethod
+    def make_key(host, coverage, attributes, geometry, start_date, end_date, **extra):
+        """Return the key of a query.
+
+        :param host<str>: the WTSS host.
+        :param coverage<str>: the coverage name.
+        :param attributes<list>: the selected bands, the order is ignored.
+        :param geometry<dict|BaseGeometry>: the query geometry, compared as WKB.
+        :param start_date<str>: start date of the query.
+        :param end_date<str>: end date of the query.
+        """
+        if isinstance(geometry, dict):
+            geometry = shapely.geometry.shape(geometry)
+        query = {
+            "host": str(host).rstrip('/'),
+            "coverage": coverage,
+            "attributes": sorted(attributes or []),
+            "geometry": geometry.wkb_hex if geometry is not None else None,
+            "start_date": start_date,
+            "end_date": end_date,
+            **extra
+        }
+        return hashlib.sha256(json.dumps(query, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _connect(self):
+        """Open a connection to the store, creating the table if needed."""
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            with connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                    "created REAL NOT NULL, accessed REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+                )
+                connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            self._ready = True
+        return connection
+
+    def get(self, key, allow_expired = False, count = True):
+        """Return the stored value of a key or None.
+
+        :param key<str>: the entry key.
+        :param allow_expired<bool>: return entries older than the TTL, used when offline.
+        :param count<bool>: count the lookup in the hits and misses of the time series.
+        """
+        now = time.time()
+        with self._lock, closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (not allow_expired and now - row[1] > self.ttl):
+                if count:
+                    self.misses += 1
+                return None
+            connection.execute(
+                "UPDATE entries SET accessed = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+        if count:
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, key, value):
+        """Store a JSON value and evict the least recently used entries.
+
+        :param key<str>: the entry key.
+        :param value<dict>: the JSON document to store.
+        """
+        blob = zlib.compress(json.dumps(value).encode())
+        now = time.time()
+        with self._lock, closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now)
+            )
+            self._evict(connection)
+
+    def _evict(self, connection):
+        """Remove the least recently used entries above the size cap."""
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_size:
+            return
+        evicted = []
+        for key, size in connection.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if total <= self.max_size:
+                break
+            evicted.append((key,))
+            total -= size
+        connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def purge(self, expired_only = False):
+        """Remove entries from the store and return how many were removed.
+
+        :param expired_only<bool>: only remove the entries older than the TTL.
+        """
+        with self._lock, closing(self._connect()) as connection, connection:
+            if expired_only:
+                cursor = connection.execute(
+                    "DELETE FROM entries WHERE created < ?", (time.time() - self.ttl,)
+                )
+            else:
+                cursor = connection.execute("DELETE FROM entries")
+            removed = cursor.rowcount
+        with self._lock, closing(self._connect()) as connection:
+            connection.execute("VACUUM")
+        return removed
+
+    def statistics(self):
+        """Return the store usage and the hit ratio of this session."""
+        with self._lock, closing(self._connect()) as connection:
+            entries, size, expired = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(created < ?), 0) FROM entries",
+                (time.time() - self.ttl,)
+            ).fetchone()
+        requests_ = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "expired": expired,
+            "size": size,
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / requests_) if requests_ > 0 else 0.0
+        }
+
+
+time_series_cache = TimeSeriesCache()
+
+
+class MetadataCache:
+    """In-memory store with time to live for coverage descriptions.
+
+    :Methods:
+        get
+        set
+        clear
+    """
+
+    def __init__(self, ttl = Config.METADATA_CACHE_TTL):
+        """Init the entries.
+
+        :param ttl<int>: the time to live of entries in seconds.
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value of a key or None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Store a value."""
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+metadata_cache = MetadataCache()
+
+
+class StacCollections:
+    """STAC collection metadata kept in memory and optionally in a ``TimeSeriesCache``.
+
+    A collection is requested once per TTL of the memory cache. When a store
+    is given the metadata is also read from it after a restart and used
+    when the STAC server can not be reached.
+
+    :Methods:
+        collection
+    """
+
+    def __init__(self, memory = metadata_cache, store = None, open_client = open_stac):
+        """Set the caches.
+
+        :param memory<MetadataCache>: the in-memory cache.
+        :param store<TimeSeriesCache>: the persistent store, None to keep the metadata in memory only.
+        :param open_client<callable>: return the STAC client of a host.
+        """
+        self.memory = memory
+        self.store = store
+        self.open_client = open_client
+
+    def collection(self, collection_id, url = Config.STAC_HOST):
+        """Return the metadata of a collection as a dict.
+
+        :param collection_id<str>: the collection name.
+        :param url<str>: the STAC host.
+        """
+        memory_key = ('stac', str(url).rstrip('/'), collection_id)
+        metadata = self.memory.get(memory_key)
+        if metadata is not None:
+            return metadata
+        store_key = None
+        if self.store is not None:
+            store_key = self.store.make_key(url, collection_id, [], None, None, None, route='stac/collection')
+            # The STAC lookups are not time series hits or misses
+            metadata = self.store.get(store_key, count=False)
+        if metadata is None:
+            try:
+                metadata = self.open_client(url).get_collection(collection_id).to_dict()
+            except Exception:
+                metadata = self.store.get(store_key, allow_expired=True, count=False) if store_key else None
+                if metadata is None:
+                    raise
+            else:
+                if store_key is not None:
+                    self.store.set(store_key, metadata)
+        self.memory.set(memory_key, metadata)
+        return metadata
+
+
+stac_collections = StacCollections(
+    store = time_series_cache if Config.CACHE_ENABLED and Config.STAC_CACHE_PERSIST else None
+)
+
+
+class CachedWTSS(SessionWTSS):
+    """WTSS client that stores the responses in a ``TimeSeriesCache``.
+
+    Time series and summarize responses are served from the cache while they
+    are fresh. Metadata is always requested and the stored copy is only used
+    when the server can not be reached, so the plugin works offline for any
+    query already fetched.
+    """
+
+    def __init__(self, url, cache = time_series_cache, **kwargs):
+        """Create the client using a cache store.
+
+        :param url<str>: the WTSS host.
+        :param cache<TimeSeriesCache>: the store for responses.
+        """
+        self._cache = cache
+        super().__init__(url, **kwargs)
+
+    def _request(self, url, op, method = 'post', headers = None, params = None, json = None):
+        """Request the metadata, using the stored copy when offline."""
+        if method != 'get':
+            return super()._request(url, op, method=method, headers=headers, params=params, json=json)
+        key = self._cache.make_key(url, op, [], None, None, None, method=method)
+        try:
+            response = super()._request(url, op, method=method, headers=headers, params=params, json=json)
+        except requests.ConnectionError:
+            response = self._cache.get(key, allow_expired=True)
+            if response is None:
+                raise
+            return response
+        self._cache.set(key, response)
+        return response
+
+    def _retrieve_timeseries_or_summarize(self, coverage_name, route, params = None, **options):
+        """Retrieve the time series or the summarize from cache or from server."""
+        key = self._cache.make_key(
+            self._url, coverage_name,
+            options.get('attributes'),
+            options.get('geom'),
+            options.get('start_datetime'),
+            options.get('end_datetime'),
+            route=route,
+            params={k: v for k, v in (params or {}).items() if k != 'access_token'},
+            options={k: v for k, v in options.items()
+                     if k not in ('attributes', 'geom', 'start_datetime', 'end_datetime')}
+        )
+        response = self._cache.get(key)
+        if response is not None:
+            return response
+        try:
+            response = super()._retrieve_timeseries_or_summarize(coverage_name, route, params=params, **options)
+        except requests.ConnectionError:
+            response = self._cache.get(key, allow_expired=True)
+            if response is None:
+                raise
+            return response
+        self._cache.set(key, response)
+        return response
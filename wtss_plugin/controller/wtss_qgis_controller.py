@@ -18,11 +18,16 @@
 
 """Python QGIS Plugin for WTSS."""
 
-from PyQt5.QtCore import QDate
-from PyQt5.QtWidgets import QInputDialog, QLineEdit, QMessageBox
-from wtss import WTSS
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-from ..config import Config
+from ..config import Config, lazy_import
+from .wtss_qgis_planner import (is_server_error, merge_chunks, spatial_chunks,
+                                split_chunk, temporal_chunks)
+from .wtss_qgis_timeseries import (TimeSeriesResult, empty_time_series_df,
+                                   time_series_holdings)
+from .wtss_qgis_trace import tracer
+
+pd = lazy_import('pandas')
 
 
 class Controls:
@@ -40,6 +45,7 @@ class Controls:
         :param title<string>: the message box title.
         :param text<string>: the message box info.
         """
+        from PyQt5.QtWidgets import QMessageBox
         msg = QMessageBox()
         if type_message == 'error':
             msg.setIcon(QMessageBox.Critical)
@@ -59,6 +65,7 @@ class Controls:
         :param title<string>: the dialog box title.
         :param text<string>: the dialog box info.
         """
+        from PyQt5.QtWidgets import QInputDialog, QLineEdit
         text, okPressed = QInputDialog.getText(mainDialog, title, text, QLineEdit.Normal, "")
         if okPressed and text != "":
             return text
@@ -70,6 +77,7 @@ class Controls:
 
         :param date_string<string>: date string with 'yyyy-mm-dd' format.
         """
+        from PyQt5.QtCore import QDate
         return QDate(
             int(date_string[:4]),
             int(date_string[5:-3]),
@@ -91,15 +99,36 @@ class WTSS_Controls:
 
     :Methods:
         setService
+        resetChunks
         listProducts
         productDescription
         productTimeSeries
+        planTimeSeries
+        requestTimeSeries
+        shrinkChunks
+        cacheStatistics
+        purgeCache
+        diagnostics
     """
 
     def __init__(self):
         """Build controls for WTSS Servers."""
         self.wtss_host = Config.WTSS_HOST
-        self.wtss = WTSS(self.wtss_host)
+        self._wtss = None
+        self.pixel_sizes = {}
+        self.resetChunks()
+
+    @property
+    def wtss(self):
+        """Return the WTSS client, connecting on first use."""
+        if self._wtss is None:
+            from .wtss_qgis_cache import CachedWTSS, time_series_cache
+            from .wtss_qgis_session import SessionWTSS
+            if Config.CACHE_ENABLED:
+                self._wtss = CachedWTSS(self.wtss_host, cache = time_series_cache)
+            else:
+                self._wtss = SessionWTSS(self.wtss_host)
+        return self._wtss
 
     def getService(self):
         """Get the service data finding by name."""
@@ -111,36 +140,200 @@ class WTSS_Controls:
         :param server_host<string>: the URL service to edit.
         """
         self.wtss_host = server_host
-        self.wtss = WTSS(self.wtss_host)
+        self._wtss = None
+        self.pixel_sizes = {}
+        self.resetChunks()
+
+    def resetChunks(self):
+        """Restore the chunk sizes used to split the requests."""
+        self.chunk_points = Config.CHUNK_MAX_POINTS
+        self.chunk_dates = Config.CHUNK_MAX_DATES
+        self.chunk_degrees = Config.CHUNK_TILE_DEGREES
 
     def listProducts(self):
-        """Return a dictionary with the list of available products."""
+        """Return a dictionary with the list of available products.
+
+        The coverages are described concurrently and kept in the metadata cache.
+        """
+        coverages = list(self.wtss.coverages)
         coverages_dict = {}
-        for coverage in self.wtss.coverages:
-            coverages_dict[dict(self.wtss[coverage])['title']] = coverage
+        with ThreadPoolExecutor(max_workers = Config.WTSS_MAX_WORKERS) as executor:
+            descriptions = executor.map(tracer.wrap(self.productDescription), coverages)
+            for coverage, description in zip(coverages, descriptions):
+                coverages_dict[dict(description)['title']] = coverage
         return coverages_dict
 
     def productDescription(self, product):
         """Return a dictionary with product description."""
-        return self.wtss[product]
+        from .wtss_qgis_cache import metadata_cache
+        key = (self.wtss_host, product)
+        description = metadata_cache.get(key)
+        if description is None:
+            description = self.wtss[product]
+            metadata_cache.set(key, description)
+        return description
 
     def productTimeSeries(self, product, bands, start_date, end_date, geometry):
         """Return a dictionary with product time series data.
 
+        Only the timeline dates not held locally for each band and geometry
+        are requested, the result merges them with the dates already fetched.
+        The time series pages are fetched before returning, so this method
+        is meant to run in a background task (see ``WTSS_Tasks``).
+
         :param product<string>: the product name.
         :param bands<tuple>: the selected bands available on product.
-        :param lon<float>: the point longitude.
-        :param lat<float>: the point latitude.
         :param start_date<string>: start date string with 'yyyy-mm-dd' format.
         :param end_date<string>: end date string with 'yyyy-mm-dd' format.
+        :param geometry<BaseGeometry>: the query geometry.
         """
         try:
-            time_series = self.wtss[product].ts(
-                attributes=bands,
-                geom=geometry,
-                start_datetime=start_date,
-                end_datetime=end_date
-            )
-            return time_series
+            with tracer.span('wtss.describe', product = product):
+                description = self.productDescription(product)
+            dates = [date for date in description.timeline if start_date <= date <= end_date]
+            keys = {
+                band: time_series_holdings.key(self.wtss_host, product, band, geometry)
+                for band in bands
+            }
+            # Bands missing the same dates are requested together
+            missing = {}
+            for band in bands:
+                for run in time_series_holdings.missing_intervals(keys[band], dates):
+                    missing.setdefault(run, []).append(band)
+            for run, run_bands in missing.items():
+                with tracer.span('wtss.time_series', product = product, bands = run_bands, dates = len(run)):
+                    df = self.planTimeSeries(product, run_bands, run, geometry)
+                for band in run_bands:
+                    time_series_holdings.merge(keys[band], run, df[df['attribute'] == band])
+            df = pd.concat([
+                time_series_holdings.get(keys[band], start_date, end_date)
+                for band in bands
+            ])
+            return TimeSeriesResult(description, bands, start_date, end_date, geometry, df)
         except:
             return None
+
+    def planTimeSeries(self, product, bands, dates, geometry):
+        """Request a time series split in spatial and temporal chunks.
+
+        The chunks run concurrently and are merged in a single dataframe.
+        When a chunk fails with a server error or a timeout it is split in
+        halves and the chunk sizes are reduced for the next queries.
+
+        :param product<string>: the product name.
+        :param bands<list>: the selected bands available on product.
+        :param dates<tuple>: the sorted timeline dates to request.
+        :param geometry<BaseGeometry>: the query geometry.
+        """
+        # Described once, the chunk workers share the coverage
+        coverage = self.productDescription(product)
+        chunks = [
+            (part, run)
+            for part in spatial_chunks(geometry, self.chunk_points, self.chunk_degrees)
+            for run in temporal_chunks(dates, self.chunk_dates)
+        ]
+        frames = []
+        # The workers are profiled with the action that plans the chunks
+        request = tracer.wrap(self.requestTimeSeries)
+        with ThreadPoolExecutor(max_workers = Config.WTSS_MAX_WORKERS) as executor:
+            pending = {
+                executor.submit(
+                    request, product, bands, run[0], run[-1], part, coverage = coverage
+                ): (part, run)
+                for part, run in chunks
+            }
+            while pending:
+                done, _ = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    part, run = pending.pop(future)
+                    try:
+                        frames.append(future.result())
+                        continue
+                    except Exception as error:
+                        halves = split_chunk(part, run) if is_server_error(error) else None
+                        if halves is None:
+                            for future_ in pending:
+                                future_.cancel()
+                            raise
+                    self.shrinkChunks(part, run, halves)
+                    for part_, run_ in halves:
+                        pending[executor.submit(
+                            request, product, bands, run_[0], run_[-1], part_, coverage = coverage
+                        )] = (part_, run_)
+        df = merge_chunks(frames)
+        return df if df is not None else empty_time_series_df()
+
+    def shrinkChunks(self, geometry, dates, halves):
+        """Reduce the chunk size of the dimension split after an error."""
+        if halves[0][1] != dates:
+            self.chunk_dates = max(1, min(self.chunk_dates, len(dates) // 2))
+        elif geometry.geom_type == 'MultiPoint':
+            self.chunk_points = max(1, min(self.chunk_points, len(geometry.geoms) // 2))
+        else:
+            minx, miny, maxx, maxy = geometry.bounds
+            self.chunk_degrees = min(self.chunk_degrees, max(maxx - minx, maxy - miny) / 2)
+
+    def requestTimeSeries(self, product, bands, start_date, end_date, geometry, coverage = None):
+        """Request a time series from the server and return it in long format.
+
+        :param product<string>: the product name.
+        :param bands<list>: the selected bands available on product.
+        :param start_date<string>: start date string with 'yyyy-mm-dd' format.
+        :param end_date<string>: end date string with 'yyyy-mm-dd' format.
+        :param geometry<BaseGeometry>: the query geometry.
+        :param coverage<Coverage>: the product description, read from the metadata cache when not given.
+        """
+        if coverage is None:
+            coverage = self.productDescription(product)
+        time_series = coverage.ts(
+            attributes=bands,
+            geom=geometry,
+            start_datetime=start_date,
+            end_datetime=end_date
+        )
+        with tracer.span('wtss.http', product = product, start_date = start_date, end_date = end_date):
+            total_locations = time_series.total_locations()
+        if total_locations == 0:
+            return empty_time_series_df()
+        with tracer.span('wtss.df', product = product, locations = total_locations):
+            df = time_series.df()
+        # Kept to match the queried points to the pixel centers of the response
+        locations = getattr(getattr(time_series, 'ts', None), 'locations', None) or {}
+        for location in locations.values():
+            if getattr(location, 'pixel_size', None):
+                self.pixel_sizes[product] = tuple(location.pixel_size)
+                break
+        return df
+
+    def cacheStatistics(self):
+        """Return the usage of the time series cache."""
+        from .wtss_qgis_cache import time_series_cache
+        return time_series_cache.statistics()
+
+    def purgeCache(self, expired_only = False):
+        """Remove the stored time series.
+
+        :param expired_only<bool>: only remove the entries older than the TTL.
+        """
+        from .wtss_qgis_cache import time_series_cache
+        return time_series_cache.purge(expired_only = expired_only)
+
+    def diagnostics(self):
+        """Return the HTTP metrics and the cache usage as a JSON serializable dict."""
+        from .wtss_qgis_cache import metadata_cache, time_series_cache
+        from .wtss_qgis_metrics import http_metrics
+        from .wtss_qgis_timeseries import time_series_holdings
+        metadata_requests = metadata_cache.hits + metadata_cache.misses
+        return {
+            "wtss_host": self.wtss_host,
+            "stac_host": Config.STAC_HOST,
+            "http": http_metrics.snapshot(),
+            "time_series_cache": time_series_cache.statistics(),
+            "metadata_cache": {
+                "hits": metadata_cache.hits,
+                "misses": metadata_cache.misses,
+                "hit_ratio": (metadata_cache.hits / metadata_requests) if metadata_requests > 0 else 0.0
+            },
+            "holdings": len(time_series_holdings),
+            "holdings_bytes": time_series_holdings.nbytes
+        }
@@ -0,0 +1,246 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from qgis.core import (QgsFeatureRequest, QgsRectangle, QgsSpatialIndex,
+                       QgsVectorLayer, QgsWkbTypes)
+
+from ..config import Config, lazy_import
+
+shapely = lazy_import('shapely')
+
+
+def build_multipoint(features):
+    """Build a MultiPoint Object based on features list of a layer.
+
+    The features are read as WKB and the coordinates are collected in
+    a single array, so the geometry is built once.
+    """
+    geometries = shapely.from_wkb([
+        bytes(feat.geometry().asWkb())
+        for feat in features
+        if feat.hasGeometry()
+    ])
+    coordinates = shapely.get_coordinates(geometries)
+    if len(coordinates) == 0:
+        return shapely.MultiPoint()
+    return shapely.multipoints(coordinates)
+
+
+def feature_label(layer_name, fields, attributes):
+    """Return the label of a feature with its attributes truncated."""
+    key = f'{layer_name}: ('
+    for attr, value in zip(fields, attributes):
+        value = str(value)
+        value = (value[:30] + '...') if (len(value) > 30) else value
+        key += f'{attr}:{value},'
+    return key + ")"
+
+
+class GeometryListModel(QAbstractListModel):
+    """List the features of a layer loading the labels in batches.
+
+    Only the attributes are read to build the labels, the geometry of a
+    feature is resolved by id when it is selected.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, layer, parent = None):
+        """Set the layer to read the features from.
+
+        :param layer<QgsVectorLayer>: a polygon or a point layer.
+        """
+        super().__init__(parent)
+        self.layer_name = layer.name()
+        self.rows = []
+        self._features = None
+        if layer.geometryType() == QgsWkbTypes.PointGeometry:
+            # The whole point layer is used as a single MultiPoint geometry
+            self.rows.append((None, feature_label(self.layer_name, ['type'], ['MultiPoint Geometry'])))
+        else:
+            self.fields = layer.fields().names()
+            # Features without a geometry can not be queried, so they are not listed
+            request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+            request.setFilterExpression('$geometry IS NOT NULL')
+            self._features = layer.getFeatures(request)
+
+    def rowCount(self, parent = QModelIndex()):
+        """Return the number of labels loaded."""
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role = Qt.DisplayRole):
+        """Return the label or the feature id of a row."""
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        fid, label = self.rows[index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return label
+        if role == Qt.UserRole:
+            return fid
+        return None
+
+    def canFetchMore(self, parent = QModelIndex()):
+        """Check if there are features not listed yet."""
+        return not parent.isValid() and self._features is not None
+
+    def fetchMore(self, parent = QModelIndex(), limit = BATCH_SIZE):
+        """Load the next batch of labels."""
+        if not self.canFetchMore(parent):
+            return
+        batch = []
+        for feature in self._features:
+            batch.append((feature.id(), feature_label(self.layer_name, self.fields, feature.attributes())))
+            if limit is not None and len(batch) >= limit:
+                break
+        else:
+            self._features = None
+        if batch:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(batch) - 1)
+            self.rows.extend(batch)
+            self.endInsertRows()
+
+    def fetchAll(self):
+        """Load all labels, used before searching."""
+        self.fetchMore(limit = None)
+
+    def rowOf(self, fid):
+        """Return the row of a feature id, loading the next batches until it is found, -1 when missing."""
+        start = 0
+        while True:
+            for row in range(start, len(self.rows)):
+                if self.rows[row][0] == fid:
+                    return row
+            if not self.canFetchMore():
+                return -1
+            start = len(self.rows)
+            self.fetchMore()
+
+
+class GeometryCatalogue:
+    """Catalogue of the project vector layers available as query geometries.
+
+    The layers are listed by name without reading their features. The labels
+    are loaded by a ``GeometryListModel`` when the layer is selected and the
+    geometries are resolved by feature id. A polygon clicked on the map is
+    found with a ``QgsSpatialIndex`` of the layer, built on the first click.
+    All of them are kept per layer until the layer data changes.
+
+    :Methods:
+        refresh
+        layerNames
+        model
+        geometry
+        featureAt
+        invalidate
+    """
+
+    def __init__(self):
+        """Init the catalogue."""
+        self.layers = {}
+        self._models = {}
+        self._geometries = {}
+        self._indexes = {}
+        self._connected = set()
+
+    def refresh(self, project):
+        """List the polygon and point layers of a project.
+
+        :param project<QgsProject>: the QGIS project instance.
+        """
+        self.layers = {}
+        for layer in project.mapLayers().values():
+            if not isinstance(layer, QgsVectorLayer):
+                continue
+            if layer.geometryType() == QgsWkbTypes.PolygonGeometry or (
+                    layer.geometryType() == QgsWkbTypes.PointGeometry
+                    and layer.name() != Config.TEMPORARY_LAYER_NAME):
+                self.layers[layer.name()] = layer
+                if layer.id() not in self._connected:
+                    layer_id = layer.id()
+                    layer.dataChanged.connect(lambda layer_id=layer_id: self.invalidate(layer_id))
+                    layer.willBeDeleted.connect(lambda layer_id=layer_id: self.invalidate(layer_id, True))
+                    self._connected.add(layer_id)
+        return self.layerNames()
+
+    def layerNames(self):
+        """Return the names of the available layers."""
+        return list(self.layers.keys())
+
+    def model(self, layer_name):
+        """Return the features model of a layer, reused until its data changes."""
+        layer = self.layers[layer_name]
+        if layer.id() not in self._models:
+            self._models[layer.id()] = GeometryListModel(layer)
+        return self._models[layer.id()]
+
+    def geometry(self, layer_name, fid):
+        """Return the shapely geometry of a feature.
+
+        :param layer_name<str>: the layer name.
+        :param fid<int>: the feature id, None for the MultiPoint of a point layer.
+        :returns: the geometry, None when the feature has no geometry.
+        """
+        layer = self.layers[layer_name]
+        key = (layer.id(), fid)
+        if key not in self._geometries:
+            if fid is None:
+                geometry = build_multipoint(layer.getFeatures())
+            else:
+                feature = layer.getFeature(fid)
+                if not feature.hasGeometry():
+                    return None
+                geometry = shapely.from_wkb(bytes(feature.geometry().asWkb()))
+                if hasattr(geometry, 'geoms'):
+                    geometry = geometry.geoms[0]
+            self._geometries[key] = geometry
+        return self._geometries[key]
+
+    def featureAt(self, layer_name, x, y):
+        """Return the id of the first polygon of a layer containing a point, None when there is none.
+
+        :param layer_name<str>: the layer name.
+        :param x<float>: the longitude of the point.
+        :param y<float>: the latitude of the point.
+        """
+        layer = self.layers[layer_name]
+        if layer.geometryType() != QgsWkbTypes.PolygonGeometry:
+            return None
+        if layer.id() not in self._indexes:
+            request = QgsFeatureRequest().setNoAttributes()
+            self._indexes[layer.id()] = QgsSpatialIndex(
+                layer.getFeatures(request), flags = QgsSpatialIndex.FlagStoreFeatureGeometries
+            )
+        index = self._indexes[layer.id()]
+        # Only the features whose bounding box has the point are tested
+        for fid in index.intersects(QgsRectangle(x, y, x, y)):
+            geometry = shapely.from_wkb(bytes(index.geometry(fid).asWkb()))
+            if shapely.intersects_xy(geometry, x, y):
+                return fid
+        return None
+
+    def invalidate(self, layer_id, deleted = False):
+        """Drop the features, geometries and spatial index loaded from a layer."""
+        self._models.pop(layer_id, None)
+        self._indexes.pop(layer_id, None)
+        for key in [key for key in self._geometries if key[0] == layer_id]:
+            self._geometries.pop(key)
+        if deleted:
+            self._connected.discard(layer_id)
@@ -0,0 +1,198 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+
+def percentile(values, fraction):
+    """Return the nearest rank percentile of sorted values, 0 when empty."""
+    if not values:
+        return 0.0
+    return values[min(len(values), max(1, math.ceil(fraction * len(values)))) - 1]
+
+
+class EndpointMetrics:
+    """Counters of the requests to an endpoint.
+
+    The latencies are kept in a reservoir of ``max_samples`` values, so
+    the percentiles of long sessions use a bounded memory.
+    """
+
+    def __init__(self, max_samples = 1000):
+        """Init the counters.
+
+        :param max_samples<int>: the size of the latency reservoir.
+        """
+        self.max_samples = max_samples
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.statuses = Counter()
+        self.latencies = []
+        self._random = random.Random(0)
+
+    def add(self, status, latency, size, retries):
+        """Add a request to the counters."""
+        self.count += 1
+        self.statuses[str(status)] += 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors += 1
+        self.retries += retries
+        self.bytes += size
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if len(self.latencies) < self.max_samples:
+            self.latencies.append(latency)
+        else:
+            index = self._random.randrange(self.count)
+            if index < self.max_samples:
+                self.latencies[index] = latency
+
+    def summary(self):
+        """Return the counters and the latency percentiles in milliseconds."""
+        latencies = sorted(self.latencies)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "statuses": dict(self.statuses),
+            "bytes": self.bytes,
+            "mean_bytes": self.bytes / self.count if self.count else 0.0,
+            "latency_ms": {
+                "mean": self.total_latency * 1000 / self.count if self.count else 0.0,
+                "p50": percentile(latencies, 0.50) * 1000,
+                "p90": percentile(latencies, 0.90) * 1000,
+                "p99": percentile(latencies, 0.99) * 1000,
+                "max": self.max_latency * 1000
+            }
+        }
+
+
+class HttpMetrics:
+    """Requests made by the WTSS and STAC clients grouped by endpoint.
+
+    An endpoint is the method, the host and the path of the URL, without
+    the query string.
+
+    :Methods:
+        record
+        snapshot
+        reset
+        save
+    """
+
+    def __init__(self, max_samples = 1000):
+        """Init the endpoints.
+
+        :param max_samples<int>: the size of the latency reservoir of each endpoint.
+        """
+        self.max_samples = max_samples
+        self.started = time.time()
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, host, path, status, latency, size = 0, retries = 0):
+        """Add a request.
+
+        :param method<str>: the HTTP method.
+        :param host<str>: the host and port of the URL.
+        :param path<str>: the path of the URL.
+        :param status<int|str>: the response status, or the error name when there is no response.
+        :param latency<float>: the request duration in seconds.
+        :param size<int>: the response size in bytes.
+        :param retries<int>: the number of retries of the request.
+        """
+        key = f"{method.upper()} {host}{path}"
+        with self._lock:
+            if key not in self._endpoints:
+                self._endpoints[key] = EndpointMetrics(self.max_samples)
+            self._endpoints[key].add(status, latency, size, retries)
+
+    def snapshot(self):
+        """Return the counters of all endpoints as a JSON serializable dict."""
+        with self._lock:
+            endpoints = {key: metrics.summary() for key, metrics in sorted(self._endpoints.items())}
+        return {
+            "started": self.started,
+            "datetime": time.time(),
+            "requests": sum(endpoint["count"] for endpoint in endpoints.values()),
+            "bytes": sum(endpoint["bytes"] for endpoint in endpoints.values()),
+            "endpoints": endpoints
+        }
+
+    def reset(self):
+        """Remove the counters."""
+        with self._lock:
+            self._endpoints.clear()
+            self.started = time.time()
+
+    def save(self, path, document = None):
+        """Write a snapshot as JSON.
+
+        :param path<str>: the JSON file path.
+        :param document<dict>: the document to write, a new snapshot when not given.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(path, 'w', encoding = 'utf-8') as snapshot_file:
+            json.dump(document or self.snapshot(), snapshot_file, indent = 2, default = str)
+        return path
+
+
+http_metrics = HttpMetrics()
+
+
+def format_diagnostics(diagnostics):
+    """Return the document of ``WTSS_Controls.diagnostics`` as a text report."""
+    http = diagnostics["http"]
+    lines = [
+        f"WTSS: {diagnostics['wtss_host']}",
+        f"STAC: {diagnostics['stac_host']}",
+        f"Requests: {http['requests']}, received: {http['bytes'] / 1024:.1f} KiB",
+        "",
+        f"{'endpoint':<60} {'count':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'KiB':>9} {'retries':>7}  statuses"
+    ]
+    for key, endpoint in http["endpoints"].items():
+        latency = endpoint["latency_ms"]
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(endpoint["statuses"].items()))
+        lines.append(
+            f"{key:<60} {endpoint['count']:>6} {latency['p50']:>8.1f} {latency['p90']:>8.1f} {latency['p99']:>8.1f} "
+            f"{endpoint['bytes'] / 1024:>9.1f} {endpoint['retries']:>7}  {statuses}"
+        )
+    cache = diagnostics["time_series_cache"]
+    metadata = diagnostics["metadata_cache"]
+    lines += [
+        "",
+        f"Time series cache: {cache['hits']} hits, {cache['misses']} misses ({cache['hit_ratio']:.0%}), "
+        f"{cache['entries']} entries, {cache['size'] / 1024 / 1024:.1f} MiB",
+        f"Metadata cache: {metadata['hits']} hits, {metadata['misses']} misses ({metadata['hit_ratio']:.0%})",
+        f"Time series held in memory: {diagnostics['holdings']}, "
+        f"{diagnostics['holdings_bytes'] / 1024 / 1024:.1f} MiB"
+    ]
+    return "\n".join(lines)
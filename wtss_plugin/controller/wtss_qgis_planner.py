@@ -0,0 +1,127 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+from ..config import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+requests = lazy_import('requests')
+shapely = lazy_import('shapely')
+
+# Polygons smaller than this extent in degrees are not split again
+MIN_TILE_DEGREES = 1e-4
+
+
+def spatial_chunks(geometry, max_points, tile_degrees):
+    """Split a geometry in parts small enough for one request.
+
+    A MultiPoint is split in groups of ``max_points`` points and a polygon
+    in the parts that intersect a grid of ``tile_degrees`` tiles.
+
+    :param geometry<BaseGeometry>: the query geometry.
+    :param max_points<int>: the max number of points of a part.
+    :param tile_degrees<float>: the max extent of a polygon part.
+    """
+    if geometry.geom_type == 'MultiPoint':
+        points = shapely.get_parts(geometry)
+        if len(points) <= max_points:
+            return [geometry]
+        return [
+            shapely.multipoints(points[start:start + max_points])
+            for start in range(0, len(points), max_points)
+        ]
+    if geometry.geom_type in ('Polygon', 'MultiPolygon'):
+        minx, miny, maxx, maxy = geometry.bounds
+        if geometry.geom_type == 'Polygon' and max(maxx - minx, maxy - miny) <= tile_degrees:
+            return [geometry]
+        xs = np.arange(minx, maxx, tile_degrees)
+        ys = np.arange(miny, maxy, tile_degrees)
+        xs, ys = np.meshgrid(xs, ys)
+        tiles = shapely.box(xs, ys, xs + tile_degrees, ys + tile_degrees).ravel()
+        return _polygon_parts(shapely.intersection(tiles, geometry))
+    return [geometry]
+
+
+def temporal_chunks(dates, max_dates):
+    """Split the sorted timeline dates of a query in runs of ``max_dates``."""
+    return [tuple(dates[start:start + max_dates]) for start in range(0, len(dates), max_dates)]
+
+
+def split_chunk(geometry, dates):
+    """Split a chunk that failed in two halves.
+
+    The geometry is halved first, when it can not be split the dates are.
+    Return None when the chunk is a single point and a single date.
+
+    :param geometry<BaseGeometry>: the chunk geometry.
+    :param dates<tuple>: the chunk dates.
+    """
+    if geometry.geom_type == 'MultiPoint' and len(geometry.geoms) > 1:
+        points = shapely.get_parts(geometry)
+        half = len(points) // 2
+        return [(shapely.multipoints(points[:half]), dates), (shapely.multipoints(points[half:]), dates)]
+    if geometry.geom_type in ('Polygon', 'MultiPolygon'):
+        minx, miny, maxx, maxy = geometry.bounds
+        if max(maxx - minx, maxy - miny) > MIN_TILE_DEGREES:
+            if maxx - minx >= maxy - miny:
+                middle = (minx + maxx) / 2
+                halves = [shapely.box(minx, miny, middle, maxy), shapely.box(middle, miny, maxx, maxy)]
+            else:
+                middle = (miny + maxy) / 2
+                halves = [shapely.box(minx, miny, maxx, middle), shapely.box(minx, middle, maxx, maxy)]
+            return [(part, dates) for part in _polygon_parts(shapely.intersection(halves, geometry))]
+    if len(dates) > 1:
+        half = len(dates) // 2
+        return [(geometry, dates[:half]), (geometry, dates[half:])]
+    return None
+
+
+def is_server_error(error):
+    """Check if a request error may be solved by a smaller request."""
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return isinstance(error, (requests.Timeout, requests.exceptions.ChunkedEncodingError))
+
+
+def merge_chunks(frames):
+    """Merge the time series of the chunks, removing repeated pixels.
+
+    Pixels on the border of two polygon parts may be returned by both.
+    """
+    frames = [frame for frame in frames if len(frame) > 0]
+    if len(frames) == 0:
+        return None
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index = True)
+    geometries = df['geometry'].values
+    keys = pd.DataFrame({
+        "attribute": df['attribute'].values,
+        "x": shapely.get_x(geometries),
+        "y": shapely.get_y(geometries),
+        "datetime": df['datetime'].values
+    })
+    return df[~keys.duplicated().values].reset_index(drop = True)
+
+
+def _polygon_parts(geometries):
+    """Return the polygons with area of a list of geometries."""
+    parts = shapely.get_parts(geometries)
+    return [part for part in parts if part.geom_type == 'Polygon' and part.area > 0]
@@ -0,0 +1,185 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+import os
+import threading
+import time
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from wtss import WTSS
+
+from ..config import Config
+from .wtss_qgis_metrics import http_metrics
+
+
+class HostLimitedAdapter(HTTPAdapter):
+    """Pooled HTTP adapter with a default timeout and a limit of requests in flight per host.
+
+    Each request is recorded in ``metrics`` with its status, latency,
+    response size and number of retries.
+    """
+
+    def __init__(self, max_per_host = Config.HTTP_MAX_PER_HOST, timeout = Config.HTTP_TIMEOUT,
+                 metrics = http_metrics, **kwargs):
+        """Build the adapter.
+
+        :param max_per_host<int>: the max number of concurrent requests to a host.
+        :param timeout<tuple>: the (connect, read) timeout used when the request has none.
+        :param metrics<HttpMetrics>: the counters of the requests, None to not record them.
+        """
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.metrics = metrics
+        self._semaphores = {}
+        self._lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def _semaphore(self, host):
+        """Return the semaphore of a host."""
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+    def send(self, request, timeout = None, **kwargs):
+        """Send the request when the host has a free slot."""
+        url = urlparse(request.url)
+        with self._semaphore(url.netloc):
+            start = time.perf_counter()
+            try:
+                response = super().send(request, timeout = timeout or self.timeout, **kwargs)
+                if not kwargs.get('stream'):
+                    # Read here, so the latency includes the download of the body
+                    response.content
+            except Exception as error:
+                if self.metrics is not None:
+                    self.metrics.record(request.method, url.netloc, url.path, type(error).__name__,
+                                        time.perf_counter() - start)
+                raise
+            if self.metrics is not None:
+                self.metrics.record(request.method, url.netloc, url.path, response.status_code,
+                                    time.perf_counter() - start, response_size(response), response_retries(response))
+            return response
+
+
+def response_size(response):
+    """Return the bytes received of a response, the compressed size when it is gzipped."""
+    raw = response.raw
+    try:
+        if raw is not None and raw.tell() > 0:
+            return raw.tell()
+    except (AttributeError, OSError, ValueError):
+        pass
+    length = response.headers.get('Content-Length')
+    if length is not None and length.isdigit():
+        return int(length)
+    return len(response.content) if response._content_consumed else 0
+
+
+def response_retries(response):
+    """Return the number of retries made by urllib3 before the response."""
+    retries = getattr(response.raw, 'retries', None)
+    return len(getattr(retries, 'history', ()) or ())
+
+
+def create_session():
+    """Create a keep-alive session with connection pools, timeouts and gzip."""
+    session = requests.Session()
+    adapter = HostLimitedAdapter(
+        pool_connections = Config.HTTP_POOL_SIZE,
+        pool_maxsize = Config.HTTP_POOL_SIZE,
+        # Only the idempotent requests are retried, POST errors go to the query planner
+        max_retries = Retry(
+            total = Config.HTTP_RETRIES,
+            backoff_factor = 0.5,
+            status_forcelist = (502, 503, 504),
+            allowed_methods = frozenset(['GET', 'HEAD']),
+            raise_on_status = False
+        )
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def http_session():
+    """Return the session shared by the WTSS and STAC clients."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+_stac_clients = {}
+_stac_lock = threading.Lock()
+
+
+def open_stac(url = Config.STAC_HOST):
+    """Return the STAC client of a host, opened once per process.
+
+    The client sends the requests through the shared session, so the
+    catalog root is only requested the first time a host is used.
+
+    :param url<str>: the STAC host.
+    """
+    with _stac_lock:
+        if url not in _stac_clients:
+            import pystac_client
+            from pystac_client.stac_api_io import StacApiIO
+            stac_io = StacApiIO(timeout = Config.HTTP_TIMEOUT)
+            stac_io.session = http_session()
+            _stac_clients[url] = pystac_client.Client.open(url, stac_io = stac_io)
+        return _stac_clients[url]
+
+
+class SessionWTSS(WTSS):
+    """WTSS client sending the requests through the shared session."""
+
+    def __init__(self, url, session = None, **kwargs):
+        """Create the client.
+
+        :param url<str>: the WTSS host.
+        :param session<Session>: the HTTP session, the shared one when not given.
+        """
+        self._session = session or http_session()
+        super().__init__(url, **kwargs)
+
+    def _request(self, url, op, method = 'post', headers = None, params = None, json = None):
+        """Query the WTSS service and return the JSON document."""
+        url = '/'.join(s.strip('/') for s in [url, op])
+        verify = os.getenv('REQUEST_SSL_VERIFY', '1').lower() not in ('0', 'false', 'no', 'off')
+        response = self._session.request(method, url, headers = headers, params = params, json = json, verify = verify)
+        response.raise_for_status()
+        return response.json()
+
+    def _retrieve_timeseries_or_summarize(self, coverage_name, route, params = None, **options):
+        """Retrieve the time series or the summarize of a coverage."""
+        url = urljoin(self._url.strip('/') + '/', coverage_name)
+        headers = {'x-api-key': self._access_token}
+        return self._request(url, route, method = 'post', headers = headers, params = params, json = options)
@@ -0,0 +1,122 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from qgis.core import QgsApplication, QgsTask
+
+
+class WTSSTask(QgsTask):
+    """Run a WTSS request outside the GUI thread.
+
+    The function runs in a worker thread of the QGIS task manager and
+    the result is delivered back to the main thread with signals.
+    """
+
+    resultReady = pyqtSignal(object)
+    errorRaised = pyqtSignal(object)
+
+    def __init__(self, description, function, *args, **kwargs):
+        """Build the task.
+
+        :param description<str>: the task description shown in QGIS.
+        :param function<callable>: the function to run in background.
+        """
+        super().__init__(description, QgsTask.CanCancel)
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self.exception = None
+
+    def run(self):
+        """Run the function in the worker thread."""
+        try:
+            self.result = self.function(*self.args, **self.kwargs)
+            return True
+        except Exception as e:
+            self.exception = e
+            return False
+
+    def finished(self, result):
+        """Emit the result or the error in the main thread."""
+        if result:
+            self.resultReady.emit(self.result)
+        elif not self.isCanceled():
+            self.errorRaised.emit(self.exception)
+
+
+class WTSS_Tasks(QObject):
+    """Dispatch WTSS requests to the QGIS task manager.
+
+    :Methods:
+        submit
+        running
+        cancelAll
+    """
+
+    busyChanged = pyqtSignal(bool)
+
+    def __init__(self, parent = None):
+        """Init the list of tasks in flight."""
+        super().__init__(parent)
+        self.tasks = []
+
+    def running(self):
+        """Return the number of tasks in flight."""
+        return len(self.tasks)
+
+    def submit(self, description, function, *args, on_finished = None, on_error = None, on_progress = None, **kwargs):
+        """Send a function to the task manager and connect the callbacks.
+
+        :param description<str>: the task description shown in QGIS.
+        :param function<callable>: the function to run in background.
+        :param on_finished<callable>: called in the main thread with the result.
+        :param on_error<callable>: called in the main thread with the exception.
+        :param on_progress<callable>: called in the main thread with the percent done,
+            the function receives a ``progress`` keyword to report it.
+        """
+        task = WTSSTask(description, function, *args, **kwargs)
+        if on_progress:
+            task.kwargs['progress'] = task.setProgress
+            task.progressChanged.connect(on_progress)
+        if on_finished:
+            task.resultReady.connect(on_finished)
+        if on_error:
+            task.errorRaised.connect(on_error)
+        task.taskCompleted.connect(lambda: self._release(task))
+        task.taskTerminated.connect(lambda: self._release(task))
+        # Keep a reference, otherwise the task is garbage collected while running
+        self.tasks.append(task)
+        if len(self.tasks) == 1:
+            self.busyChanged.emit(True)
+        QgsApplication.taskManager().addTask(task)
+        return task
+
+    def cancelAll(self):
+        """Cancel all tasks in flight."""
+        for task in list(self.tasks):
+            task.cancel()
+
+    def _release(self, task):
+        """Remove the finished task from the list of tasks in flight."""
+        if task in self.tasks:
+            self.tasks.remove(task)
+            if len(self.tasks) == 0:
+                self.busyChanged.emit(False)
@@ -0,0 +1,365 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+import threading
+import warnings
+from collections import OrderedDict
+
+from ..config import Config, lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+shapely = lazy_import('shapely')
+
+TIME_SERIES_COLUMNS = ["attribute", "geometry", "value", "datetime"]
+
+
+def empty_time_series_df():
+    """Return a time series dataframe without rows."""
+    return pd.DataFrame({column: [] for column in TIME_SERIES_COLUMNS})
+
+
+class TimeSeriesStore:
+    """Time series values as a dense (sample x band x time) array.
+
+    The samples are pixel centers with longitude and latitude, the bands
+    keep their nodata value and the timeline is sorted. The methods that
+    select samples or bands return views of the same array.
+
+    :Methods:
+        from_df
+        mask
+        band
+        sample
+        slice
+        take
+        replace
+    """
+
+    __slots__ = ("coverage", "bands", "timeline", "longitude", "latitude", "values", "nodata")
+
+    def __init__(self, bands, timeline, longitude, latitude, values, nodata = None, coverage = None):
+        """Set the arrays of the store.
+
+        :param bands<list>: the band names.
+        :param timeline<DatetimeIndex>: the sorted dates.
+        :param longitude<ndarray>: the longitude of each sample.
+        :param latitude<ndarray>: the latitude of each sample.
+        :param values<ndarray>: the (sample x band x time) values.
+        :param nodata<ndarray>: the nodata value of each band, NaN when unknown.
+        :param coverage<str>: the coverage name.
+        """
+        self.coverage = coverage
+        self.bands = list(bands)
+        self.timeline = timeline
+        self.longitude = longitude
+        self.latitude = latitude
+        self.values = values
+        self.nodata = np.full(len(self.bands), np.nan) if nodata is None else np.asarray(nodata, dtype=float)
+
+    @classmethod
+    def from_df(cls, timeseries_df, coverage = None, nodata = None):
+        """Pivot the time series dataframe to a store.
+
+        The rows are scattered to the array positions in a single pass,
+        the samples and bands keep the order of the dataframe and the
+        timeline is sorted.
+
+        :param timeseries_df<DataFrame>: the WTSS time series in long format.
+        :param coverage<str>: the coverage name.
+        :param nodata<dict>: the nodata value by band name.
+        """
+        geometries = np.asarray(timeseries_df['geometry'])
+        longitude = shapely.get_x(geometries)
+        latitude = shapely.get_y(geometries)
+        # Each pixel center is identified by its coordinates as a complex number
+        sample_codes, samples = pd.factorize(longitude + 1j * latitude)
+        band_codes, bands = pd.factorize(timeseries_df['attribute'])
+        time_codes, timeline = pd.factorize(timeseries_df['datetime'], sort=True)
+        shape = (len(samples), len(bands), len(timeline))
+        values = timeseries_df['value'].to_numpy()
+        if len(values) != shape[0] * shape[1] * shape[2] or values.dtype.kind not in 'iuf':
+            values = values.astype(float)
+        cube = np.full(shape, np.nan, dtype=values.dtype) if values.dtype.kind == 'f' else np.empty(shape, dtype=values.dtype)
+        cube[sample_codes, band_codes, time_codes] = values
+        nodata_values = [
+            np.nan if (nodata or {}).get(band) is None else nodata[band]
+            for band in bands
+        ]
+        return cls(
+            bands, pd.DatetimeIndex(timeline),
+            np.ascontiguousarray(samples.real), np.ascontiguousarray(samples.imag),
+            cube, nodata = nodata_values, coverage = coverage
+        )
+
+    def __len__(self):
+        """Return the number of samples."""
+        return len(self.longitude)
+
+    def mask(self):
+        """Return True where the value is missing or equal to the band nodata."""
+        missing = self.values == self.nodata[None, :, None]
+        if self.values.dtype.kind == 'f':
+            missing |= np.isnan(self.values)
+        return missing
+
+    def band(self, band):
+        """Return a (sample x time) view of the values of a band."""
+        return self.values[:, self.bands.index(band)]
+
+    def sample(self, index):
+        """Return a (band x time) view of the values of a sample."""
+        return self.values[index]
+
+    def slice(self, start, stop):
+        """Return a store viewing the samples from start to stop."""
+        return TimeSeriesStore(
+            self.bands, self.timeline,
+            self.longitude[start:stop], self.latitude[start:stop], self.values[start:stop],
+            nodata = self.nodata, coverage = self.coverage
+        )
+
+    def take(self, indices):
+        """Return a store with copies of the samples at the indices, repeated when an index repeats."""
+        indices = np.asarray(indices, dtype=np.intp)
+        return TimeSeriesStore(
+            self.bands, self.timeline,
+            self.longitude[indices], self.latitude[indices], self.values[indices],
+            nodata = self.nodata, coverage = self.coverage
+        )
+
+    def replace(self, values):
+        """Return a store with the same samples, bands and timeline and other values."""
+        return TimeSeriesStore(
+            self.bands, self.timeline, self.longitude, self.latitude, values,
+            nodata = self.nodata, coverage = self.coverage
+        )
+
+
+class TimeSeriesResult:
+    """Time series merged from one or more WTSS requests.
+
+    It has the interface of ``wtss.TimeSeriesSearch`` used by the plugin,
+    but the data is already loaded and no request is sent to read it.
+    """
+
+    def __init__(self, coverage, attributes, start_date, end_date, geometry, df):
+        """Build the result.
+
+        :param coverage<Coverage>: the coverage description.
+        :param attributes<list>: the selected bands.
+        :param start_date<str>: start date string with 'yyyy-mm-dd' format.
+        :param end_date<str>: end date string with 'yyyy-mm-dd' format.
+        :param geometry<BaseGeometry>: the query geometry.
+        :param df<DataFrame>: the time series in long format.
+        """
+        from wtss.timeseries_search import TimeSeriesQuery
+        self.coverage = coverage
+        self.query = TimeSeriesQuery(
+            params = {},
+            attributes = list(attributes),
+            start_datetime = start_date,
+            end_datetime = end_date,
+            geom = geometry
+        )
+        self._df = df.reset_index(drop = True)
+        self._store = None
+
+    def df(self):
+        """Return the time series dataframe."""
+        return self._df
+
+    def store(self):
+        """Return the time series values as a ``TimeSeriesStore``, built once."""
+        if self._store is None:
+            attributes = getattr(self.coverage, 'attributes', None) or []
+            self._store = TimeSeriesStore.from_df(
+                self._df,
+                coverage = self.coverage.name,
+                nodata = {attribute['name']: attribute.get('nodata') for attribute in attributes}
+            )
+        return self._store
+
+    def total_locations(self):
+        """Return the number of pixel locations."""
+        if len(self._df) == 0:
+            return 0
+        return len(set(zip(shapely.get_x(self._df['geometry'].values), shapely.get_y(self._df['geometry'].values))))
+
+    def summarize(self, **options):
+        """Request the summarized values of the query."""
+        return self.coverage.summarize(
+            attributes = self.query.attributes,
+            geom = shapely.geometry.mapping(self.query.geom),
+            start_datetime = self.query.start_datetime,
+            end_datetime = self.query.end_datetime,
+            **options
+        )
+
+    def plot(self, stats = True, limit = None, attributes = None):
+        """Plot the loaded values like the native method of WTSS.py.
+
+        The series are drawn from the ``TimeSeriesStore``, so no request is
+        sent. The quartiles and the median of an area are computed from the
+        loaded samples instead of the WTSS summarize operation.
+
+        :param stats<bool>: plot the quartiles and the median when there is more than one sample.
+        :param limit<int>: the max number of samples plotted, all when None.
+        :param attributes<list>: the bands plotted, all loaded bands when None.
+        """
+        import matplotlib.pyplot as plt
+        if limit is not None and limit < 0:
+            raise ValueError('Limit cannot be negative')
+        store = self.store()
+        bands = [band for band in (attributes or store.bands) if band in store.bands]
+        fig, axes = plt.subplots(max(len(bands), 1), figsize = (16, 5 * max(len(bands), 1)), squeeze = False)
+        shown = len(store) if limit is None else min(limit, len(store))
+        alpha = 0.2 if shown > 100 else 0.6
+        mask = store.mask()
+        for band, axis in zip(bands, axes[:, 0]):
+            index = store.bands.index(band)
+            values = np.where(mask[:, index], np.nan, store.values[:, index]).astype(float)
+            axis.plot(store.timeline, values[:shown].T, ls = '-', linewidth = 1, color = '#7F9BB1', alpha = alpha)
+            if stats and len(store) > 1:
+                with warnings.catch_warnings():
+                    # Dates without any valid value are left as gaps
+                    warnings.simplefilter('ignore', RuntimeWarning)
+                    q1, median, q3 = np.nanquantile(values, [0.25, 0.5, 0.75], axis = 0)
+                axis.plot(store.timeline, q1, color = '#b19541', linewidth = 1.5)
+                axis.plot(store.timeline, q3, color = '#b19541', linewidth = 1.5)
+                axis.plot(store.timeline, median, label = f'{band} median', color = '#B16240', linewidth = 2.5)
+            axis.text(-0.05, 0.5, band, transform = axis.transAxes, rotation = 90, va = 'center', ha = 'left', fontsize = 20)
+        title = 'Time Series'
+        if shown < len(store):
+            title += f' (Showing {shown} of {len(store)} points)'
+        fig.suptitle(title, fontsize = 22)
+        fig.subplots_adjust(top = 0.96)
+        fig.autofmt_xdate()
+        fig.show()
+        return fig
+
+
+class TimeSeriesHoldings:
+    """Time series held locally by (host, coverage, band, geometry).
+
+    Each entry keeps the dates already fetched, so a new query only
+    requests the dates of the timeline that are missing. The rows held
+    are bounded by a memory budget, the least recently used entries are
+    removed when it is exceeded.
+
+    :Methods:
+        key
+        missing_intervals
+        merge
+        get
+    """
+
+    def __init__(self, max_bytes = Config.HOLDINGS_MAX_BYTES):
+        """Init the entries.
+
+        :param max_bytes<int>: the max memory of the rows kept, least recently used entries are removed.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of entries held."""
+        return len(self._entries)
+
+    @staticmethod
+    def _nbytes(df):
+        """Return the memory used by the rows of a data frame, object columns included."""
+        return int(df.memory_usage(index = True, deep = True).sum())
+
+    def _evict(self, keep):
+        """Remove the least recently used entries until the budget is met, except the entry ``keep``."""
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                self._entries.move_to_end(key)
+                continue
+            self._entries.pop(key)
+            self.nbytes -= entry['bytes']
+
+    @staticmethod
+    def key(host, coverage, band, geometry):
+        """Return the key of a band series for a geometry."""
+        return (str(host).rstrip('/'), coverage, band, geometry.wkb_hex)
+
+    def missing_intervals(self, key, dates):
+        """Return the contiguous runs of dates not held.
+
+        :param key<tuple>: the entry key.
+        :param dates<list>: the sorted timeline dates of the query.
+        :returns: list of runs, each one a tuple of dates.
+        """
+        with self._lock:
+            held = self._entries[key]['dates'] if key in self._entries else set()
+        runs = []
+        run = []
+        for date in dates:
+            if date in held:
+                if run:
+                    runs.append(tuple(run))
+                run = []
+            else:
+                run.append(date)
+        if run:
+            runs.append(tuple(run))
+        return runs
+
+    def merge(self, key, dates, df):
+        """Add the rows of fetched dates to an entry.
+
+        :param key<tuple>: the entry key.
+        :param dates<list>: the dates requested, held even when the server has no value.
+        :param df<DataFrame>: the rows of the band in long format.
+        """
+        with self._lock:
+            entry = self._entries.setdefault(key, {'dates': set(), 'chunks': [], 'bytes': 0})
+            entry['dates'].update(dates)
+            if len(df) > 0:
+                size = self._nbytes(df)
+                entry['chunks'].append(df)
+                entry['bytes'] += size
+                self.nbytes += size
+            self._entries.move_to_end(key)
+            self._evict(keep = key)
+
+    def get(self, key, start_date, end_date):
+        """Return the rows held for an entry between two dates."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or len(entry['chunks']) == 0:
+                return empty_time_series_df()
+            if len(entry['chunks']) > 1:
+                entry['chunks'] = [pd.concat(entry['chunks']).sort_values(['datetime'], kind = 'stable')]
+                size = self._nbytes(entry['chunks'][0])
+                self.nbytes += size - entry['bytes']
+                entry['bytes'] = size
+            self._entries.move_to_end(key)
+            df = entry['chunks'][0]
+        selected = (df['datetime'] >= pd.Timestamp(start_date)) & (df['datetime'] <= pd.Timestamp(end_date))
+        return df[selected]
+
+
+time_series_holdings = TimeSeriesHoldings()
@@ -0,0 +1,284 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+import cProfile
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from ..config import Config
+
+
+class ProfileSession:
+    """cProfile statistics of one action, collected in all the threads that run it.
+
+    An action runs in stages: a background task, the pool workers started
+    by it and the callback in the main thread. Each stage has its own
+    profiler, merged in a single ``.prof`` file when the action is saved.
+
+    Python 3.12 and later allow a single active profiler, which already
+    records the calls of all threads. A stage that starts while another
+    stage of the same action is profiled is then recorded by that one.
+    """
+
+    def __init__(self, name, path):
+        """Init the session.
+
+        :param name<str>: the action name.
+        :param path<str>: the ``.prof`` file path.
+        """
+        self.name = name
+        self.path = path
+        self.profilers = []
+        self.active = 0
+        self.saved = False
+        self.missed = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self):
+        """Profile the block in the current thread as a stage of the action."""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is active, only a loss when it is not one of this action
+            with self._lock:
+                if self.active == 0:
+                    self.missed.append(threading.current_thread().name)
+            yield
+            return
+        with self._lock:
+            self.profilers.append(profiler)
+            self.active += 1
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                self.active -= 1
+
+    def save(self):
+        """Merge the stats of the stages and write the ``.prof`` file, None when there are no stats."""
+        with self._lock:
+            if self.saved:
+                return None
+            self.saved = True
+            profilers = list(self.profilers)
+        stats = None
+        for profiler in profilers:
+            profiler.create_stats()
+            if not profiler.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+        if stats is None:
+            return None
+        os.makedirs(os.path.dirname(self.path), exist_ok = True)
+        stats.dump_stats(self.path)
+        return self.path
+
+
+class Tracer:
+    """Timing spans of the plugin stages.
+
+    Each span is written to the QGIS message log and appended as a JSON line
+    to a trace file, which is rotated above ``max_size`` bytes. The profiling
+    mode runs the actions in ``cProfile`` and saves a ``.prof`` file for each
+    one, with the stats of all its threads.
+
+    :Methods:
+        span
+        profile
+        startProfile
+        stage
+        wrap
+        saveProfile
+        setProfiling
+        events
+    """
+
+    def __init__(self, path = None, enabled = Config.TRACE_ENABLED, max_size = Config.TRACE_MAX_SIZE,
+                 profiling = Config.PROFILE_ENABLED):
+        """Set the trace file.
+
+        :param path<str>: the JSON lines trace file.
+        :param enabled<bool>: record the spans.
+        :param max_size<int>: the size in bytes to rotate the trace file.
+        :param profiling<bool>: profile the actions wrapped by ``profile``.
+        """
+        self.path = path or os.path.join(Config.TRACE_DIR, 'trace.jsonl')
+        self.enabled = enabled
+        self.max_size = max_size
+        self.profiling = profiling
+        self._events = deque(maxlen = 1000)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time the block as a stage of the plugin.
+
+        :param name<str>: the stage name, like 'wtss.http' or 'plot.render'.
+        :param attributes: values saved with the span, like the product name.
+        """
+        if not self.enabled:
+            yield
+            return
+        parents = getattr(self._local, 'parents', ())
+        self._local.parents = parents + (name,)
+        started = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as exception:
+            error = type(exception).__name__
+            raise
+        finally:
+            self._local.parents = parents
+            self.record({
+                "name": name,
+                "parent": parents[-1] if parents else None,
+                "start": started,
+                "duration_ms": (time.perf_counter() - start) * 1000,
+                "thread": threading.current_thread().name,
+                "error": error,
+                "attributes": attributes
+            })
+
+    def record(self, event):
+        """Keep a span and write it to the log and to the trace file."""
+        self._events.append(event)
+        status = f" ({event['error']})" if event['error'] else ""
+        self.log(f"{event['name']}: {event['duration_ms']:.1f} ms{status}")
+        line = json.dumps(event, default = str) + "\n"
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok = True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_size:
+                    os.replace(self.path, self.path + '.1')
+                with open(self.path, 'a', encoding = 'utf-8') as trace_file:
+                    trace_file.write(line)
+            except OSError:
+                pass
+
+    @staticmethod
+    def log(message):
+        """Write a message to the WTSS tab of the QGIS message log."""
+        try:
+            from qgis.core import Qgis, QgsMessageLog
+            QgsMessageLog.logMessage(message, 'WTSS', Qgis.Info)
+        except ImportError:
+            logging.getLogger('wtss_plugin').info(message)
+
+    @contextmanager
+    def profile(self, name):
+        """Profile the block as a whole action when profiling is enabled and save the stats.
+
+        A block inside a stage of another action is part of that action.
+
+        :param name<str>: the action name used in the file name.
+        """
+        if getattr(self._local, 'session', None) is not None:
+            yield
+            return
+        session = self.startProfile(name)
+        try:
+            with self.stage(session):
+                yield
+        finally:
+            self.saveProfile(session)
+
+    def startProfile(self, name):
+        """Return a ``ProfileSession`` of an action, None when profiling is disabled.
+
+        :param name<str>: the action name used in the file name.
+        """
+        if not self.profiling:
+            return None
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        return ProfileSession(name, os.path.join(os.path.dirname(self.path), f'{name}-{stamp}.prof'))
+
+    @contextmanager
+    def stage(self, session):
+        """Profile the block in the current thread as a stage of an action, nothing when session is None.
+
+        The functions wrapped by ``wrap`` in the block are stages of the same action.
+        """
+        previous = getattr(self._local, 'session', None)
+        if session is None or session is previous:
+            yield
+            return
+        self._local.session = session
+        try:
+            with session.stage():
+                yield
+        finally:
+            self._local.session = previous
+
+    def wrap(self, function):
+        """Return a function that runs as a stage of the action profiled in the current thread.
+
+        Used for the functions sent to a thread pool, the function itself when nothing is profiled.
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            return function
+
+        def staged(*args, **kwargs):
+            with self.stage(session):
+                return function(*args, **kwargs)
+        return staged
+
+    def saveProfile(self, session):
+        """Write the stats of an action, called once its last stage ended."""
+        if session is None:
+            return
+        try:
+            path = session.save()
+        except OSError as error:
+            self.log(f"Profile of {session.name} not saved: {error}")
+            return
+        if session.missed:
+            self.log(f"Profile of {session.name} misses the threads {', '.join(session.missed)}: another profiler was active")
+        if path is None:
+            self.log(f"Profile of {session.name} has no stats")
+        else:
+            self.log(f"Profile of {session.name} saved to {path}")
+
+    def setProfiling(self, enabled):
+        """Enable or disable the profiling of the actions."""
+        self.profiling = bool(enabled)
+
+    def events(self, name = None):
+        """Return the recent spans, the ones of a stage when a name is given."""
+        return [event for event in list(self._events) if name is None or event['name'] == name]
+
+
+tracer = Tracer()
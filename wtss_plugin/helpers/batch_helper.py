@@ -0,0 +1,484 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Extract the time series of many geometries without QGIS.
+
+The geometries of a CSV of points or of a vector file are queried
+concurrently and the series are written to a Parquet or CSV file as the
+queries finish, in the order of the input. Each series has the id of its
+input feature, the index of the feature in the input or the value of the
+``--id-column``: a point has the series of its pixel, a polygon one series
+by pixel. Both formats keep the raw values with the nodata ones missing,
+or the values interpolated like the dialog exports with ``--interpolate``.
+
+Usage::
+
+    wtss-batch --coverage S2-16D-2 --bands NDVI EVI --start-date 2020-01-01 --end-date 2020-12-31 \\
+        --input points.csv --output points.parquet
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from ..config import Config, lazy_import
+from ..controller.wtss_qgis_controller import WTSS_Controls
+from ..controller.wtss_qgis_metrics import http_metrics
+from ..controller.wtss_qgis_timeseries import TimeSeriesResult, TimeSeriesStore
+from .files_export_helper import ApplyTimeSeries, FilesFormat
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+shapely = lazy_import('shapely')
+
+X_COLUMNS = ("longitude", "lon", "lng", "x")
+
+Y_COLUMNS = ("latitude", "lat", "y")
+
+METERS_PER_DEGREE = 111320.0
+
+
+def find_column(columns, name, candidates):
+    """Return the column given by name or the first candidate found, ignoring the case."""
+    lower = {column.lower(): column for column in columns}
+    for candidate in ([name] if name else candidates):
+        if candidate.lower() in lower:
+            return lower[candidate.lower()]
+    raise ValueError(f"Column {name or '/'.join(candidates)} not found in {', '.join(columns)}")
+
+
+def read_points_csv(file_name, x_column = None, y_column = None, id_column = None):
+    """Yield the id and the point of the rows of a CSV file in EPSG:4326.
+
+    :param file_name<str>: the CSV file path.
+    :param x_column<str>: the longitude column, found by name when not given.
+    :param y_column<str>: the latitude column, found by name when not given.
+    :param id_column<str>: the id column, the row index starting at 0 when not given.
+    """
+    with open(file_name, newline = '') as csv_file:
+        reader = csv.DictReader(csv_file)
+        x_column = find_column(reader.fieldnames or [], x_column, X_COLUMNS)
+        y_column = find_column(reader.fieldnames or [], y_column, Y_COLUMNS)
+        if id_column:
+            id_column = find_column(reader.fieldnames or [], id_column, ())
+        for index, row in enumerate(reader):
+            yield (row[id_column] if id_column else index), shapely.Point(float(row[x_column]), float(row[y_column]))
+
+
+def read_geojson(file_name, id_column = None):
+    """Yield the id and the geometry of the features of a GeoJSON file in EPSG:4326.
+
+    :param file_name<str>: the GeoJSON file path.
+    :param id_column<str>: the property with the id, the feature index starting at 0 when not given.
+    """
+    with open(file_name) as json_file:
+        document = json.load(json_file)
+    features = document.get('features', [document]) if document.get('type') == 'FeatureCollection' else [document]
+    for index, feature in enumerate(features):
+        geometry = feature.get('geometry') if feature.get('type') == 'Feature' else feature
+        if geometry:
+            feature_id = str((feature.get('properties') or {}).get(id_column)) if id_column else index
+            yield feature_id, shapely.geometry.shape(geometry)
+
+
+def read_vector(file_name, id_column = None):
+    """Yield the id and the geometry of the features of a vector file read by OGR, transformed to EPSG:4326.
+
+    :param file_name<str>: the vector file path.
+    :param id_column<str>: the field with the id, the feature index starting at 0 when not given.
+    """
+    from osgeo import ogr, osr
+    dataset = ogr.Open(file_name)
+    if dataset is None:
+        raise ValueError(f"Could not open {file_name}")
+    target = osr.SpatialReference()
+    target.ImportFromEPSG(4326)
+    target.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    layer = dataset.GetLayer(0)
+    source = layer.GetSpatialRef()
+    transform = None
+    if source is not None and not source.IsSame(target):
+        transform = osr.CoordinateTransformation(source, target)
+    for index, feature in enumerate(layer):
+        geometry = feature.GetGeometryRef()
+        if geometry is None:
+            continue
+        if transform is not None:
+            geometry.Transform(transform)
+        feature_id = str(feature.GetField(id_column)) if id_column else index
+        yield feature_id, shapely.from_wkb(bytes(geometry.ExportToIsoWkb()))
+
+
+def read_geometries(file_name, x_column = None, y_column = None, id_column = None):
+    """Yield the id and the geometry of the features of a CSV of points, a GeoJSON or another vector file.
+
+    :param file_name<str>: the input file path.
+    :param x_column<str>: the longitude column of a CSV file.
+    :param y_column<str>: the latitude column of a CSV file.
+    :param id_column<str>: the column with the feature id, the index of the feature in the input when not given.
+    """
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension in ('.csv', '.txt'):
+        return read_points_csv(file_name, x_column, y_column, id_column)
+    if extension in ('.geojson', '.json'):
+        return read_geojson(file_name, id_column)
+    return read_vector(file_name, id_column)
+
+
+def query_geometries(features, batch_size = Config.CHUNK_MAX_POINTS):
+    """Group the consecutive points in MultiPoints, the other geometries are queried alone.
+
+    :param features<iterable>: the id and the geometry of the input features.
+    :param batch_size<int>: the max number of points of a query.
+    :returns: the feature ids and the geometry of each query, an id by point of a MultiPoint.
+    """
+    ids = []
+    points = []
+    for feature_id, geometry in features:
+        if geometry.geom_type in ('Point', 'MultiPoint'):
+            parts = shapely.get_parts(geometry)
+            points.extend(parts)
+            ids.extend([feature_id] * len(parts))
+            while len(points) >= batch_size:
+                yield ids[:batch_size], shapely.MultiPoint(points[:batch_size])
+                ids, points = ids[batch_size:], points[batch_size:]
+        else:
+            # The points read before are queried first, the output keeps the order of the input
+            if points:
+                yield ids, shapely.MultiPoint(points)
+                ids, points = [], []
+            yield [feature_id], geometry
+    if points:
+        yield ids, shapely.MultiPoint(points)
+
+
+def pixel_diagonal(pixel_size, crs, latitude):
+    """Return the diagonal of a pixel in degrees at a latitude.
+
+    :param pixel_size<tuple>: the pixel width and height in the units of the coverage CRS,
+        degrees for a geographic CRS and meters for the other ones.
+    :param crs<str>: the coverage CRS.
+    :param latitude<float>: the max absolute latitude of the query.
+    """
+    width, height = (abs(float(size)) for size in pixel_size)
+    if not any(name in str(crs).lower() for name in ('4326', 'longlat', '4674')):
+        width /= METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01)
+        height /= METERS_PER_DEGREE
+    return math.hypot(width, height)
+
+
+def feature_series(cube, ids, geometry, max_distance = None):
+    """Return the series of each input feature of a query, their feature ids and the number of points without series.
+
+    A point has the series of its pixel, found as the nearest pixel center,
+    so the points of the same pixel have one series each. A point without a
+    pixel center closer than ``max_distance`` was not answered by the
+    server and has no series. The series of the pixels of another geometry
+    have the id of the geometry.
+
+    :param cube<TimeSeriesStore>: the series of the query pixels.
+    :param ids<list>: the feature ids of the query.
+    :param geometry<BaseGeometry>: the query geometry.
+    :param max_distance<float>: the max distance in degrees of a point to its pixel center, no limit when None.
+    """
+    if geometry.geom_type != 'MultiPoint':
+        return cube, ids * len(cube), 0
+    centers = shapely.points(cube.longitude, cube.latitude)
+    points, nearest = shapely.STRtree(centers).query_nearest(
+        shapely.get_parts(geometry), max_distance = max_distance, all_matches = False
+    )
+    return cube.take(nearest), [ids[point] for point in points], len(ids) - len(points)
+
+
+class BatchExtraction:
+    """Time series of many geometries queried concurrently and streamed to a file.
+
+    The queries are split and retried by ``WTSS_Controls.planTimeSeries``,
+    at most ``2 * workers`` of them are in flight, so the memory used does
+    not grow with the input. The series are written with the nodata values
+    missing, NaN in CSV and null in Parquet, or interpolated like the ones
+    exported by the dialog.
+
+    :Methods:
+        describe
+        query
+        results
+        open_writer
+        run
+    """
+
+    FORMATS = ("parquet", "csv")
+
+    def __init__(self, coverage, bands, start_date, end_date, host = Config.WTSS_HOST,
+                 workers = Config.BATCH_WORKERS, controls = None, interpolate = False):
+        """Set the query.
+
+        :param coverage<str>: the coverage name.
+        :param bands<list>: the band names.
+        :param start_date<str>: start date string with 'yyyy-mm-dd' format.
+        :param end_date<str>: end date string with 'yyyy-mm-dd' format.
+        :param host<str>: the WTSS host.
+        :param workers<int>: the number of queries run concurrently.
+        :param controls<WTSS_Controls>: the WTSS controls, new ones when not given.
+        :param interpolate<bool>: write the interpolated values instead of the raw ones.
+        """
+        self.coverage = coverage
+        self.bands = list(bands)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.workers = max(1, workers)
+        self.interpolate = interpolate
+        self.controls = controls or WTSS_Controls()
+        self.controls.setService(host)
+        self.files_format = FilesFormat()
+        self.apply_ts = ApplyTimeSeries()
+        self.description = None
+        self.dates = []
+
+    def describe(self):
+        """Read the coverage description and check the bands and the dates."""
+        self.description = self.controls.productDescription(self.coverage)
+        attributes = {attribute['name']: attribute for attribute in self.description.attributes}
+        missing = [band for band in self.bands if band not in attributes]
+        if missing:
+            raise ValueError(f"Bands {', '.join(missing)} not found in {self.coverage}")
+        self.apply_ts.bands_description = {band: attributes[band] for band in self.bands}
+        self.dates = [date for date in self.description.timeline if self.start_date <= date <= self.end_date]
+        if not self.dates:
+            raise ValueError(f"No date of {self.coverage} between {self.start_date} and {self.end_date}")
+
+    def query(self, geometry):
+        """Return the time series of a geometry.
+
+        :param geometry<BaseGeometry>: the query geometry.
+        """
+        df = self.controls.planTimeSeries(self.coverage, self.bands, self.dates, geometry)
+        return TimeSeriesResult(self.description, self.bands, self.start_date, self.end_date, geometry, df)
+
+    def results(self, queries):
+        """Yield the feature ids, the geometry and the finished future of each query, in the order of the input.
+
+        :param queries<iterable>: the feature ids and the geometry of the queries.
+        """
+        with ThreadPoolExecutor(max_workers = self.workers) as executor:
+            pending = deque()
+            try:
+                for ids, geometry in queries:
+                    pending.append((ids, geometry, executor.submit(self.query, geometry)))
+                    if len(pending) >= 2 * self.workers:
+                        ids_, geometry_, future = pending.popleft()
+                        wait([future])
+                        yield ids_, geometry_, future
+                while pending:
+                    ids_, geometry_, future = pending.popleft()
+                    wait([future])
+                    yield ids_, geometry_, future
+            finally:
+                for _, _, future in pending:
+                    future.cancel()
+
+    @contextmanager
+    def open_writer(self, file_name, output_format):
+        """Open the output file and return a function writing a store and its feature ids after the samples already written.
+
+        :param file_name<str>: the file path.
+        :param output_format<str>: 'parquet' or 'csv'.
+        """
+        # Both formats write the same values, the nodata ones as NaN or null
+        transform = self.apply_ts.interpolate_cube if self.interpolate else self.apply_ts.mask_cube
+        if output_format == 'csv':
+            with open(file_name, 'w', newline = '') as csv_file:
+                self.files_format.write_time_series_csv(csv_file, self.empty_cube(), feature_ids = [])
+                yield lambda cube, offset, feature_ids: self.files_format.write_time_series_csv(
+                    csv_file, cube, transform = transform, header = False,
+                    sample_offset = offset, feature_ids = feature_ids
+                )
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writers = []
+
+        def write(cube, offset, feature_ids):
+            if self.interpolate:
+                cube = transform(cube)
+            # The values and ids types are the ones of the first store, the next ones are cast to them
+            if not writers:
+                schema = self.files_format.parquet_schema(cube.values.dtype, pa.array(feature_ids[:1]).type)
+                writers.append(pq.ParquetWriter(file_name, schema, compression = 'zstd'))
+            self.files_format.write_time_series_parquet(
+                file_name, cube, nodata = self.apply_ts.nodata_values(cube.bands),
+                writer = writers[0], sample_offset = offset, feature_ids = feature_ids
+            )
+
+        try:
+            yield write
+        finally:
+            for writer in writers:
+                writer.close()
+        if not writers:
+            self.files_format.write_time_series_parquet(file_name, self.empty_cube(), feature_ids = [])
+
+    def run(self, queries, output, output_format = None, log = None):
+        """Query the geometries, write the series and return the throughput report.
+
+        A query failing after the retries of the planner is counted in the
+        report and the next ones go on. The points without a pixel in the
+        response are not written and are counted as unmatched.
+
+        :param queries<iterable>: the feature ids and the geometry of the queries, like the ones of ``query_geometries``.
+        :param output<str>: the Parquet or CSV file path.
+        :param output_format<str>: 'parquet' or 'csv', found by the file extension when not given.
+        :param log<callable>: called with the report after each query.
+        """
+        output_format = (output_format or os.path.splitext(output)[1].lstrip('.')).lower()
+        if output_format not in self.FORMATS:
+            raise ValueError(f"Unknown output format {output_format}, use one of {', '.join(self.FORMATS)}")
+        if self.description is None:
+            self.describe()
+        before = http_metrics.snapshot()
+        start = time.perf_counter()
+        report = {"coverage": self.coverage, "bands": self.bands, "dates": len(self.dates),
+                  "output": output, "queries": 0, "failed": 0, "error": None, "series": 0, "unmatched": 0}
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok = True)
+        # Written aside and renamed, so a partial file is never taken as a result
+        partial_file = f'{output}.part'
+        with self.open_writer(partial_file, output_format) as write:
+            for ids, geometry, future in self.results(queries):
+                report["queries"] += 1
+                try:
+                    result = future.result()
+                except Exception as error:
+                    report["failed"] += 1
+                    report["error"] = f"{type(error).__name__}: {error}"
+                    result = None
+                if result is not None and len(result.df()) > 0:
+                    cube, feature_ids, unmatched = feature_series(
+                        result.store(), ids, geometry, self.max_distance(geometry)
+                    )
+                    write(cube, report["series"], feature_ids)
+                    report["series"] += len(cube)
+                    report["unmatched"] += unmatched
+                elif result is not None and geometry.geom_type == 'MultiPoint':
+                    report["unmatched"] += len(ids)
+                if log is not None:
+                    log(self.throughput(report, start, before))
+        os.replace(partial_file, output)
+        return self.throughput(report, start, before)
+
+    def max_distance(self, geometry):
+        """Return the max distance in degrees of the points of a query to their pixel center, None when unknown.
+
+        It is the pixel diagonal, twice the distance of a point to the center
+        of its pixel, so the pixels reprojected to longitude and latitude are
+        still matched.
+        """
+        pixel_size = self.controls.pixel_sizes.get(self.coverage)
+        if pixel_size is None:
+            return None
+        latitude = max(abs(geometry.bounds[1]), abs(geometry.bounds[3]))
+        return pixel_diagonal(pixel_size, self.description.get('bdc:crs'), latitude)
+
+    def empty_cube(self):
+        """Return a store without samples with the bands and dates of the query."""
+        return TimeSeriesStore(
+            self.bands, pd.DatetimeIndex(self.dates), np.empty(0), np.empty(0),
+            np.empty((0, len(self.bands), len(self.dates))), coverage = self.coverage
+        )
+
+    def throughput(self, report, start, before):
+        """Return the report with the elapsed time, the rates and the HTTP usage since the start."""
+        seconds = time.perf_counter() - start
+        after = http_metrics.snapshot()
+        return {
+            **report,
+            "seconds": seconds,
+            "series_per_second": report["series"] / seconds if seconds > 0 else 0.0,
+            "queries_per_second": report["queries"] / seconds if seconds > 0 else 0.0,
+            "requests": after["requests"] - before["requests"],
+            "bytes": after["bytes"] - before["bytes"]
+        }
+
+
+def main(argv = None):
+    """Run a batch extraction from the command line."""
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--coverage", required = True, help = "the coverage name, like S2-16D-2")
+    parser.add_argument("--bands", required = True, nargs = "+")
+    parser.add_argument("--start-date", required = True, help = "yyyy-mm-dd")
+    parser.add_argument("--end-date", required = True, help = "yyyy-mm-dd")
+    parser.add_argument("--input", required = True, help = "a CSV of points, a GeoJSON or a vector file read by OGR")
+    parser.add_argument("--output", required = True, help = "the Parquet or CSV file")
+    parser.add_argument("--format", choices = BatchExtraction.FORMATS, default = None)
+    parser.add_argument("--host", default = Config.WTSS_HOST)
+    parser.add_argument("--workers", type = int, default = Config.BATCH_WORKERS)
+    parser.add_argument("--batch-size", type = int, default = Config.CHUNK_MAX_POINTS, help = "points by query")
+    parser.add_argument("--x-column", default = None, help = "the longitude column of a CSV file")
+    parser.add_argument("--y-column", default = None, help = "the latitude column of a CSV file")
+    parser.add_argument("--id-column", default = None,
+                        help = "the feature id written with each series, the index of the feature when not given")
+    parser.add_argument("--interpolate", action = "store_true",
+                        help = "write the values interpolated like the dialog exports, the raw values "
+                               "with the nodata ones missing when not given")
+    parser.add_argument("--no-cache", action = "store_true", help = "do not store the responses in the cache")
+    parser.add_argument("--report", default = None, help = "also write the report and the HTTP metrics as JSON")
+    parser.add_argument("--quiet", action = "store_true")
+    args = parser.parse_args(argv)
+
+    if args.no_cache:
+        Config.CACHE_ENABLED = False
+
+    def log(report):
+        if not args.quiet:
+            print(f"{report['queries']:>8} queries {report['series']:>10} series "
+                  f"{report['series_per_second']:>10.1f} series/s", file = sys.stderr, flush = True)
+
+    batch = BatchExtraction(
+        args.coverage, args.bands, args.start_date, args.end_date, host = args.host, workers = args.workers,
+        interpolate = args.interpolate
+    )
+    try:
+        features = read_geometries(args.input, args.x_column, args.y_column, args.id_column)
+        report = batch.run(query_geometries(features, args.batch_size), args.output, output_format = args.format, log = log)
+    except (OSError, ValueError) as error:
+        print(f"wtss-batch: {error}", file = sys.stderr)
+        return 1
+    if report['failed']:
+        print(f"wtss-batch: {report['failed']} queries failed, the last one with {report['error']}", file = sys.stderr)
+    if report['unmatched']:
+        print(f"wtss-batch: {report['unmatched']} points have no pixel in the response and were not written",
+              file = sys.stderr)
+    print(
+        f"{report['series']} series of {report['queries']} queries written to {report['output']} "
+        f"in {report['seconds']:.1f} s: {report['series_per_second']:.1f} series/s, "
+        f"{report['requests']} requests, {report['bytes'] / 1024 / 1024:.1f} MiB"
+    )
+    if args.report:
+        http_metrics.save(args.report, {"report": report, "http": http_metrics.snapshot()})
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,18 +18,19 @@
 
 """Python QGIS Plugin for WTSS."""
 
+import csv
 import json
 import os
 import warnings
 from datetime import datetime
 from pathlib import Path
 
-import matplotlib.pyplot as plt
-import pandas as pd
-import seaborn
-from PyQt5.QtWidgets import QMessageBox
+from ..config import lazy_import
+from ..controller.wtss_qgis_timeseries import TimeSeriesStore
+from ..controller.wtss_qgis_trace import tracer
 
-from ..helpers.pystac_helper import get_source_from_click
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
@@ -37,32 +38,66 @@ class ApplyTimeSeries:
     """Methods to apply in time series in panda Series format.
 
     :Methods:
+        nodata_values
+        scale_values
         _set_NaN
         _interpolate
         get_bands_from_df
-        apply_to_time_series_df
+        interpolate_df
+        mask_cube
+        interpolate_cube
     """
 
     def __init__(self):
         """Init the value for band description."""
         self.bands_description = None
-        self.selected_band = None
 
-    def _set_NaN(self, value):
-        """Set none to missing values of time series."""
-        missing_value = self.selected_band.get('nodata')
-        if value != missing_value:
-            return value
-        else:
-            return None
-
-    def _interpolate(self, time_series_values):
-        """Interpolate the time series using none values in pandas Series."""
-        return time_series_values.interpolate(
-            method = 'linear',
-            limit_direction = 'forward',
-            order = 2
-        )
+    def nodata_values(self, bands):
+        """Get the nodata value of each band, NaN when it is not described."""
+        nodata = []
+        for band in bands:
+            value = (self.bands_description or {}).get(band, {}).get('nodata')
+            nodata.append(np.nan if value is None else value)
+        return np.asarray(nodata, dtype=float)
+
+    def scale_values(self, bands):
+        """Get the scale factor of each band, 1 when it is not described."""
+        scale = []
+        for band in bands:
+            description = (self.bands_description or {}).get(band, {})
+            value = description.get('scale', description.get('scale_factor'))
+            scale.append(1.0 if value is None else value)
+        return np.asarray(scale, dtype=float)
+
+    def _set_NaN(self, values, nodata):
+        """Set NaN to missing values of all bands and samples at once.
+
+        :param values<ndarray>: time series with the band axis before the time axis.
+        :param nodata<ndarray>: the nodata value of each band.
+        """
+        values = np.asarray(values, dtype=float)
+        return np.where(values == nodata[:, None], np.nan, values)
+
+    def _interpolate(self, values):
+        """Interpolate NaN values along the last axis (time).
+
+        Same rule as pandas linear interpolation with forward limit direction:
+        leading missing values are kept and trailing ones repeat the last value.
+        """
+        valid = ~np.isnan(values)
+        positions = np.arange(values.shape[-1])
+        previous = np.maximum.accumulate(np.where(valid, positions, -1), axis=-1)
+        following = np.flip(np.minimum.accumulate(
+            np.flip(np.where(valid, positions, values.shape[-1]), axis=-1), axis=-1
+        ), axis=-1)
+        has_previous = previous >= 0
+        has_following = following < values.shape[-1]
+        previous_values = np.take_along_axis(values, np.where(has_previous, previous, 0), axis=-1)
+        following_values = np.take_along_axis(values, np.where(has_following, following, 0), axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = (positions - previous) / (following - previous)
+        interpolated = np.where(has_following, previous_values + (following_values - previous_values) * weight, previous_values)
+        return np.where(valid, values, np.where(has_previous, interpolated, np.nan))
 
     def get_bands_from_df(self, time_series_df: any):
         """Get bands from time series DataFrame."""
@@ -72,22 +107,47 @@ class ApplyTimeSeries:
 
     def interpolate_df(self, time_series):
         """Apply normalize and interpolation to time series data."""
-        for band in self.get_bands_from_df(time_series):
-            self.selected_band = self.bands_description.get(band)
-            time_series[band] = time_series[band].apply(self._set_NaN)
-            time_series[band] = self._interpolate(time_series[band])
+        bands = self.get_bands_from_df(time_series)
+        values = self._set_NaN(time_series[bands].to_numpy().T, self.nodata_values(bands))
+        time_series[bands] = self._interpolate(values).T
         return time_series
 
+    def mask_cube(self, cube):
+        """Set NaN to the nodata values of a (sample x band x time) cube.
+
+        :param cube<TimeSeriesStore>: the time series values.
+        """
+        return cube.replace(self._set_NaN(cube.values, self.nodata_values(cube.bands)))
+
+    def interpolate_cube(self, cube):
+        """Apply normalize and interpolation to a (sample x band x time) cube.
+
+        :param cube<TimeSeriesStore>: the time series values.
+        """
+        return cube.replace(self._interpolate(self.mask_cube(cube).values))
+
 class FilesFormat:
     """Files Format Methods.
 
     :Methods:
         defaultCode
+        build_time_series_cube
         format_time_series_df
         format_time_series_df_to_json
+        iter_json_samples
+        write_time_series_json
+        write_time_series_geojsonseq
+        iter_cube_blocks
+        write_time_series_csv
+        parquet_schema
+        write_time_series_parquet
+        write_time_series_netcdf
+        get_sample_df
         get_values_time_series_df
     """
 
+    BLOCK_SIZE = 1000
+
     def defaultCode(self):
         """Return a default python code with blank WTSS parameters."""
         template = (
@@ -97,58 +157,63 @@ class FilesFormat:
         )
         return open(template, 'r').read()
 
-    def format_time_series_df(self, time_series, typed: bool = True):
-        """Convert time series dict to dataframe to read."""
-        timeseries_df = time_series.df()
-        timeline = sorted(timeseries_df['datetime'])
-        start_date = timeline[0]
-        end_date = timeline[len(timeline) - 1]
-        cube = time_series.coverage.name
-        geom_list = list(set(timeseries_df["geometry"]))
-        bands = list(set(timeseries_df["attribute"]))
-        time_series_formatted = {
-            "sample_id": [],
-            "class": [],
-            "longitude": [],
-            "latitude": [],
-            "start_date": [],
-            "end_date": [],
-            "cube": [],
-            "time_series": []
-        }
-        for row in range(0, len(geom_list)):
-            time_series_formatted["sample_id"].append(row + 1)
-            time_series_formatted["class"].append("undefined")
-            time_series_formatted["longitude"].append(geom_list[row].x)
-            time_series_formatted["latitude"].append(geom_list[row].y)
-            time_series_formatted["start_date"].append(start_date)
-            time_series_formatted["end_date"].append(end_date)
-            time_series_formatted["cube"].append(cube)
-            grouped_by_geometry = timeseries_df.groupby(['geometry']).get_group(geom_list[row],)
-            time_series_ = {}
-            time_series_["Index"] = []
-            for band in bands:
-                grouped_by_band = grouped_by_geometry.groupby("attribute").get_group(band,).reset_index(drop=True).sort_values("datetime")
+    def build_time_series_cube(self, timeseries_df):
+        """Pivot the time series dataframe to a dense (sample x band x time) store.
+
+        :param timeseries_df<DataFrame>: the WTSS time series in long format.
+        :returns: a ``TimeSeriesStore``.
+        """
+        return TimeSeriesStore.from_df(timeseries_df)
+
+    def format_time_series_df(self, time_series, typed: bool = True, cube = None):
+        """Convert time series dict to dataframe to read.
+
+        In typed mode the series of each sample are views of the store values.
+
+        :param cube<TimeSeriesStore>: the values to format, the store of the result when not given.
+        """
+        if cube is None:
+            cube = time_series.store()
+        timeline = cube.timeline
+        values = cube.values
+        total_samples = len(cube)
+        if typed:
+            index = timeline
+        else:
+            index = list(timeline.strftime('%Y-%m-%d'))
+        time_series_list = []
+        for sample in range(total_samples):
+            time_series_ = {"Index": index}
+            for band_index, band in enumerate(cube.bands):
                 if typed:
-                    time_series_[band] = grouped_by_band["value"]
-                    time_series_["Index"] = grouped_by_band["datetime"]
+                    time_series_[band] = values[sample, band_index]
                 else:
-                    time_series_[band] = list(grouped_by_band["value"])
-                    time_series_["Index"] = [date.strftime('%Y-%m-%d') for date in grouped_by_band["datetime"]]
-            time_series_formatted["time_series"].append(time_series_)
-        time_series_formatted = pd.DataFrame(time_series_formatted).sort_values("sample_id").reset_index(drop=True)
-        return time_series_formatted
+                    time_series_[band] = values[sample, band_index].tolist()
+            time_series_list.append(time_series_)
+        return pd.DataFrame({
+            "sample_id": np.arange(1, total_samples + 1),
+            "class": "undefined",
+            "longitude": cube.longitude,
+            "latitude": cube.latitude,
+            "start_date": timeline[0],
+            "end_date": timeline[-1],
+            "cube": time_series.coverage.name,
+            "time_series": time_series_list
+        })
 
     def format_time_series_df_to_json(self, time_series_df):
-        """Convert time series dataframe to json to read."""
+        """Convert time series dataframe to json to read.
+
+        The dataframe is not changed, the series are converted to new lists.
+        """
         time_series_formatted = {'samples': []}
         for index in range(len(time_series_df['sample_id'])):
-            time_series_ = time_series_df['time_series'][index]
-            for key in time_series_.keys():
+            time_series_ = {}
+            for key, values in time_series_df['time_series'][index].items():
                 if key != 'Index':
-                    time_series_[key] = list(time_series_[key])
+                    time_series_[key] = np.asarray(values).tolist()
                 else:
-                    time_series_[key] = [date.strftime('%Y-%m-%d') for date in time_series_[key]]
+                    time_series_[key] = np.datetime_as_string(pd.DatetimeIndex(values).values, unit='D').tolist()
             time_series_formatted['samples'].append({
                 "sample_id": int(time_series_df['sample_id'][index]),
                 "longitude": float(time_series_df['longitude'][index]),
@@ -158,6 +223,257 @@ class FilesFormat:
             })
         return time_series_formatted
 
+    def iter_json_samples(self, cube, null_missing = False):
+        """Yield the samples of a cube as JSON values, one block of samples at a time.
+
+        The dates are formatted once for the whole timeline.
+
+        :param cube<TimeSeriesStore>: the time series values.
+        :param null_missing<bool>: write missing (NaN) values as null.
+        :returns: tuples with the first sample index of the block, the sample id,
+            longitude, latitude and the series dict.
+        """
+        index = np.datetime_as_string(cube.timeline.values, unit='D').tolist()
+        for start, block in self.iter_cube_blocks(cube):
+            values = block.values
+            if null_missing and values.dtype.kind == 'f':
+                values = np.where(np.isnan(values), None, values)
+            values = values.tolist()
+            for sample, (longitude, latitude) in enumerate(zip(block.longitude.tolist(), block.latitude.tolist())):
+                yield start, start + sample + 1, longitude, latitude, {"Index": index, **dict(zip(block.bands, values[sample]))}
+
+    def write_time_series_json(self, json_file, cube, progress = None):
+        """Write the samples of a cube as the JSON document of ``format_time_series_df_to_json``.
+
+        :param json_file<file>: the opened text file.
+        :param cube<TimeSeriesStore>: the time series values.
+        :param progress<callable>: called with the percent of samples written.
+        """
+        json_file.write('{"samples": [')
+        for start, sample_id, longitude, latitude, time_series_ in self.iter_json_samples(cube, null_missing = True):
+            if sample_id > 1:
+                json_file.write(', ')
+            json_file.write(json.dumps({
+                "sample_id": sample_id,
+                "longitude": longitude,
+                "latitude": latitude,
+                "cube": cube.coverage,
+                "time_series": time_series_
+            }))
+            if progress is not None and (sample_id % self.BLOCK_SIZE == 0 or sample_id == len(cube)):
+                progress(100 * sample_id / len(cube))
+        json_file.write(']}')
+
+    def write_time_series_geojsonseq(self, json_file, cube, progress = None):
+        """Write the samples of a cube as GeoJSON point features, one per line.
+
+        :param json_file<file>: the opened text file.
+        :param cube<TimeSeriesStore>: the time series values.
+        :param progress<callable>: called with the percent of samples written.
+        """
+        for start, sample_id, longitude, latitude, time_series_ in self.iter_json_samples(cube, null_missing = True):
+            json_file.write(json.dumps({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [longitude, latitude]},
+                "properties": {
+                    "sample_id": sample_id,
+                    "cube": cube.coverage,
+                    "time_series": time_series_
+                }
+            }))
+            json_file.write('\n')
+            if progress is not None and (sample_id % self.BLOCK_SIZE == 0 or sample_id == len(cube)):
+                progress(100 * sample_id / len(cube))
+
+    def iter_cube_blocks(self, cube, block_size = BLOCK_SIZE):
+        """Yield the first sample index and a view of each block of samples.
+
+        :param cube<TimeSeriesStore>: the time series values.
+        :param block_size<int>: the number of samples of a block.
+        """
+        for start in range(0, len(cube), block_size):
+            yield start, cube.slice(start, start + block_size)
+
+    def write_time_series_csv(self, csv_file, cube, transform = None, progress = None, header = True, sample_offset = 0,
+                              feature_ids = None):
+        """Write the samples of a cube as CSV rows, one block of samples at a time.
+
+        The columns are the same of ``format_time_series_df`` in untyped mode,
+        with a feature_id column after sample_id when the feature ids are given.
+
+        :param csv_file<file>: the opened text file.
+        :param cube<TimeSeriesStore>: the time series values.
+        :param transform<callable>: applied to each block before writing.
+        :param progress<callable>: called with the percent of samples written.
+        :param header<bool>: write the header row, False to append to a file already started.
+        :param sample_offset<int>: the number of samples already written before this cube.
+        :param feature_ids<list>: the id of the input feature of each sample.
+        """
+        writer = csv.writer(csv_file, lineterminator=os.linesep)
+        id_columns = [] if feature_ids is None else ["feature_id"]
+        if header:
+            writer.writerow([
+                "sample_id", *id_columns, "class", "longitude", "latitude", "start_date", "end_date", "cube", "time_series"
+            ])
+        index = list(cube.timeline.strftime('%Y-%m-%d'))
+        total_samples = len(cube)
+        for start, block in self.iter_cube_blocks(cube):
+            if transform is not None:
+                block = transform(block)
+            values = block.values.tolist()
+            writer.writerows(
+                [
+                    sample_offset + start + sample + 1,
+                    *([] if feature_ids is None else [feature_ids[start + sample]]),
+                    "undefined", longitude, latitude, index[0], index[-1], cube.coverage,
+                    {"Index": index, **dict(zip(block.bands, values[sample]))}
+                ]
+                for sample, (longitude, latitude) in enumerate(zip(block.longitude.tolist(), block.latitude.tolist()))
+            )
+            if progress is not None:
+                progress(100 * (start + len(values)) / total_samples)
+
+    def parquet_schema(self, value_type, id_type = None):
+        """Return the Arrow schema of the Parquet files in long layout.
+
+        :param value_type<dtype>: the numpy type of the values.
+        :param id_type<DataType>: the Arrow type of the feature_id column, no such column when not given.
+        """
+        import pyarrow as pa
+        return pa.schema([
+            ("sample_id", pa.int64()),
+            *([] if id_type is None else [("feature_id", id_type)]),
+            ("longitude", pa.float64()),
+            ("latitude", pa.float64()),
+            ("coverage", pa.dictionary(pa.int32(), pa.string())),
+            ("band", pa.dictionary(pa.int32(), pa.string())),
+            ("datetime", pa.timestamp('ms')),
+            ("value", pa.from_numpy_dtype(value_type))
+        ])
+
+    def write_time_series_parquet(self, file_name, cube, nodata = None, progress = None, writer = None, sample_offset = 0,
+                                  feature_ids = None):
+        """Write a cube as a Parquet file in long layout, one row group per block of samples.
+
+        The columns are sample_id, longitude, latitude, coverage, band, datetime
+        and value, with a feature_id column after sample_id when the writer
+        schema has it. The coverage and band columns are dictionary encoded and
+        the nodata values are written as nulls.
+
+        :param file_name<str>: the file path, not used when a writer is given.
+        :param cube<TimeSeriesStore>: the time series values.
+        :param nodata<ndarray>: the nodata value of each band, the store nodata when not given.
+        :param progress<callable>: called with the percent of samples written.
+        :param writer<ParquetWriter>: an opened writer to append the row groups to, its values are cast to the writer schema.
+        :param sample_offset<int>: the number of samples already written before this cube.
+        :param feature_ids<list>: the id of the input feature of each sample.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if writer is None:
+            id_type = None
+            if feature_ids is not None:
+                id_type = pa.array(list(feature_ids)).type if len(feature_ids) else pa.int64()
+            with pq.ParquetWriter(file_name, self.parquet_schema(cube.values.dtype, id_type), compression='zstd') as writer:
+                self.write_time_series_parquet(file_name, cube, nodata, progress, writer, sample_offset, feature_ids)
+            return
+        schema = writer.schema
+        bands = pa.array(cube.bands, type=pa.string())
+        coverage = pa.array([cube.coverage], type=pa.string())
+        timeline = cube.timeline.values.astype('datetime64[ms]')
+        total_bands, total_dates = len(cube.bands), len(timeline)
+        nodata = cube.nodata if nodata is None else nodata
+        total_samples = len(cube)
+        for start, block in self.iter_cube_blocks(cube):
+            samples = len(block)
+            values = block.values
+            mask = np.isnan(values) if values.dtype.kind == 'f' else np.zeros(values.shape, dtype=bool)
+            mask |= values == nodata[None, :, None]
+            rows = samples * total_bands * total_dates
+            first = sample_offset + start + 1
+            value = pa.array(values.reshape(-1), mask=mask.reshape(-1))
+            if value.type != schema.field("value").type:
+                value = value.cast(schema.field("value").type)
+            columns = {"sample_id": np.repeat(np.arange(first, first + samples), total_bands * total_dates)}
+            if "feature_id" in schema.names:
+                ids = pa.array(list(feature_ids[start:start + samples]), type=schema.field("feature_id").type)
+                columns["feature_id"] = ids.take(np.repeat(np.arange(samples), total_bands * total_dates))
+            writer.write_table(pa.table({
+                **columns,
+                "longitude": np.repeat(block.longitude, total_bands * total_dates),
+                "latitude": np.repeat(block.latitude, total_bands * total_dates),
+                "coverage": pa.DictionaryArray.from_arrays(np.zeros(rows, dtype=np.int32), coverage),
+                "band": pa.DictionaryArray.from_arrays(
+                    np.tile(np.repeat(np.arange(total_bands, dtype=np.int32), total_dates), samples), bands
+                ),
+                "datetime": np.tile(timeline, samples * total_bands),
+                "value": value
+            }, schema=schema))
+            if progress is not None:
+                progress(100 * (start + samples) / total_samples)
+
+    def write_time_series_netcdf(self, file_name, cube, nodata = None, scale = None, progress = None):
+        """Write a cube as a compressed NetCDF4 file, one block of samples at a time.
+
+        The values are kept raw in a (sample, band, time) variable, chunked by
+        sample block and band, with the time, band, longitude and latitude
+        coordinates and the nodata and scale of each band.
+
+        :param file_name<str>: the file path.
+        :param cube<TimeSeriesStore>: the time series values.
+        :param nodata<ndarray>: the nodata value of each band, the store nodata when not given.
+        :param scale<ndarray>: the scale factor of each band.
+        :param progress<callable>: called with the percent of samples written.
+        """
+        import netCDF4
+        values = cube.values
+        total_samples, total_bands, total_dates = values.shape
+        nodata = cube.nodata if nodata is None else np.asarray(nodata, dtype=float)
+        scale = np.ones(total_bands) if scale is None else np.asarray(scale, dtype=float)
+        fill_value = None
+        if len(set(nodata.tolist())) == 1 and not np.isnan(nodata[0]):
+            fill_value = values.dtype.type(nodata[0])
+        with netCDF4.Dataset(file_name, 'w', format='NETCDF4') as dataset:
+            dataset.Conventions = 'CF-1.8'
+            dataset.coverage = cube.coverage
+            dataset.createDimension('sample', total_samples)
+            dataset.createDimension('band', total_bands)
+            dataset.createDimension('time', total_dates)
+            time = dataset.createVariable('time', 'f8', ('time',))
+            time.units = 'days since 1970-01-01 00:00:00'
+            time.calendar = 'standard'
+            time[:] = (cube.timeline.values - np.datetime64('1970-01-01')) / np.timedelta64(1, 'D')
+            band = dataset.createVariable('band', str, ('band',))
+            band[:] = np.array(cube.bands, dtype=object)
+            longitude = dataset.createVariable('longitude', 'f8', ('sample',))
+            longitude.units = 'degrees_east'
+            longitude[:] = cube.longitude
+            latitude = dataset.createVariable('latitude', 'f8', ('sample',))
+            latitude.units = 'degrees_north'
+            latitude[:] = cube.latitude
+            dataset.createVariable('nodata', 'f8', ('band',))[:] = nodata
+            dataset.createVariable('scale', 'f8', ('band',))[:] = scale
+            time_series = dataset.createVariable(
+                'time_series', values.dtype, ('sample', 'band', 'time'),
+                zlib=True, complevel=4, fill_value=fill_value,
+                chunksizes=(max(1, min(self.BLOCK_SIZE, total_samples)), 1, max(1, total_dates))
+            )
+            time_series.set_auto_maskandscale(False)
+            time_series.coordinates = 'longitude latitude'
+            time_series.long_name = f'{cube.coverage} time series'
+            for start, block in self.iter_cube_blocks(cube):
+                time_series[start:start + len(block)] = block.values
+                if progress is not None:
+                    progress(100 * (start + len(block)) / total_samples)
+
+    def get_sample_df(self, cube, sample = 0):
+        """Get the series of a sample as a dataframe with a column by band.
+
+        :param cube<TimeSeriesStore>: the time series values.
+        :param sample<int>: the sample index.
+        """
+        return pd.DataFrame({"Index": cube.timeline, **dict(zip(cube.bands, cube.sample(sample)))})
+
     def get_values_time_series_df(self, time_series_df, line = 0):
         """Get time series dataframe based on line."""
         time_series_formatted = pd.DataFrame(time_series_df['time_series'][line]).sort_values("Index").reset_index(drop=True)
@@ -185,7 +501,10 @@ class FilesExport:
     :Methods:
         generateCode
         generateCSV
+        generateParquet
+        generateNetCDF
         generateJSON
+        generateGeoJSONSeq
     """
 
     def __init__(self):
@@ -199,6 +518,7 @@ class FilesExport:
         :param title<string>: the message box title.
         :param text<string>: the message box info.
         """
+        from PyQt5.QtWidgets import QMessageBox
         msg = QMessageBox()
         if type_message == 'error':
             msg.setIcon(QMessageBox.Critical)
@@ -213,7 +533,7 @@ class FilesExport:
 
     def getExportOptions(self):
         """Set options to export result."""
-        return ["CSV", "JSON", "Python", "MatPlotLib"]
+        return ["CSV", "Parquet", "NetCDF", "JSON", "GeoJSONSeq", "Python", "MatPlotLib"]
 
     def checkResult(self, time_series):
         """Check if the result is from a geometry."""
@@ -251,31 +571,80 @@ class FilesExport:
         except FileNotFoundError:
             pass
 
-    def generateJSON(self, file_name, time_series):
-        """Generate a JSON file with time series data."""
+    def generateJSON(self, file_name, time_series, bands_description = None, progress = None):
+        """Generate a JSON file with time series data, written sample by sample.
+
+        :param progress<callable>: called with the percent of samples written.
+        """
         try:
-            time_series_df = self.files_format.format_time_series_df(time_series)
-            data = self.files_format.format_time_series_df_to_json(time_series_df)
             with open(file_name, 'w') as outfile:
-                json.dump(data, outfile)
+                self.files_format.write_time_series_json(outfile, time_series.store(), progress = progress)
         except FileNotFoundError:
             pass
 
-    def generateCSV(self, file_name, time_series, bands_description):
-        """Generate a CSV file with time series data."""
+    def generateGeoJSONSeq(self, file_name, time_series, bands_description = None, progress = None):
+        """Generate a newline-delimited GeoJSON file with a feature by sample.
+
+        :param progress<callable>: called with the percent of samples written.
+        """
+        with open(file_name, 'w') as outfile:
+            self.files_format.write_time_series_geojsonseq(outfile, time_series.store(), progress = progress)
+
+    def generateCSV(self, file_name, time_series, bands_description, progress = None):
+        """Generate a CSV file with time series data.
+
+        The samples of a geometry are interpolated and written by blocks,
+        so the memory used does not grow with the rows of the file.
+
+        :param progress<callable>: called with the percent of samples written.
+        """
         try:
             self.apply_ts.bands_description = bands_description
             if self.checkResult(time_series):
-                time_series_df = self.files_format.format_time_series_df(time_series, typed=False)
-                time_series_df.to_csv(file_name, index=False)
+                with open(file_name, 'w', newline='') as csv_file:
+                    self.files_format.write_time_series_csv(
+                        csv_file, time_series.store(),
+                        transform = self.apply_ts.interpolate_cube,
+                        progress = progress
+                    )
             else:
-                time_series_df = self.files_format.format_time_series_df(time_series)
-                time_series_df = self.files_format.get_values_time_series_df(time_series_df)
-                time_series_df = self.apply_ts.interpolate_df(time_series_df)
+                cube = self.apply_ts.interpolate_cube(time_series.store().slice(0, 1))
+                time_series_df = self.files_format.get_sample_df(cube)
                 time_series_df.to_csv(file_name, index=False)
         except FileNotFoundError:
             pass
 
+    def generateParquet(self, file_name, time_series, bands_description, progress = None):
+        """Generate a Parquet file with time series data in long layout.
+
+        Requires the optional ``pyarrow`` package.
+
+        :param progress<callable>: called with the percent of samples written.
+        """
+        self.apply_ts.bands_description = bands_description
+        cube = time_series.store()
+        self.files_format.write_time_series_parquet(
+            file_name, cube,
+            nodata = self.apply_ts.nodata_values(cube.bands),
+            progress = progress
+        )
+
+    def generateNetCDF(self, file_name, time_series, bands_description, progress = None):
+        """Generate a NetCDF file with the (sample x band x time) cube.
+
+        Requires the optional ``netCDF4`` package.
+
+        :param progress<callable>: called with the percent of samples written.
+        """
+        self.apply_ts.bands_description = bands_description
+        cube = time_series.store()
+        self.files_format.write_time_series_netcdf(
+            file_name, cube,
+            nodata = self.apply_ts.nodata_values(cube.bands),
+            scale = self.apply_ts.scale_values(cube.bands),
+            progress = progress
+        )
+
     def generateMatPlotFig(self, time_series):
         """Generate using native method to plot for WTSS.py."""
         try:
@@ -283,24 +652,57 @@ class FilesExport:
         except Exception as e:
             self.alert("error", "Error while generate the image!", str(e))
 
-    def generatePlotFig(self, time_series, select_coverage, bands_description):
+    def generatePlotFig(self, time_series, select_coverage, bands_description, summarize = None):
         """Generate an image .JPEG with time series data in a line chart."""
+        import matplotlib.pyplot as plt
+        import seaborn
+
+        from .pystac_helper import get_source_from_click
         try:
             self.apply_ts.bands_description = bands_description
             if self.checkResult(time_series):
                 selected_aggregations = ["max", "mean", "min"]
-                summarize = time_series.summarize()
+                if summarize is None:
+                    with tracer.span('plot.summarize'):
+                        summarize = time_series.summarize()
                 for band_ in time_series.query.attributes:
-                    summarize_formatted = self.files_format.format_summarize_ts(summarize, band_)
+                    with tracer.span('plot.format', band = band_):
+                        summarize_formatted = self.files_format.format_summarize_ts(summarize, band_)
+                    with tracer.span('plot.render', band = band_):
+                        fig = plt.figure(figsize = (12, 5))
+                        fig.suptitle(("Coverage {name} Aggregations for {band}").format(
+                            name=select_coverage, band=band_
+                        ))
+                        seaborn.set_theme(style="darkgrid")
+                        for aggregation in selected_aggregations:
+                            seaborn.lineplot(
+                                data = summarize_formatted,
+                                x = "Index", y = aggregation, label = aggregation,
+                                markersize = 8, marker = 'o',
+                                linestyle = '-', picker = 10
+                            )
+                        fig.canvas.mpl_connect('pick_event', get_source_from_click)
+                        fig.autofmt_xdate()
+                        plt.xlabel(None)
+                        plt.ylabel(None)
+                        plt.legend(
+                            bbox_to_anchor=(1.01, 1),
+                            loc='upper left',
+                            borderaxespad=0
+                        )
+                        plt.show()
+            else:
+                with tracer.span('plot.format'):
+                    cube = time_series.store().slice(0, 1)
+                with tracer.span('plot.interpolate'):
+                    cube = self.apply_ts.interpolate_cube(cube)
+                with tracer.span('plot.render'):
                     fig = plt.figure(figsize = (12, 5))
-                    fig.suptitle(("Coverage {name} Aggregations for {band}").format(
-                        name=select_coverage, band=band_
-                    ))
+                    fig.suptitle(("Time Series for {name}").format(name = select_coverage))
                     seaborn.set_theme(style="darkgrid")
-                    for aggregation in selected_aggregations:
+                    for band_index, band in enumerate(cube.bands):
                         seaborn.lineplot(
-                            data = summarize_formatted,
-                            x = "Index", y = aggregation, label = aggregation,
+                            x = cube.timeline, y = cube.sample(0)[band_index], label = band,
                             markersize = 8, marker = 'o',
                             linestyle = '-', picker = 10
                         )
@@ -314,29 +716,5 @@ class FilesExport:
                         borderaxespad=0
                     )
                     plt.show()
-            else:
-                time_series_df = self.files_format.format_time_series_df(time_series)
-                time_series_df = self.files_format.get_values_time_series_df(time_series_df)
-                time_series_df = self.apply_ts.interpolate_df(time_series_df)
-                fig = plt.figure(figsize = (12, 5))
-                fig.suptitle(("Time Series for {name}").format(name = select_coverage))
-                seaborn.set_theme(style="darkgrid")
-                for band in self.apply_ts.get_bands_from_df(time_series_df):
-                    seaborn.lineplot(
-                        data = time_series_df,
-                        x = "Index", y = band, label = band,
-                        markersize = 8, marker = 'o',
-                        linestyle = '-', picker = 10
-                    )
-                fig.canvas.mpl_connect('pick_event', get_source_from_click)
-                fig.autofmt_xdate()
-                plt.xlabel(None)
-                plt.ylabel(None)
-                plt.legend(
-                    bbox_to_anchor=(1.01, 1),
-                    loc='upper left',
-                    borderaxespad=0
-                )
-                plt.show()
         except Exception as e:
             self.alert("error", "Error while generate the image!", str(e))
@@ -18,16 +18,16 @@
 
 """Python QGIS Plugin for WTSS."""
 
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from typing import List, Optional
 
-import pystac_client
-import shapely
-from osgeo import gdal
-from qgis.core import QgsApplication, QgsProject, QgsRasterLayer
+from ..config import Config, lazy_import
+from .vrt_helper import VRTRegistry
 
-from ..config import Config
+shapely = lazy_import('shapely')
 
 
 class Channels:
@@ -43,6 +43,43 @@ class Channels:
             self.blue = channel["blue"]
 
 
+def chip_window(geometry, buffer) -> List[float]:
+    """Return the window around a geometry as a GDAL projWin in EPSG:4326.
+
+    :param geometry<BaseGeometry>: the query geometry.
+    :param buffer<float>: the margin around the geometry bounds in degrees.
+    :returns: the [upper left x, upper left y, lower right x, lower right y] coordinates.
+    """
+    min_x, min_y, max_x, max_y = geometry.bounds
+    return [min_x - buffer, max_y + buffer, max_x + buffer, min_y - buffer]
+
+
+def index_items_by_date(items, dates):
+    """Group STAC items by the timeline dates they cover.
+
+    An item covers the dates between its ``start_datetime`` and
+    ``end_datetime``, or its ``datetime`` when it has no interval. The
+    items are grouped by interval first, so the tiles of the same date
+    are matched together.
+
+    :param items<iterable>: the STAC items.
+    :param dates<list>: the timeline dates as 'yyyy-mm-dd' strings.
+    :returns: dict of the items list by date.
+    """
+    intervals = {}
+    for item in items:
+        properties = item.properties
+        start = str(properties.get('start_datetime') or properties.get('datetime'))[:10]
+        end = str(properties.get('end_datetime') or properties.get('datetime'))[:10]
+        intervals.setdefault((start, end), []).append(item)
+    index = {}
+    for date in dates:
+        for (start, end), tiles in intervals.items():
+            if start <= date <= end:
+                index.setdefault(date, []).extend(tiles)
+    return index
+
+
 class STAC_ARGS:
     """STAC Client Global args."""
 
@@ -53,11 +90,37 @@ class STAC_ARGS:
         self.timeline = []
         self.quick_look = False
         self.channels = Channels()
-        self.vrt_history = []
-        self.raster_vrt_folder = str(self.get_default_folder())
+        self.vrts = VRTRegistry()
+        self.chip_mode = Config.STAC_CHIP_MODE
+        self.chip_buffer = Config.STAC_CHIP_BUFFER
+        self.tasks = None
+        self.chips_building = set()
+        self._raster_vrt_folder = None
+        self.items_key = None
+        self.items = {}
+
+    @property
+    def raster_vrt_folder(self) -> str:
+        """Return the location path to save virtual rasters, the default folder is resolved on first use."""
+        if self._raster_vrt_folder is None:
+            self._raster_vrt_folder = str(self.get_default_folder())
+        return self._raster_vrt_folder
+
+    @raster_vrt_folder.setter
+    def raster_vrt_folder(self, folder) -> None:
+        self._raster_vrt_folder = folder
+
+    @property
+    def vrt_history(self) -> List[str]:
+        """Return the names of the generated virtual rasters."""
+        return self.vrts.names()
 
     def get_default_folder(self) -> str:
-        """Return the location path to save virtual rasters."""
+        """Return the location path to save virtual rasters, the working directory outside QGIS."""
+        try:
+            from qgis.core import QgsApplication, QgsProject
+        except ImportError:
+            return os.getcwd()
         qgis_project_path = os.path.sep.join(
             QgsProject.instance().fileName() \
                 .split(os.path.sep)[:-1]
@@ -83,13 +146,42 @@ class STAC_ARGS:
             self.raster_vrt_folder = str(new_raster_vrt_folder[:-1])
 
     def set_timeline(self, time_series) -> None:
-        """Return a datetime timeline."""
-        self.timeline = list(set(time_series.df()['datetime']))
-        self.timeline.sort()
+        """Set the sorted datetime timeline of the time series store."""
+        self.timeline = time_series.store().timeline
+
+    def prefetch_items(self, coverage, geometry, timeline) -> None:
+        """Search the items of the whole timeline once and index them by date.
+
+        :param coverage<str>: the collection name.
+        :param geometry<BaseGeometry>: the query geometry.
+        :param timeline<DatetimeIndex>: the sorted dates of the time series.
+        """
+        if len(timeline) == 0:
+            return
+        from ..controller.wtss_qgis_session import open_stac
+        dates = [date.strftime('%Y-%m-%d') for date in timeline]
+        item_search = open_stac(Config.STAC_HOST).search(
+            collections = [coverage],
+            intersects = shapely.to_geojson(geometry),
+            datetime = f'{dates[0]}/{dates[-1]}'
+        )
+        items = index_items_by_date(item_search.items(), dates)
+        # Replaced in one assignment, read by the plot click handler
+        self.items_key, self.items = (coverage, geometry.wkb_hex), items
+
+    def get_items(self, date) -> Optional[list]:
+        """Return the prefetched items of a date, None when the query was not prefetched."""
+        if self.geometry is None or self.items_key != (self.coverage, self.geometry.wkb_hex):
+            return None
+        return self.items.get(date, [])
+
+    def set_channels(self, config = "quicklook") -> None:
+        """Set the rgb channels using the cached collection metadata from STAC."""
+        from ..controller.wtss_qgis_cache import stac_collections
+        self.load_channels(stac_collections.collection(self.coverage, Config.STAC_HOST), config = config)
 
-    def set_channels(self, service, config = "quicklook") -> None:
-        collection = service.get_collection(stac_args.coverage)
-        metadata = collection.to_dict()
+    def load_channels(self, metadata, config = "quicklook") -> None:
+        """Set the rgb channels from a collection metadata already fetched."""
         rgb = []
         try:
             if config == "quicklook":
@@ -107,6 +199,7 @@ class STAC_ARGS:
         })
 
     def build_gdal_vrt_raster(self, output_file: str, files: List[str], **options) -> Optional[str]:
+        from osgeo import gdal
         opts = deepcopy(options)
         opts.setdefault("resampleAlg", "nearest")
         opts.setdefault("separate", True)
@@ -117,9 +210,81 @@ class STAC_ARGS:
             output_file = None
         return output_file
 
+    def chip_name(self, layer_name) -> str:
+        """Return the layer name of the chip of the query geometry."""
+        digest = hashlib.sha1(f'{self.geometry.wkb_hex}{self.chip_buffer}'.encode()).hexdigest()[:10]
+        return f'{layer_name}_chip_{digest}'
+
+    @staticmethod
+    def build_gdal_chip(output_file: str, files: List[str], window: List[float]) -> Optional[str]:
+        """Read a window of each file in parallel and write them as the bands of a local COG.
+
+        :param output_file<str>: the GeoTIFF file path.
+        :param files<list>: the source files, one per band.
+        :param window<list>: the projWin in EPSG:4326 of ``chip_window``.
+        """
+        from osgeo import gdal
+        prefix = f'/vsimem/{os.path.basename(output_file)}'
+        band_files = [f'{prefix}_{index}.tif' for index in range(len(files))]
+        # Written aside and renamed, so a partial file is never reused
+        partial_file = f'{output_file}.part'
+
+        def read_window(source, band_file):
+            dataset = gdal.Translate(band_file, source, projWin = window, projWinSRS = 'EPSG:4326')
+            ok = dataset is not None
+            dataset = None
+            return ok
+
+        try:
+            with ThreadPoolExecutor(max_workers = len(files)) as executor:
+                if not all(executor.map(read_window, files, band_files)):
+                    return None
+            vrt = gdal.BuildVRT(f'{prefix}.vrt', band_files, separate = True)
+            chip = gdal.Translate(partial_file, vrt, format = 'COG', creationOptions = ['COMPRESS=DEFLATE'])
+            ok = chip is not None
+            chip = vrt = None
+            if not ok:
+                return None
+            os.replace(partial_file, output_file)
+        except Exception:
+            output_file = None
+        finally:
+            for band_file in band_files + [f'{prefix}.vrt']:
+                gdal.Unlink(band_file)
+            if os.path.exists(partial_file):
+                os.remove(partial_file)
+        return output_file
+
 
 stac_args = STAC_ARGS()
 
+def add_raster_layer(layer_name, raster_file):
+    """Add the layer of a VRT or chip file to the project, warn when it was not built.
+
+    :param layer_name<str>: the layer name.
+    :param raster_file<str>: the VRT or chip file path, None when it was not built.
+    """
+    if raster_file:
+        from qgis.core import QgsRasterLayer
+        layer = QgsRasterLayer(raster_file, layer_name)
+        stac_args.vrts.add_layer(layer_name, layer.id())
+        stac_args.qgis_project.addMapLayer(layer, True)
+        stac_args.vrts.cleanup(stac_args.qgis_project)
+    else:
+        from PyQt5.QtWidgets import QMessageBox
+
+        msg = QMessageBox()
+        msg.setIcon(QMessageBox.Critical)
+        msg.setText("Data not found!")
+        msg.setInformativeText("Could not find the request data.")
+        msg.setStandardButtons(QMessageBox.Ok)
+        msg.exec_()
+
+def chip_built(layer_name, raster_file):
+    """Add the layer of a chip built in background."""
+    stac_args.chips_building.discard(layer_name)
+    add_raster_layer(layer_name, raster_file)
+
 def get_source_from_click(event):
     """Return the source image based on matplotlib event.
 
@@ -127,15 +292,15 @@ def get_source_from_click(event):
     """
     selected_time = stac_args.timeline[event.ind[0]].strftime('%Y-%m-%d')
 
-    service = pystac_client.Client.open(Config.STAC_HOST)
-
-    item_search = service.search(
-        collections = [stac_args.coverage],
-        intersects = stac_args.get_geometry_reference(),
-        datetime = selected_time
-    )
-
-    items = list(item_search.items())
+    items = stac_args.get_items(selected_time)
+    if items is None:
+        from ..controller.wtss_qgis_session import open_stac
+        item_search = open_stac(Config.STAC_HOST).search(
+            collections = [stac_args.coverage],
+            intersects = stac_args.get_geometry_reference(),
+            datetime = selected_time
+        )
+        items = list(item_search.items())
 
     for item in items:
         assets = item.assets
@@ -149,35 +314,51 @@ def get_source_from_click(event):
 
         layer_name = f'{item.id}_{stac_args.channels.red}_{stac_args.channels.green}_{stac_args.channels.blue}'
 
-        vrt_raster_file = str(os.path.join(stac_args.raster_vrt_folder, f'{layer_name}.vrt'))
-
-        vrt_raster_file = stac_args.build_gdal_vrt_raster(
-            vrt_raster_file,
-            [
-                rgb_href['red'],
-                rgb_href['green'],
-                rgb_href['blue']
-            ],
-            resampleAlg = 'nearest',
-            addAlpha = False,
-            separate = True
-        )
-
-        if vrt_raster_file:
-            layer_names = [
-                layer.name()
-                for layer in stac_args.qgis_project.mapLayers().values()
-            ]
-            if layer_name not in layer_names:
-                stac_args.vrt_history.append(layer_name)
-                stac_args.qgis_project.addMapLayer(
-                    QgsRasterLayer(vrt_raster_file, layer_name), True
-                )
+        if stac_args.chip_mode and stac_args.geometry is not None:
+            # Only the window around the query geometry is read and stored locally
+            layer_name = stac_args.chip_name(layer_name)
+            extension = 'tif'
+            window = chip_window(stac_args.geometry, stac_args.chip_buffer)
+            build = lambda output_file, files: stac_args.build_gdal_chip(output_file, files, window)
         else:
-            from PyQt5.QtWidgets import QMessageBox
+            extension = 'vrt'
+            build = lambda output_file, files: stac_args.build_gdal_vrt_raster(
+                output_file, files,
+                resampleAlg = 'nearest',
+                addAlpha = False,
+                separate = True
+            )
+
+        if stac_args.vrts.has_layer(layer_name, stac_args.qgis_project) or layer_name in stac_args.chips_building:
+            continue
+
+        sources = [
+            rgb_href['red'],
+            rgb_href['green'],
+            rgb_href['blue']
+        ]
 
-            msg = QMessageBox()
-            msg.setIcon(QMessageBox.Critical)
-            msg.setText("Data not found!", "Could not find the request data.")
-            msg.setStandardButtons(QMessageBox.Ok)
-            msg.exec_()
+        if extension == 'tif' and stac_args.tasks is not None:
+            # The remote reads of a chip run in background, the layer is added when it is written
+            stac_args.chips_building.add(layer_name)
+            stac_args.tasks.submit(
+                f"STAC: chip of {item.id}",
+                stac_args.vrts.build,
+                stac_args.raster_vrt_folder,
+                layer_name,
+                sources,
+                build,
+                extension = extension,
+                on_finished = lambda raster_file, layer_name = layer_name: chip_built(layer_name, raster_file),
+                on_error = lambda error, layer_name = layer_name: chip_built(layer_name, None)
+            )
+            continue
+
+        vrt_raster_file = stac_args.vrts.build(
+            stac_args.raster_vrt_folder,
+            layer_name,
+            sources,
+            build,
+            extension = extension
+        )
+        add_raster_layer(layer_name, vrt_raster_file)
@@ -0,0 +1,130 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+import os
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
+from ..config import Config
+
+
+class VRTRegistry:
+    """Virtual rasters and chips built from STAC assets, indexed by layer name.
+
+    A VRT file is only built when the folder has no file with the same
+    sources, a chip when the folder has no file with the same name. The
+    entries are kept by last use and the files of the oldest ones are
+    removed above ``max_files``, unless their layer is loaded.
+
+    :Methods:
+        path
+        is_current
+        build
+        add_layer
+        has_layer
+        names
+        cleanup
+    """
+
+    def __init__(self, max_files = Config.VRT_MAX_FILES):
+        """Init the registry.
+
+        :param max_files<int>: the max number of VRT files kept.
+        """
+        self.max_files = max_files
+        self.reused = 0
+        self.built = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def path(folder, name, extension = 'vrt'):
+        """Return the file path of a layer name."""
+        return os.path.join(folder, f'{name}.{extension}')
+
+    @staticmethod
+    def is_current(path, sources):
+        """Check if a file exists and, for a VRT, if it reads all the sources.
+
+        :param path<str>: the VRT or chip file path.
+        :param sources<list>: the source files of the bands.
+        """
+        if not path.endswith('.vrt'):
+            return os.path.exists(path)
+        try:
+            with open(path, encoding = 'utf-8') as vrt_file:
+                content = vrt_file.read()
+        except (OSError, UnicodeDecodeError):
+            return False
+        return all(escape(source) in content for source in sources)
+
+    def build(self, folder, name, sources, build_vrt, extension = 'vrt'):
+        """Return the file of a layer, building it only when needed.
+
+        :param folder<str>: the folder of the VRT files.
+        :param name<str>: the layer name.
+        :param sources<list>: the source files of the bands.
+        :param build_vrt<callable>: called with the file path and the sources, returns the path or None.
+        :param extension<str>: the file extension, 'tif' for chips.
+        """
+        path = self.path(folder, name, extension)
+        if self.is_current(path, sources):
+            self.reused += 1
+        else:
+            path = build_vrt(path, sources)
+            if path is None:
+                return None
+            self.built += 1
+        entry = self._entries.pop(name, {'layer_id': None})
+        entry['path'] = path
+        self._entries[name] = entry
+        return path
+
+    def add_layer(self, name, layer_id):
+        """Register the project layer loaded from a VRT."""
+        if name in self._entries:
+            self._entries[name]['layer_id'] = layer_id
+
+    def has_layer(self, name, project):
+        """Check if the layer of a VRT is loaded in the project."""
+        entry = self._entries.get(name)
+        return entry is not None and entry['layer_id'] is not None and project.mapLayer(entry['layer_id']) is not None
+
+    def names(self):
+        """Return the layer names, the most recently used last."""
+        return list(self._entries.keys())
+
+    def cleanup(self, project = None):
+        """Remove the files of the oldest entries above the cap, return the names removed.
+
+        :param project<QgsProject>: the entries with a layer loaded in it are kept.
+        """
+        removed = []
+        for name in list(self._entries.keys()):
+            if len(self._entries) <= self.max_files:
+                break
+            if project is not None and self.has_layer(name, project):
+                continue
+            entry = self._entries.pop(name)
+            try:
+                os.remove(entry['path'])
+            except OSError:
+                pass
+            removed.append(name)
+        return removed
@@ -0,0 +1,63 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Benchmark WTSSQgis.buildMultiPoint over point layers of different sizes.
+
+Usage::
+
+    python -m wtss_plugin.test.benchmarks.bench_build_multipoint
+"""
+
+import time
+
+from qgis.core import QgsFeature, QgsGeometry, QgsPointXY
+
+from wtss_plugin.wtss_qgis import WTSSQgis
+
+from ..utilities import get_qgis_app
+
+LAYER_SIZES = [10, 100, 1000, 10000, 50000, 100000]
+
+
+def point_features(size):
+    """Return a list of point features laid out in a regular grid."""
+    features = []
+    for index in range(size):
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromPointXY(
+            QgsPointXY(-54.0 + (index % 1000) * 0.0025, -12.0 - (index // 1000) * 0.0025)
+        ))
+        features.append(feature)
+    return features
+
+
+def main():
+    """Print the elapsed time of each layer size."""
+    get_qgis_app()
+    print(f"{'features':>10} {'seconds':>10}")
+    for size in LAYER_SIZES:
+        features = point_features(size)
+        start = time.perf_counter()
+        multipoint = WTSSQgis.buildMultiPoint(None, features)
+        elapsed = time.perf_counter() - start
+        assert len(multipoint.geoms) == size
+        print(f"{size:>10} {elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
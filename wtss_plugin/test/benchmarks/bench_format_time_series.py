@@ -0,0 +1,59 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Benchmark FilesFormat.format_time_series_df from 1 to 100k samples.
+
+Usage::
+
+    python -m wtss_plugin.test.benchmarks.bench_format_time_series [--dates 23]
+"""
+
+import argparse
+import time
+
+from wtss_plugin.helpers.files_export_helper import FilesFormat
+
+from .synthetic import SyntheticTimeSeries
+
+SAMPLES = [1, 10, 100, 1000, 10000, 100000]
+
+
+def main():
+    """Print the elapsed time of each case."""
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--dates", type = int, default = 23)
+    args = parser.parse_args()
+    files_format = FilesFormat()
+    print(f"{'samples':>10} {'rows':>12} {'cube (s)':>10} {'typed (s)':>10} {'untyped (s)':>12}")
+    for samples in SAMPLES:
+        time_series = SyntheticTimeSeries(samples = samples, dates = args.dates)
+        rows = len(time_series.df())
+        start = time.perf_counter()
+        time_series.store()
+        cube = time.perf_counter() - start
+        start = time.perf_counter()
+        files_format.format_time_series_df(time_series)
+        typed = time.perf_counter() - start
+        start = time.perf_counter()
+        files_format.format_time_series_df(time_series, typed = False)
+        untyped = time.perf_counter() - start
+        print(f"{samples:>10} {rows:>12} {cube:>10.3f} {typed:>10.3f} {untyped:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
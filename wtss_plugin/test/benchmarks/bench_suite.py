@@ -0,0 +1,295 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Benchmark the formatting, interpolation and export paths against baselines.
+
+Each case is run for rounds until ``--min-time`` seconds and the statistics
+are written to JSON. With ``--baseline`` the minimum time of each case is
+compared to the stored one and the exit status is 1 when a case is slower
+than the tolerance.
+
+Usage::
+
+    python -m wtss_plugin.test.benchmarks.bench_suite --output results.json
+    python -m wtss_plugin.test.benchmarks.bench_suite --save-baseline baselines/release.json
+    python -m wtss_plugin.test.benchmarks.bench_suite --baseline baselines/release.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from wtss_plugin.controller.wtss_qgis_geometries import build_multipoint
+from wtss_plugin.controller.wtss_qgis_timeseries import TimeSeriesStore
+from wtss_plugin.helpers.files_export_helper import ApplyTimeSeries, FilesExport, FilesFormat
+
+from .synthetic import SyntheticTimeSeries
+
+SAMPLES = [1, 100, 10000, 100000]
+
+BANDS = ("NDVI", "EVI", "red", "nir")
+
+DATES = 500
+
+# The cases above this number of values are skipped, the 100k samples case needs --max-values 200000000
+MAX_VALUES = 20_000_000
+
+
+def wkb_features(points):
+    """Return stand-ins of point features with the WKB interface of ``QgsFeature``."""
+    return [
+        SimpleNamespace(
+            hasGeometry = lambda: True,
+            geometry = lambda wkb=wkb: SimpleNamespace(asWkb = lambda: wkb)
+        )
+        for wkb in shapely.to_wkb(points)
+    ]
+
+
+def export_case(method, extension, module = None):
+    """Return the setup of a ``FilesExport.generate*`` case writing to a temporary file."""
+    def setup(time_series, folder):
+        """Return the export function, None when the optional module is missing."""
+        if module is not None and importlib.util.find_spec(module) is None:
+            return None
+        files_export = FilesExport()
+        file_name = os.path.join(folder, f'{method}.{extension}')
+        generate = getattr(files_export, method)
+        return lambda: generate(file_name, time_series, time_series.bands_description())
+    return setup
+
+
+def store_case(time_series, folder):
+    """Pivot the long dataframe to a ``TimeSeriesStore``."""
+    df = time_series.df()
+    nodata = {band: time_series.nodata for band in time_series.bands}
+    return lambda: TimeSeriesStore.from_df(df, coverage = time_series.coverage.name, nodata = nodata)
+
+
+def format_case(time_series, folder):
+    """Format the samples of the store as a dataframe."""
+    time_series.store()
+    return lambda: FilesFormat().format_time_series_df(time_series)
+
+
+def json_case(time_series, folder):
+    """Convert the formatted dataframe to the JSON document."""
+    time_series_df = FilesFormat().format_time_series_df(time_series)
+    return lambda: FilesFormat().format_time_series_df_to_json(time_series_df)
+
+
+def interpolate_df_case(time_series, folder):
+    """Interpolate the dataframe of a sample."""
+    apply_ts = ApplyTimeSeries()
+    apply_ts.bands_description = time_series.bands_description()
+    sample_df = FilesFormat().get_sample_df(time_series.store())
+    return lambda: apply_ts.interpolate_df(sample_df.copy())
+
+
+def interpolate_cube_case(time_series, folder):
+    """Interpolate all the samples of the store."""
+    apply_ts = ApplyTimeSeries()
+    apply_ts.bands_description = time_series.bands_description()
+    cube = time_series.store()
+    return lambda: apply_ts.interpolate_cube(cube)
+
+
+def summarize_case(time_series, folder):
+    """Format the summarized values of a band to plot."""
+    summarize = time_series.summarize()
+    return lambda: FilesFormat().format_summarize_ts(summarize, time_series.bands[0])
+
+
+def multipoint_case(time_series, folder):
+    """Build the MultiPoint of a point layer."""
+    features = wkb_features(time_series.points)
+    return lambda: build_multipoint(features)
+
+
+# name: (setup, sample sizes or None for all)
+CASES = {
+    "build_store": (store_case, None),
+    "format_time_series_df": (format_case, None),
+    "format_time_series_df_to_json": (json_case, None),
+    "interpolate_df": (interpolate_df_case, [1]),
+    "interpolate_cube": (interpolate_cube_case, None),
+    "format_summarize_ts": (summarize_case, [1]),
+    "build_multipoint": (multipoint_case, None),
+    "generateCSV": (export_case("generateCSV", "csv"), None),
+    "generateJSON": (export_case("generateJSON", "json"), None),
+    "generateGeoJSONSeq": (export_case("generateGeoJSONSeq", "geojsonl"), None),
+    "generateParquet": (export_case("generateParquet", "parquet", "pyarrow"), None),
+    "generateNetCDF": (export_case("generateNetCDF", "nc", "netCDF4"), None),
+}
+
+
+def measure(function, min_time = 0.5, max_rounds = 10):
+    """Run a function for rounds until min_time and return the statistics in seconds."""
+    timings = []
+    while len(timings) < max_rounds and (len(timings) == 0 or sum(timings) < min_time):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.fmean(timings),
+        "median": statistics.median(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": len(timings)
+    }
+
+
+def machine_info():
+    """Return the environment of the results."""
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "shapely": shapely.__version__
+    }
+
+
+def run_suite(samples = SAMPLES, dates = DATES, bands = BANDS, cases = None, max_values = MAX_VALUES,
+              min_time = 0.5, max_rounds = 10, log = None):
+    """Run the cases and return the results document.
+
+    :param samples<list>: the numbers of samples.
+    :param dates<int>: the number of dates of the timeline.
+    :param bands<tuple>: the band names.
+    :param cases<list>: the names of the cases to run, all when not given.
+    :param max_values<int>: the cases with more values are skipped.
+    :param log<callable>: called with each benchmark result.
+    """
+    names = list(cases or CASES)
+    benchmarks = []
+    with tempfile.TemporaryDirectory() as folder:
+        for size in samples:
+            values = size * len(bands) * dates
+            time_series = None if values > max_values else SyntheticTimeSeries(samples = size, bands = bands, dates = dates)
+            for name in names:
+                setup, sizes = CASES[name]
+                if sizes is not None and size not in sizes:
+                    continue
+                result = {"name": name, "samples": size, "bands": len(bands), "dates": dates}
+                function = setup(time_series, folder) if time_series is not None else None
+                if time_series is None:
+                    result["skipped"] = f"{values} values above --max-values"
+                elif function is None:
+                    result["skipped"] = "optional dependency not installed"
+                else:
+                    result["stats"] = measure(function, min_time, max_rounds)
+                benchmarks.append(result)
+                if log is not None:
+                    log(result)
+    return {
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "machine": machine_info(),
+        "benchmarks": benchmarks
+    }
+
+
+def compare(results, baseline, tolerance = 0.2):
+    """Return the cases slower than the baseline by more than the tolerance.
+
+    The minimum time of the rounds is compared, it is the least affected
+    by the load of the machine.
+
+    :param results<dict>: the results document.
+    :param baseline<dict>: the baseline results document.
+    :param tolerance<float>: the accepted slowdown ratio.
+    """
+    def key(benchmark):
+        return benchmark["name"], benchmark["samples"], benchmark["bands"], benchmark["dates"]
+
+    stored = {key(benchmark): benchmark for benchmark in baseline["benchmarks"] if "stats" in benchmark}
+    regressions = []
+    for benchmark in results["benchmarks"]:
+        reference = stored.get(key(benchmark))
+        if reference is None or "stats" not in benchmark:
+            continue
+        ratio = benchmark["stats"]["min"] / max(reference["stats"]["min"], 1e-9)
+        benchmark["baseline_ratio"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(benchmark)
+    return regressions
+
+
+def print_result(result):
+    """Print a benchmark result as a table row."""
+    if "stats" in result:
+        stats = result["stats"]
+        status = f"{stats['min']:>10.4f} {stats['mean']:>10.4f} {stats['rounds']:>7}"
+    else:
+        status = f"skipped: {result['skipped']}"
+    print(f"{result['name']:<32} {result['samples']:>8} {status}", flush = True)
+
+
+def main(argv = None):
+    """Run the suite, write the results and compare them to a baseline."""
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--samples", type = int, nargs = "+", default = SAMPLES)
+    parser.add_argument("--dates", type = int, default = DATES)
+    parser.add_argument("--cases", nargs = "+", choices = list(CASES), default = None)
+    parser.add_argument("--max-values", type = int, default = MAX_VALUES)
+    parser.add_argument("--min-time", type = float, default = 0.5)
+    parser.add_argument("--max-rounds", type = int, default = 10)
+    parser.add_argument("--output", default = "benchmark-results.json")
+    parser.add_argument("--baseline", default = None, help = "compare to a stored results file")
+    parser.add_argument("--save-baseline", default = None, help = "also write the results to a baseline file")
+    parser.add_argument("--tolerance", type = float, default = 0.2)
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<32} {'samples':>8} {'min (s)':>10} {'mean (s)':>10} {'rounds':>7}")
+    results = run_suite(
+        samples = args.samples, dates = args.dates, cases = args.cases, max_values = args.max_values,
+        min_time = args.min_time, max_rounds = args.max_rounds, log = print_result
+    )
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for benchmark in regressions:
+            print(f"REGRESSION {benchmark['name']} ({benchmark['samples']} samples): "
+                  f"{benchmark['baseline_ratio']:.2f}x the baseline")
+    for file_name in filter(None, [args.output, args.save_baseline]):
+        if os.path.dirname(file_name):
+            os.makedirs(os.path.dirname(file_name), exist_ok = True)
+        with open(file_name, "w") as results_file:
+            json.dump(results, results_file, indent = 2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
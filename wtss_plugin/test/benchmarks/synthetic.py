@@ -0,0 +1,112 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import shapely
+import shapely.geometry
+
+from ...controller.wtss_qgis_timeseries import TimeSeriesStore
+
+
+class SyntheticTimeSeries:
+    """Synthetic WTSS time series result with the interface used by the plugin.
+
+    The dataframe has the same long layout returned by ``TimeSeriesSearch.df``:
+    attribute major, then location, then datetime.
+    """
+
+    def __init__(self, samples = 1, bands = ("NDVI", "EVI", "red", "nir"), dates = 23,
+                 nodata = -9999, nodata_ratio = 0.1, seed = 0):
+        """Build the synthetic series.
+
+        :param samples<int>: number of pixel locations.
+        :param bands<tuple>: band names.
+        :param dates<int>: number of dates in the timeline (16 days apart).
+        :param nodata<int>: the nodata value of all bands.
+        :param nodata_ratio<float>: ratio of values set to nodata.
+        """
+        rng = np.random.default_rng(seed)
+        self.bands = list(bands)
+        self.nodata = nodata
+        self.timeline = pd.date_range("2020-01-01", periods = dates, freq = "16D")
+        longitude = -54.0 + (np.arange(samples) % 1000) * 0.0025
+        latitude = -12.0 - (np.arange(samples) // 1000) * 0.0025
+        self.points = shapely.points(longitude, latitude)
+        self.values = rng.integers(0, 10000, size = (len(self.bands), samples, dates))
+        self.values[rng.random(self.values.shape) < nodata_ratio] = nodata
+        geom = shapely.multipoints(self.points) if samples > 1 else self.points[0]
+        self.coverage = SimpleNamespace(name = "SYNTHETIC-16D-1")
+        self.query = SimpleNamespace(geom = geom, attributes = self.bands)
+        self._df = None
+        self._store = None
+
+    def bands_description(self):
+        """Return the band metadata as described by WTSS."""
+        return {
+            band: {"name": band, "nodata": self.nodata, "scale_factor": 0.0001}
+            for band in self.bands
+        }
+
+    def total_locations(self):
+        """Return the number of locations."""
+        return len(self.points)
+
+    def df(self):
+        """Return the time series in long format."""
+        if self._df is None:
+            total_bands, samples, dates = self.values.shape
+            self._df = pd.DataFrame({
+                "attribute": np.repeat(self.bands, samples * dates),
+                "geometry": np.tile(np.repeat(self.points, dates), total_bands),
+                "value": self.values.reshape(-1),
+                "datetime": np.tile(self.timeline.values, total_bands * samples)
+            })
+        return self._df
+
+    def summarize(self):
+        """Return the aggregations of the samples by date as a ``wtss.Summarize``."""
+        from wtss.summarize import Summarize
+        values = np.ma.masked_equal(self.values, self.nodata).astype(float)
+        aggregations = {
+            "min": values.min(axis = 1), "max": values.max(axis = 1), "mean": values.mean(axis = 1),
+            "median": np.ma.median(values, axis = 1), "std": values.std(axis = 1)
+        }
+        return Summarize(self.coverage, {
+            "query": {"attributes": self.bands, "geom": shapely.geometry.mapping(self.query.geom)},
+            "results": {
+                "timeline": list(self.timeline.strftime("%Y-%m-%d")),
+                "values": {
+                    band: {name: aggregation[index].filled(np.nan).tolist() for name, aggregation in aggregations.items()}
+                    for index, band in enumerate(self.bands)
+                }
+            }
+        })
+
+    def store(self):
+        """Return the time series values as a ``TimeSeriesStore``."""
+        if self._store is None:
+            self._store = TimeSeriesStore.from_df(
+                self.df(), coverage = self.coverage.name,
+                nodata = {band: self.nodata for band in self.bands}
+            )
+        return self._store
@@ -0,0 +1,430 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import gzip
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import shapely
+import shapely.geometry
+
+STAC_CONFORMANCE = [
+    "https://api.stacspec.org/v1.0.0/core",
+    "https://api.stacspec.org/v1.0.0/collections",
+    "https://api.stacspec.org/v1.0.0/item-search"
+]
+
+
+def synthetic_timeline(start = '2020-01-01', dates = 23, days = 16):
+    """Return a timeline of composites every ``days`` days."""
+    first = date.fromisoformat(start)
+    return [(first + timedelta(days = index * days)).isoformat() for index in range(dates)]
+
+
+def synthetic_coverage(name = 'S2-16D-2', bands = ('NDVI', 'EVI', 'B04', 'B03', 'B02'), timeline = None):
+    """Return the WTSS description of a synthetic coverage."""
+    return {
+        "name": name.rsplit('-', 1)[0],
+        "fullname": name,
+        "title": f"Synthetic {name}",
+        "description": f"Synthetic coverage {name} served by the fake server.",
+        "version": name.rsplit('-', 1)[-1],
+        "bdc:crs": "EPSG:4326",
+        "raster_size": {"x": 10980, "y": 10980},
+        "extent": shapely.geometry.mapping(shapely.geometry.box(-74, -34, -34, 6)),
+        "timeline": list(timeline or synthetic_timeline()),
+        "bands": [
+            {"name": band, "common_name": band.lower(), "nodata": -9999, "scale": 0.0001, "data_type": "int16"}
+            for band in bands
+        ]
+    }
+
+
+class FakeServer:
+    """In-process WTSS and STAC server with synthetic or recorded responses.
+
+    The WTSS routes are served under ``/wtss`` and the STAC routes under
+    ``/stac``. Every request can be delayed, padded and failed, so the
+    throughput, the cache and the retries of the clients are measured
+    without network.
+
+    :Methods:
+        start
+        stop
+        fail_next
+        reset
+    """
+
+    def __init__(self, coverages = None, latency = 0.0, error_rate = 0.0, error_status = 500,
+                 max_points = None, pixel_size = 0.001, padding = 0, compress = False,
+                 recorded = None, seed = 0):
+        """Set the responses of the server.
+
+        :param coverages<list>: the WTSS coverage descriptions, one synthetic coverage when not given.
+        :param latency<float>: the delay of each response in seconds.
+        :param error_rate<float>: the probability of an error response.
+        :param error_status<int>: the status code of the error responses.
+        :param max_points<int>: the max number of pixels of a time series, above it the server fails.
+        :param pixel_size<float>: the pixel size in degrees used to find the pixels of a polygon.
+        :param padding<int>: the number of bytes added to each JSON response.
+        :param compress<bool>: send gzip responses when the client accepts them.
+        :param recorded<dict>: JSON documents by path, served instead of the synthetic ones.
+        :param seed<int>: the seed of the error injection.
+        """
+        coverages = coverages or [synthetic_coverage()]
+        self.coverages = {coverage['fullname']: coverage for coverage in coverages}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_points = max_points
+        self.pixel_size = pixel_size
+        self.padding = padding
+        self.compress = compress
+        self.recorded = recorded or {}
+        self.requests = Counter()
+        self.bytes_sent = 0
+        self._random = random.Random(seed)
+        self._failures = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """Return the root URL of the server."""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def wtss_url(self):
+        """Return the WTSS service URL."""
+        return f'{self.url}/wtss'
+
+    @property
+    def stac_url(self):
+        """Return the STAC catalog URL."""
+        return f'{self.url}/stac'
+
+    def start(self):
+        """Start serving in a daemon thread."""
+        handler = type('FakeHandler', (FakeHandler,), {'fake': self})
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target = self._server.serve_forever, daemon = True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def fail_next(self, count = 1, status = 503, route = None):
+        """Fail the next requests of a route, or of any route when not given."""
+        with self._lock:
+            self._failures.extend([(route, status)] * count)
+
+    def reset(self):
+        """Clear the counters and the pending failures."""
+        with self._lock:
+            self.requests.clear()
+            self.bytes_sent = 0
+            self._failures = []
+
+    def _failure(self, route):
+        """Return the status of an injected failure of a route or None."""
+        with self._lock:
+            for index, (failure_route, status) in enumerate(self._failures):
+                if failure_route in (None, route):
+                    self._failures.pop(index)
+                    return status
+            if self.error_rate > 0 and self._random.random() < self.error_rate:
+                return self.error_status
+        return None
+
+    def route(self, method, path, query, body):
+        """Return the route name, the status and the JSON document of a request."""
+        if path in self.recorded:
+            return 'recorded', 200, self.recorded[path]
+        parts = [part for part in path.split('/') if part]
+        if parts[:1] == ['wtss']:
+            return self._wtss(method, parts[1:], body)
+        if parts[:1] == ['stac']:
+            return self._stac(method, parts[1:], query, body)
+        return 'unknown', 404, {"message": f"{path} not found"}
+
+    def _wtss(self, method, parts, body):
+        """Answer the WTSS routes."""
+        if len(parts) == 0:
+            return 'wtss/root', 200, {
+                "wtss_version": "2.0.0",
+                "links": [
+                    {"rel": "data", "title": f"Coverage {name}", "href": f"{self.wtss_url}/{name}"}
+                    for name in self.coverages
+                ]
+            }
+        coverage = self.coverages.get(parts[0])
+        if coverage is None:
+            return 'wtss/unknown', 404, {"message": f"Coverage {parts[0]} not found"}
+        if len(parts) == 1:
+            return 'wtss/describe', 200, coverage
+        if parts[1] == 'timeseries' and method == 'POST':
+            return self._timeseries(coverage, body)
+        if parts[1] == 'summarize' and method == 'POST':
+            return self._summarize(coverage, body)
+        return 'wtss/unknown', 404, {"message": "Route not found"}
+
+    def pixels(self, geometry):
+        """Return the pixel centers of a geometry."""
+        if geometry.geom_type in ('Point', 'MultiPoint'):
+            points = shapely.get_coordinates(geometry)
+            return [(self._snap(x), self._snap(y)) for x, y in points]
+        min_x, min_y, max_x, max_y = geometry.bounds
+        size = self.pixel_size
+        centers = []
+        for row in range(math.floor(min_y / size), math.ceil(max_y / size)):
+            for column in range(math.floor(min_x / size), math.ceil(max_x / size)):
+                x, y = (column + 0.5) * size, (row + 0.5) * size
+                if shapely.intersects_xy(geometry, x, y):
+                    centers.append((round(x, 9), round(y, 9)))
+        return centers
+
+    def _snap(self, value):
+        """Return the pixel center of a coordinate."""
+        return round((math.floor(value / self.pixel_size) + 0.5) * self.pixel_size, 9)
+
+    @staticmethod
+    def value(x, y, band, date):
+        """Return the synthetic value of a pixel, stable across requests."""
+        return zlib.crc32(f'{x:.9f}{y:.9f}{band}{date}'.encode()) % 10000
+
+    def _query(self, coverage, body):
+        """Return the timeline, the attributes and the pixels of a query."""
+        start = (body.get('start_datetime') or '0000')[:10]
+        end = (body.get('end_datetime') or '9999')[:10]
+        timeline = [date for date in sorted(coverage['timeline']) if start <= date <= end]
+        geometry = shapely.geometry.shape(body['geom'])
+        # Like the service, the points outside the coverage have no pixel in the response
+        extent = shapely.geometry.shape(coverage['extent'])
+        pixels = [(x, y) for x, y in self.pixels(geometry) if shapely.intersects_xy(extent, x, y)]
+        return timeline, body.get('attributes') or [band['name'] for band in coverage['bands']], pixels
+
+    def _timeseries(self, coverage, body):
+        """Answer a time series request."""
+        timeline, attributes, pixels = self._query(coverage, body)
+        if self.max_points is not None and len(pixels) > self.max_points:
+            return 'wtss/timeseries', 500, {"message": "Too many pixels"}
+        results = [
+            {
+                "pixel_center": {"type": "Point", "coordinates": [x, y]},
+                "pixel_size": [self.pixel_size, self.pixel_size],
+                "time_series": {
+                    "timeline": timeline,
+                    "values": {
+                        attribute: [self.value(x, y, attribute, date) for date in timeline]
+                        for attribute in attributes
+                    }
+                }
+            }
+            for x, y in pixels
+        ]
+        return 'wtss/timeseries', 200, {"query": body, "results": results}
+
+    def _summarize(self, coverage, body):
+        """Answer a summarize request."""
+        timeline, attributes, pixels = self._query(coverage, body)
+        values = {}
+        for attribute in attributes:
+            series = [[self.value(x, y, attribute, date) for x, y in pixels] for date in timeline]
+            values[attribute] = {
+                "min": [min(sample) if sample else None for sample in series],
+                "max": [max(sample) if sample else None for sample in series],
+                "mean": [sum(sample) / len(sample) if sample else None for sample in series],
+                "median": [sorted(sample)[len(sample) // 2] if sample else None for sample in series],
+                "std": [0.0 for _ in series]
+            }
+        return 'wtss/summarize', 200, {"query": body, "results": {"timeline": timeline, "values": values}}
+
+    def _stac(self, method, parts, query, body):
+        """Answer the STAC routes."""
+        links = [
+            {"rel": "self", "href": self.stac_url, "type": "application/json"},
+            {"rel": "root", "href": self.stac_url, "type": "application/json"},
+            {"rel": "data", "href": f"{self.stac_url}/collections", "type": "application/json"},
+            {"rel": "search", "href": f"{self.stac_url}/search", "type": "application/geo+json", "method": "POST"},
+            {"rel": "search", "href": f"{self.stac_url}/search", "type": "application/geo+json", "method": "GET"}
+        ]
+        if len(parts) == 0:
+            return 'stac/root', 200, {
+                "type": "Catalog", "stac_version": "1.0.0", "id": "fake",
+                "description": "Fake STAC catalog", "conformsTo": STAC_CONFORMANCE, "links": links
+            }
+        if parts == ['collections']:
+            return 'stac/collections', 200, {
+                "collections": [self._collection(coverage) for coverage in self.coverages.values()],
+                "links": links[:2]
+            }
+        if parts[0] == 'collections' and len(parts) == 2:
+            coverage = self.coverages.get(parts[1])
+            if coverage is None:
+                return 'stac/unknown', 404, {"code": "NotFound", "description": f"Collection {parts[1]} not found"}
+            return 'stac/collection', 200, self._collection(coverage)
+        if parts == ['search']:
+            if method == 'GET':
+                body = {key: values[0] for key, values in query.items()}
+                if 'collections' in body:
+                    body['collections'] = body['collections'].split(',')
+                if 'intersects' in body:
+                    body['intersects'] = json.loads(body['intersects'])
+            return self._search(body)
+        return 'stac/unknown', 404, {"code": "NotFound", "description": "Route not found"}
+
+    def _collection(self, coverage):
+        """Return the STAC collection of a coverage."""
+        bands = [band['name'] for band in coverage['bands']]
+        return {
+            "type": "Collection", "stac_version": "1.0.0", "id": coverage['fullname'],
+            "title": coverage['title'], "description": coverage['description'], "license": "CC-BY-4.0",
+            "extent": {
+                "spatial": {"bbox": [list(shapely.geometry.shape(coverage['extent']).bounds)]},
+                "temporal": {"interval": [[f"{coverage['timeline'][0]}T00:00:00Z", f"{coverage['timeline'][-1]}T00:00:00Z"]]}
+            },
+            "links": [{"rel": "self", "href": f"{self.stac_url}/collections/{coverage['fullname']}"}],
+            "bdc:bands_quicklook": (bands * 3)[:3] if len(bands) < 3 else bands[-3:],
+            "properties": {"eo:bands": [{"name": band} for band in bands]}
+        }
+
+    def _search(self, body):
+        """Answer an item search with one item per tile and timeline date."""
+        start, _, end = (body.get('datetime') or '../..').partition('/')
+        end = end or start
+        start = '0000' if start in ('', '..') else start[:10]
+        end = '9999' if end in ('', '..') else end[:10]
+        geometry = shapely.geometry.shape(body['intersects']) if body.get('intersects') else None
+        features = []
+        for name in body.get('collections') or list(self.coverages):
+            coverage = self.coverages.get(name)
+            if coverage is None:
+                continue
+            timeline = sorted(coverage['timeline'])
+            for index, date in enumerate(timeline):
+                last = timeline[index + 1] if index + 1 < len(timeline) else date
+                if last < start or date > end:
+                    continue
+                for tile in self._tiles(geometry):
+                    features.append(self._item(coverage, tile, date, last))
+        limit = int(body.get('limit') or len(features) or 1)
+        return 'stac/search', 200, {"type": "FeatureCollection", "features": features[:limit], "links": []}
+
+    @staticmethod
+    def _tiles(geometry, tile_degrees = 1.0):
+        """Return the 1 degree tiles intersecting a geometry."""
+        if geometry is None:
+            return [(0, 0)]
+        min_x, min_y, max_x, max_y = geometry.bounds
+        return [
+            (column, row)
+            for row in range(math.floor(min_y / tile_degrees), math.floor(max_y / tile_degrees) + 1)
+            for column in range(math.floor(min_x / tile_degrees), math.floor(max_x / tile_degrees) + 1)
+        ]
+
+    def _item(self, coverage, tile, start, end):
+        """Return the STAC item of a tile and a composite period."""
+        column, row = tile
+        item_id = f"{coverage['fullname']}_{column:+04d}{row:+03d}_{start.replace('-', '')}"
+        bbox = [column, row, column + 1, row + 1]
+        return {
+            "type": "Feature", "stac_version": "1.0.0", "id": item_id, "collection": coverage['fullname'],
+            "bbox": bbox, "geometry": shapely.geometry.mapping(shapely.geometry.box(*bbox)),
+            "properties": {
+                "datetime": None,
+                "start_datetime": f"{start}T00:00:00Z",
+                "end_datetime": f"{end}T00:00:00Z"
+            },
+            "assets": {
+                band['name']: {"href": f"{self.url}/assets/{item_id}_{band['name']}.tif", "type": "image/tiff"}
+                for band in coverage['bands']
+            },
+            "links": []
+        }
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Handle the requests with the responses of the ``FakeServer``."""
+
+    protocol_version = 'HTTP/1.1'
+    fake = None
+
+    def log_message(self, *args):
+        pass
+
+    def _answer(self, method):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+        route, status, document = self.fake.route(method, url.path, parse_qs(url.query), body)
+        failure = self.fake._failure(route)
+        if failure is not None:
+            status, document = failure, {"message": "Injected failure"}
+        if self.fake.latency > 0:
+            time.sleep(self.fake.latency)
+        if self.fake.padding > 0 and isinstance(document, dict):
+            document = dict(document, padding = 'x' * self.fake.padding)
+        payload = json.dumps(document).encode()
+        compress = self.fake.compress and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if compress:
+            payload = gzip.compress(payload)
+        # Counted before answering, the client may check the counters as soon as it reads the response
+        with self.fake._lock:
+            self.fake.requests[route] += 1
+            self.fake.bytes_sent += len(payload)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._answer('GET')
+
+    def do_POST(self):
+        self._answer('POST')
@@ -0,0 +1,134 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import os
+import tempfile
+import unittest
+
+from shapely.geometry import Point, mapping
+
+from wtss_plugin.controller.wtss_qgis_cache import (MetadataCache,
+                                                    StacCollections,
+                                                    TimeSeriesCache)
+
+
+class FakeCollection:
+    """Collection returned by the fake STAC client."""
+
+    def __init__(self, collection_id):
+        self.id = collection_id
+
+    def to_dict(self):
+        return {'id': self.id, 'bdc:bands_quicklook': ['B04', 'B03', 'B02']}
+
+
+class FakeStac:
+    """STAC client counting the collection requests."""
+
+    def __init__(self):
+        self.requests = 0
+        self.offline = False
+
+    def get_collection(self, collection_id):
+        if self.offline:
+            raise ConnectionError('offline')
+        self.requests += 1
+        return FakeCollection(collection_id)
+
+
+class wtss_qgisCacheTest(unittest.TestCase):
+    """Test the time series cache store."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.folder = tempfile.TemporaryDirectory()
+        self.cache = TimeSeriesCache(
+            os.path.join(self.folder.name, 'timeseries.sqlite'),
+            max_size = 4096, ttl = 60
+        )
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.folder.cleanup()
+
+    def test_01_normalized_key(self):
+        """Test the key ignores bands order, trailing slash and geometry format."""
+        key = self.cache.make_key('https://host/wtss/', 'S2-16D-2', ['NDVI', 'EVI'], Point(-45, -12), '2020-01-01', '2020-12-31')
+        same_key = self.cache.make_key('https://host/wtss', 'S2-16D-2', ['EVI', 'NDVI'], mapping(Point(-45, -12)), '2020-01-01', '2020-12-31')
+        other_key = self.cache.make_key('https://host/wtss', 'S2-16D-2', ['EVI', 'NDVI'], Point(-45, -12), '2020-01-01', '2021-12-31')
+        self.assertEqual(key, same_key)
+        self.assertNotEqual(key, other_key)
+
+    def test_02_store_and_expire(self):
+        """Test a stored value is returned while it is fresh."""
+        self.cache.set('query', {'results': [1, 2, 3]})
+        self.assertEqual(self.cache.get('query'), {'results': [1, 2, 3]})
+        self.cache.ttl = -1
+        self.assertIsNone(self.cache.get('query'))
+        self.assertEqual(self.cache.get('query', allow_expired = True), {'results': [1, 2, 3]})
+        self.assertEqual(self.cache.purge(expired_only = True), 1)
+
+    def test_03_lru_eviction(self):
+        """Test the least recently used entries are evicted above the size cap."""
+        for index in range(20):
+            self.cache.set(f'query-{index}', {'values': os.urandom(512).hex()})
+            self.cache.get('query-0')
+        statistics = self.cache.statistics()
+        self.assertLessEqual(statistics['size'], self.cache.max_size)
+        self.assertIsNotNone(self.cache.get('query-0'))
+        self.assertIsNone(self.cache.get('query-1'))
+
+    def test_04_metadata_ttl(self):
+        """Test the coverage descriptions expire after the TTL."""
+        metadata = MetadataCache(ttl = 60)
+        metadata.set(('https://host/wtss', 'S2-16D-2'), {'title': 'Sentinel-2'})
+        self.assertEqual(metadata.get(('https://host/wtss', 'S2-16D-2')), {'title': 'Sentinel-2'})
+        metadata.ttl = -1
+        self.assertIsNone(metadata.get(('https://host/wtss', 'S2-16D-2')))
+
+    def test_05_stac_collections(self):
+        """Test the collection metadata is requested once and persisted."""
+        client = FakeStac()
+        collections = StacCollections(MetadataCache(ttl = 60), self.cache, open_client = lambda url: client)
+        for _ in range(3):
+            metadata = collections.collection('S2-16D-2', 'https://host/stac')
+        self.assertEqual(metadata['bdc:bands_quicklook'], ['B04', 'B03', 'B02'])
+        self.assertEqual(client.requests, 1)
+        # A new session reads the stored copy, and the expired copy when offline
+        restarted = StacCollections(MetadataCache(ttl = 60), self.cache, open_client = lambda url: client)
+        self.assertEqual(restarted.collection('S2-16D-2', 'https://host/stac'), metadata)
+        self.assertEqual(client.requests, 1)
+        self.cache.ttl = -1
+        client.offline = True
+        offline = StacCollections(MetadataCache(ttl = 60), self.cache, open_client = lambda url: client)
+        self.assertEqual(offline.collection('S2-16D-2', 'https://host/stac'), metadata)
+        with self.assertRaises(ConnectionError):
+            offline.collection('S2-16D-1', 'https://host/stac')
+        # The STAC lookups are not counted as time series hits or misses
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisCacheTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
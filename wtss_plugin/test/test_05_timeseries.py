@@ -0,0 +1,103 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import unittest
+
+import pandas as pd
+from shapely.geometry import Point
+
+from wtss_plugin.controller.wtss_qgis_controller import WTSS_Controls
+from wtss_plugin.controller.wtss_qgis_timeseries import TimeSeriesHoldings
+
+TIMELINE = [f'2020-{month:02d}-01' for month in range(1, 13)]
+
+
+class FakeCoverage:
+    """Coverage that records the requested date ranges."""
+
+    name = 'S2-16D-2'
+    timeline = TIMELINE
+
+    def __init__(self):
+        self.requests = []
+
+    def ts(self, attributes, geom, start_datetime, end_datetime):
+        self.requests.append((tuple(attributes), start_datetime, end_datetime))
+        dates = [date for date in TIMELINE if start_datetime <= date <= end_datetime]
+        df = pd.DataFrame([
+            {"attribute": band, "geometry": geom, "value": index, "datetime": pd.Timestamp(date)}
+            for band in attributes for index, date in enumerate(dates)
+        ])
+        return type('TimeSeries', (), {'total_locations': lambda self: 1, 'df': lambda self: df})()
+
+
+class wtss_qgisTimeSeriesTest(unittest.TestCase):
+    """Test the incremental time series fetching."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.coverage = FakeCoverage()
+        self.controls = WTSS_Controls()
+        self.controls.wtss_host = 'https://host/wtss/'
+        self.controls._wtss = {'S2-16D-2': self.coverage}
+        self.controls.productDescription = lambda product: self.coverage
+
+    def test_01_missing_intervals(self):
+        """Test the missing dates are grouped in contiguous runs."""
+        holdings = TimeSeriesHoldings()
+        key = holdings.key('https://host/wtss', 'S2-16D-2', 'NDVI', Point(-45, -12))
+        holdings.merge(key, TIMELINE[3:6], pd.DataFrame())
+        self.assertEqual(holdings.missing_intervals(key, TIMELINE), [tuple(TIMELINE[:3]), tuple(TIMELINE[6:])])
+
+    def test_02_fetch_only_delta(self):
+        """Test a wider date range only requests the missing dates."""
+        geometry = Point(-46, -13)
+        first = self.controls.productTimeSeries('S2-16D-2', ['NDVI'], '2020-04-01', '2020-06-01', geometry)
+        second = self.controls.productTimeSeries('S2-16D-2', ['NDVI', 'EVI'], '2020-03-01', '2020-07-01', geometry)
+        self.assertEqual(len(first.df()), 3)
+        self.assertEqual(len(second.df()), 10)
+        self.assertEqual(self.coverage.requests, [
+            (('NDVI',), '2020-04-01', '2020-06-01'),
+            (('NDVI',), '2020-03-01', '2020-03-01'),
+            (('NDVI',), '2020-07-01', '2020-07-01'),
+            (('EVI',), '2020-03-01', '2020-07-01'),
+        ])
+
+    def test_03_memory_budget(self):
+        """Test the least recently used entries are removed above the memory budget."""
+        df = pd.DataFrame({"datetime": pd.to_datetime(TIMELINE), "value": range(len(TIMELINE))})
+        holdings = TimeSeriesHoldings(max_bytes = 2 * TimeSeriesHoldings._nbytes(df))
+        keys = [holdings.key('https://host/wtss', 'S2-16D-2', 'NDVI', Point(-45, -12 - i)) for i in range(3)]
+        holdings.merge(keys[0], TIMELINE, df)
+        holdings.merge(keys[1], TIMELINE, df)
+        holdings.get(keys[0], TIMELINE[0], TIMELINE[-1])
+        holdings.merge(keys[2], TIMELINE, df)
+        self.assertEqual(len(holdings), 2)
+        self.assertEqual(holdings.missing_intervals(keys[1], TIMELINE), [tuple(TIMELINE)])
+        self.assertEqual(holdings.nbytes, 2 * TimeSeriesHoldings._nbytes(df))
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisTimeSeriesTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
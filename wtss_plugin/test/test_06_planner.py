@@ -0,0 +1,93 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import threading
+import unittest
+
+import pandas as pd
+import requests
+import shapely
+from shapely.geometry import MultiPoint, box
+
+from wtss_plugin.controller.wtss_qgis_controller import WTSS_Controls
+from wtss_plugin.controller.wtss_qgis_planner import spatial_chunks, temporal_chunks
+
+TIMELINE = [f'{year}-{month:02d}-01' for year in (2020, 2021) for month in range(1, 13)]
+
+
+class FakeCoverage:
+    """Coverage that fails for requests with more than ``max_points`` points."""
+
+    def __init__(self, max_points):
+        self.max_points = max_points
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def ts(self, attributes, geom, start_datetime, end_datetime):
+        with self.lock:
+            self.requests += 1
+        if len(geom.geoms) > self.max_points:
+            response = requests.Response()
+            response.status_code = 500
+            raise requests.HTTPError(response = response)
+        dates = [date for date in TIMELINE if start_datetime <= date <= end_datetime]
+        df = pd.DataFrame([
+            {"attribute": band, "geometry": point, "value": 1, "datetime": pd.Timestamp(date)}
+            for band in attributes for point in geom.geoms for date in dates
+        ])
+        return type('TimeSeries', (), {'total_locations': lambda self: 1, 'df': lambda self: df})()
+
+
+class wtss_qgisPlannerTest(unittest.TestCase):
+    """Test the split of large queries."""
+
+    def test_01_spatial_chunks(self):
+        """Test points are grouped and polygons are split in tiles covering them."""
+        points = MultiPoint([(x, 0) for x in range(10)])
+        self.assertEqual([len(part.geoms) for part in spatial_chunks(points, 4, 0.1)], [4, 4, 2])
+        polygon = box(0, 0, 0.25, 0.1)
+        parts = spatial_chunks(polygon, 4, 0.1)
+        self.assertEqual(len(parts), 3)
+        self.assertAlmostEqual(shapely.union_all(parts).area, polygon.area)
+
+    def test_02_temporal_chunks(self):
+        """Test the dates are split in runs."""
+        self.assertEqual(temporal_chunks(TIMELINE, 10), [tuple(TIMELINE[:10]), tuple(TIMELINE[10:20]), tuple(TIMELINE[20:])])
+
+    def test_03_adaptive_chunks(self):
+        """Test the chunks are halved when the server fails and the results merged."""
+        controls = WTSS_Controls()
+        controls.chunk_points = 16
+        controls.chunk_dates = 12
+        coverage = FakeCoverage(max_points = 4)
+        controls._wtss = {'S2-16D-2': coverage}
+        points = MultiPoint([(x, x) for x in range(20)])
+        df = controls.planTimeSeries('S2-16D-2', ['NDVI'], tuple(TIMELINE), points)
+        self.assertEqual(len(df), 20 * len(TIMELINE))
+        self.assertEqual(controls.chunk_points, 4)
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisPlannerTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,158 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from wtss_plugin.helpers.files_export_helper import ApplyTimeSeries, FilesFormat
+from wtss_plugin.test.benchmarks.synthetic import SyntheticTimeSeries
+
+
+class wtss_qgisExportsTest(unittest.TestCase):
+    """Test the time series file exports."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.time_series = SyntheticTimeSeries(samples = 2500)
+        self.files_format = FilesFormat()
+        self.apply_ts = ApplyTimeSeries()
+        self.apply_ts.bands_description = self.time_series.bands_description()
+        self.cube = self.time_series.store()
+
+    def test_01_streaming_csv(self):
+        """Test the CSV written by blocks is the same of the dataframe export."""
+        expected = self.files_format.format_time_series_df(
+            self.time_series, typed = False, cube = self.apply_ts.interpolate_cube(self.cube)
+        ).to_csv(index = False)
+        csv_file = io.StringIO(newline = '')
+        progress = []
+        self.files_format.write_time_series_csv(
+            csv_file, self.cube,
+            transform = self.apply_ts.interpolate_cube, progress = progress.append
+        )
+        self.assertEqual(csv_file.getvalue(), expected)
+        self.assertEqual(progress, [40.0, 80.0, 100.0])
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_02_parquet(self):
+        """Test the Parquet file has a row per sample, band and date with nulls for nodata."""
+        import pyarrow.parquet as pq
+        with tempfile.TemporaryDirectory() as folder:
+            file_name = os.path.join(folder, 'time_series.parquet')
+            self.files_format.write_time_series_parquet(
+                file_name, self.cube,
+                nodata = self.apply_ts.nodata_values(self.cube.bands)
+            )
+            table = pq.read_table(file_name)
+        values = self.cube.values
+        self.assertEqual(table.num_rows, values.size)
+        self.assertEqual(table.column('value').null_count, int((values == -9999).sum()))
+        self.assertEqual(table.schema.field('band').type.value_type, 'string')
+        df = table.to_pandas()
+        sample = df[(df['sample_id'] == 2) & (df['band'] == self.cube.bands[1])]
+        np.testing.assert_array_equal(sample['datetime'].values.astype('datetime64[ns]'), self.cube.timeline.values)
+        np.testing.assert_array_equal(sample['value'].fillna(-9999).values, values[1, 1])
+
+    @unittest.skipUnless(importlib.util.find_spec('netCDF4'), 'netCDF4 is not installed')
+    def test_03_netcdf(self):
+        """Test the NetCDF cube keeps the values, coordinates and band metadata."""
+        import netCDF4
+        with tempfile.TemporaryDirectory() as folder:
+            file_name = os.path.join(folder, 'time_series.nc')
+            self.files_format.write_time_series_netcdf(
+                file_name, self.cube,
+                nodata = self.apply_ts.nodata_values(self.cube.bands),
+                scale = self.apply_ts.scale_values(self.cube.bands)
+            )
+            with netCDF4.Dataset(file_name) as dataset:
+                time_series = dataset['time_series']
+                time_series.set_auto_maskandscale(False)
+                np.testing.assert_array_equal(time_series[:], self.cube.values)
+                self.assertEqual(time_series.chunking(), [1000, 1, len(self.cube.timeline)])
+                self.assertEqual(time_series._FillValue, -9999)
+                self.assertEqual(list(dataset['band'][:]), self.cube.bands)
+                np.testing.assert_array_equal(dataset['longitude'][:], self.cube.longitude)
+                dates = netCDF4.num2date(dataset['time'][:], dataset['time'].units, only_use_cftime_datetimes=False)
+                self.assertEqual([date.strftime('%Y-%m-%d') for date in dates], list(self.cube.timeline.strftime('%Y-%m-%d')))
+
+    def test_04_store_views(self):
+        """Test the store selections and the typed format are views of the values."""
+        self.assertEqual(self.cube.values.shape, (2500, 4, 23))
+        self.assertTrue(np.shares_memory(self.cube.band('EVI'), self.cube.values))
+        self.assertTrue(np.shares_memory(self.cube.slice(10, 20).values, self.cube.values))
+        time_series_df = self.files_format.format_time_series_df(self.time_series)
+        self.assertTrue(np.shares_memory(time_series_df['time_series'][3]['NDVI'], self.cube.values))
+        self.assertEqual(int(self.cube.mask().sum()), int((self.time_series.values == -9999).sum()))
+        with self.assertRaises(AttributeError):
+            self.cube.extra = None
+
+    def test_05_streaming_json(self):
+        """Test the JSON written sample by sample is the same document and the dataframe is kept."""
+        time_series_df = self.files_format.format_time_series_df(self.time_series)
+        expected = json.dumps(self.files_format.format_time_series_df_to_json(time_series_df))
+        self.assertIsInstance(time_series_df['time_series'][0]['NDVI'], np.ndarray)
+        json_file = io.StringIO()
+        self.files_format.write_time_series_json(json_file, self.cube)
+        self.assertEqual(json_file.getvalue(), expected)
+
+    def test_06_geojsonseq(self):
+        """Test a GeoJSON feature is written by line with missing values as null."""
+        cube = self.cube.replace(self.cube.values.astype(float))
+        cube.values[0, 0, 0] = np.nan
+        json_file = io.StringIO()
+        self.files_format.write_time_series_geojsonseq(json_file, cube)
+        lines = json_file.getvalue().splitlines()
+        self.assertEqual(len(lines), len(cube))
+        feature = json.loads(lines[0])
+        self.assertEqual(feature['geometry']['coordinates'], [cube.longitude[0], cube.latitude[0]])
+        self.assertEqual(feature['properties']['time_series']['Index'][:2], ['2020-01-01', '2020-01-17'])
+        self.assertIsNone(feature['properties']['time_series']['NDVI'][0])
+
+    def test_07_json_missing_date(self):
+        """Test a sample missing one date is written as null and the document is valid JSON."""
+        cube = self.cube.replace(self.cube.values.astype(float))
+        cube.values[1, :, 2] = np.nan
+        json_file = io.StringIO()
+        self.files_format.write_time_series_json(json_file, cube)
+
+        def reject(constant):
+            raise ValueError(constant)
+
+        samples = json.loads(json_file.getvalue(), parse_constant = reject)['samples']
+        self.assertEqual(len(samples), len(cube))
+        for band in cube.bands:
+            self.assertIsNone(samples[1]['time_series'][band][2])
+            self.assertIsNotNone(samples[1]['time_series'][band][1])
+            self.assertIsNotNone(samples[0]['time_series'][band][2])
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisExportsTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,96 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from wtss_plugin.controller.wtss_qgis_session import HostLimitedAdapter
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Answer after a delay and count the requests in flight."""
+
+    protocol_version = 'HTTP/1.1'
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    connections = set()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            cls.connections.add(self.client_address)
+        time.sleep(0.05 if self.path != '/slow' else 1)
+        with cls.lock:
+            cls.in_flight -= 1
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class wtss_qgisSessionTest(unittest.TestCase):
+    """Test the shared HTTP session."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+        threading.Thread(target = self.server.serve_forever, daemon = True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.session = requests.Session()
+        self.session.mount('http://', HostLimitedAdapter(max_per_host = 2, timeout = (1, 0.3), pool_maxsize = 4))
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_01_limit_per_host(self):
+        """Test the requests in flight to a host are limited and the connections reused."""
+        with ThreadPoolExecutor(max_workers = 8) as executor:
+            responses = list(executor.map(lambda _: self.session.get(self.url).status_code, range(16)))
+        self.assertEqual(responses, [200] * 16)
+        self.assertLessEqual(SlowHandler.max_in_flight, 2)
+        self.assertLessEqual(len(SlowHandler.connections), 4)
+
+    def test_02_default_timeout(self):
+        """Test the adapter timeout is used when the request has none."""
+        with self.assertRaises(requests.Timeout):
+            self.session.get(self.url + '/slow')
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisSessionTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,81 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+HEAVY_MODULES = [
+    "numpy", "pandas", "shapely", "matplotlib", "seaborn",
+    "pystac_client", "wtss", "osgeo", "pip", "requests"
+]
+
+IMPORT_SCRIPT = """
+import json, sys
+import PyQt5.QtWidgets, qgis.core, qgis.gui
+before = set(sys.modules)
+import wtss_plugin.wtss_qgis
+print(json.dumps(sorted(set(sys.modules) - before)))
+"""
+
+
+@unittest.skipIf(importlib.util.find_spec('qgis') is None, 'QGIS is not installed')
+class wtss_qgisImportTimeTest(unittest.TestCase):
+    """Test the plugin module is loaded without the heavy dependencies."""
+
+    @classmethod
+    def setUpClass(cls):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', IMPORT_SCRIPT],
+            cwd = Path(__file__).resolve().parents[2],
+            capture_output = True, text = True, check = True
+        )
+        cls.modules = json.loads(result.stdout.strip().splitlines()[-1])
+        cls.cumulative_us = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                cls.cumulative_us[name.strip()] = int(cumulative)
+
+    def test_01_heavy_modules_not_loaded(self):
+        """Test no heavy dependency is imported with the plugin."""
+        loaded = sorted({module.split('.')[0] for module in self.modules} & set(HEAVY_MODULES))
+        self.assertEqual(loaded, [])
+
+    def test_02_import_budget(self):
+        """Test the plugin module is imported under the time budget."""
+        budget_ms = float(os.getenv('WTSS_IMPORT_BUDGET_MS', '300'))
+        self.assertIn('wtss_plugin.wtss_qgis', self.cumulative_us)
+        self.assertLess(self.cumulative_us['wtss_plugin.wtss_qgis'] / 1000, budget_ms)
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisImportTimeTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,62 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import unittest
+
+from wtss_plugin.helpers.pystac_helper import index_items_by_date
+
+
+class FakeItem:
+    """STAC item with the datetime properties."""
+
+    def __init__(self, item_id, **properties):
+        self.id = item_id
+        self.properties = properties
+
+
+class wtss_qgisStacItemsTest(unittest.TestCase):
+    """Test the STAC items are indexed by the timeline dates."""
+
+    def test_01_composite_intervals(self):
+        """Test the tiles of a composite are grouped in every date of its interval."""
+        items = [
+            FakeItem(f'{tile}_{start}', start_datetime = f'{start}T00:00:00Z', end_datetime = f'{end}T23:59:59Z')
+            for start, end in [('2020-01-01', '2020-01-16'), ('2020-01-17', '2020-02-01')]
+            for tile in ['031025', '031026']
+        ]
+        index = index_items_by_date(items, ['2020-01-01', '2020-01-17', '2020-03-01'])
+        self.assertEqual([item.id for item in index['2020-01-01']], ['031025_2020-01-01', '031026_2020-01-01'])
+        self.assertEqual([item.id for item in index['2020-01-17']], ['031025_2020-01-17', '031026_2020-01-17'])
+        self.assertNotIn('2020-03-01', index)
+
+    def test_02_single_datetime(self):
+        """Test the items without interval are matched by their datetime."""
+        items = [FakeItem('scene', datetime = '2021-05-09T13:20:11Z')]
+        index = index_items_by_date(items, ['2021-05-08', '2021-05-09'])
+        self.assertEqual(list(index), ['2021-05-09'])
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisStacItemsTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
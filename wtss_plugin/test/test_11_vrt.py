@@ -0,0 +1,140 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import importlib.util
+import os
+import tempfile
+import unittest
+from xml.sax.saxutils import escape
+
+from shapely.geometry import MultiPoint
+
+from wtss_plugin.helpers.pystac_helper import STAC_ARGS, chip_window
+from wtss_plugin.helpers.vrt_helper import VRTRegistry
+
+
+class FakeProject:
+    """Project with the ids of the loaded layers."""
+
+    def __init__(self):
+        self.layers = set()
+
+    def mapLayer(self, layer_id):
+        return layer_id if layer_id in self.layers else None
+
+
+class wtss_qgisVRTRegistryTest(unittest.TestCase):
+    """Test the virtual rasters registry."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.folder = tempfile.TemporaryDirectory()
+        self.builds = []
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.folder.cleanup()
+
+    def build_vrt(self, path, sources):
+        self.builds.append(path)
+        with open(path, 'w', encoding = 'utf-8') as vrt_file:
+            vrt_file.write('<VRTDataset>')
+            for source in sources:
+                vrt_file.write(f'<SourceFilename>{escape(source)}</SourceFilename>')
+            vrt_file.write('</VRTDataset>')
+        return path
+
+    def test_01_reuse_current_file(self):
+        """Test the VRT is only built when the file has other sources."""
+        registry = VRTRegistry(max_files = 10)
+        sources = ['/vsicurl/https://host/B04.tif?a=1&b=2', '/vsicurl/https://host/B03.tif']
+        for _ in range(3):
+            path = registry.build(self.folder.name, 'item_B04_B03', sources, self.build_vrt)
+        self.assertEqual(self.builds, [path])
+        self.assertEqual(registry.reused, 2)
+        registry.build(self.folder.name, 'item_B04_B03', sources[:1] + ['/vsicurl/https://host/B02.tif'], self.build_vrt)
+        self.assertEqual(len(self.builds), 2)
+
+    def test_02_layers_by_name(self):
+        """Test the loaded layers are found by name."""
+        registry = VRTRegistry(max_files = 10)
+        project = FakeProject()
+        registry.build(self.folder.name, 'item', ['a.tif'], self.build_vrt)
+        registry.add_layer('item', 'layer-1')
+        self.assertFalse(registry.has_layer('item', project))
+        project.layers.add('layer-1')
+        self.assertTrue(registry.has_layer('item', project))
+        self.assertFalse(registry.has_layer('other', project))
+
+    def test_03_cleanup_above_cap(self):
+        """Test the oldest files are removed above the cap, except the loaded ones."""
+        registry = VRTRegistry(max_files = 2)
+        project = FakeProject()
+        for index in range(4):
+            registry.build(self.folder.name, f'item-{index}', [f'{index}.tif'], self.build_vrt)
+            registry.add_layer(f'item-{index}', f'layer-{index}')
+        project.layers.add('layer-0')
+        self.assertEqual(registry.cleanup(project), ['item-1', 'item-2'])
+        self.assertEqual(registry.names(), ['item-0', 'item-3'])
+        self.assertEqual(sorted(os.listdir(self.folder.name)), ['item-0.vrt', 'item-3.vrt'])
+
+    def test_04_chip_window(self):
+        """Test the chip window is the buffered bounds of the geometry."""
+        window = chip_window(MultiPoint([(-45.5, -12.5), (-45.0, -12.0)]), 0.25)
+        self.assertEqual(window, [-45.75, -11.75, -44.75, -12.75])
+
+    def test_05_reuse_chip(self):
+        """Test a chip file is reused when it exists."""
+        registry = VRTRegistry(max_files = 10)
+        chip = registry.build(self.folder.name, 'item_chip', ['a.tif'], self.build_vrt, extension = 'tif')
+        self.assertTrue(chip.endswith('item_chip.tif'))
+        registry.build(self.folder.name, 'item_chip', ['a.tif'], self.build_vrt, extension = 'tif')
+        self.assertEqual(self.builds, [chip])
+
+    @unittest.skipIf(importlib.util.find_spec('osgeo') is None, 'GDAL is not installed')
+    def test_06_build_chip(self):
+        """Test the chip has the window of the three bands."""
+        from osgeo import gdal, osr
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(4326)
+        sources = []
+        for band in ['red', 'green', 'blue']:
+            source = os.path.join(self.folder.name, f'{band}.tif')
+            dataset = gdal.GetDriverByName('GTiff').Create(source, 100, 100, 1, gdal.GDT_UInt16)
+            dataset.SetGeoTransform([-46.0, 0.01, 0, -12.0, 0, -0.01])
+            dataset.SetProjection(srs.ExportToWkt())
+            dataset.GetRasterBand(1).Fill(1)
+            dataset = None
+            sources.append(source)
+        output_file = os.path.join(self.folder.name, 'chip.tif')
+        chip = STAC_ARGS.build_gdal_chip(output_file, sources, [-45.8, -12.2, -45.6, -12.4])
+        self.assertEqual(chip, output_file)
+        dataset = gdal.Open(chip)
+        self.assertEqual(dataset.RasterCount, 3)
+        self.assertEqual((dataset.RasterXSize, dataset.RasterYSize), (20, 20))
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisVRTRegistryTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
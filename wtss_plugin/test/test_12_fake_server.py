@@ -0,0 +1,126 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import time
+import unittest
+from unittest import mock
+
+from shapely.geometry import MultiPoint, box
+
+from wtss_plugin.config import Config
+from wtss_plugin.controller.wtss_qgis_controller import WTSS_Controls
+from wtss_plugin.controller.wtss_qgis_session import SessionWTSS
+from wtss_plugin.test.fake_server import FakeServer
+
+
+class wtss_qgisFakeServerTest(unittest.TestCase):
+    """Test the WTSS controls against the local fake server."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.fake = FakeServer().start()
+        self.cache = mock.patch.object(Config, 'CACHE_ENABLED', False)
+        self.cache.start()
+        self.controls = WTSS_Controls()
+        self.controls.setService(self.fake.wtss_url)
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.cache.stop()
+        self.fake.stop()
+
+    def test_01_list_products(self):
+        """Test the coverages are listed by title."""
+        self.assertEqual(self.controls.listProducts(), {'Synthetic S2-16D-2': 'S2-16D-2'})
+
+    def test_02_time_series_values(self):
+        """Test the values of the time series are the ones served."""
+        points = MultiPoint([(-45.0004, -12.0004), (-45.0104, -12.0104)])
+        time_series = self.controls.productTimeSeries('S2-16D-2', ['NDVI'], '2020-01-01', '2020-03-31', points)
+        df = time_series.df()
+        self.assertEqual(time_series.total_locations(), 2)
+        self.assertEqual(len(df), 2 * 6)
+        row = df.iloc[0]
+        expected = FakeServer.value(row['geometry'].x, row['geometry'].y, 'NDVI', row['datetime'].strftime('%Y-%m-%d'))
+        self.assertEqual(row['value'], expected)
+
+    def test_03_split_on_server_errors(self):
+        """Test the query is split until the server answers."""
+        self.fake.max_points = 10
+        polygon = box(-45.0, -12.0, -44.99, -11.99)
+        time_series = self.controls.productTimeSeries('S2-16D-2', ['NDVI'], '2020-01-01', '2020-01-31', polygon)
+        self.assertEqual(time_series.total_locations(), 100)
+        self.assertGreater(self.fake.requests['wtss/timeseries'], 1)
+
+    def test_04_retry_metadata(self):
+        """Test the metadata requests are retried on 503."""
+        self.fake.fail_next(2, status = 503, route = 'wtss/describe')
+        description = SessionWTSS(self.fake.wtss_url)['S2-16D-2']
+        self.assertEqual(description['fullname'], 'S2-16D-2')
+        self.assertEqual(self.fake.requests['wtss/describe'], 3)
+
+    def test_05_latency_concurrency(self):
+        """Test the chunks are requested concurrently."""
+        self.fake.latency = 0.2
+        self.controls.chunk_points = 1
+        points = MultiPoint([(-45.0 + index * 0.01, -12.0) for index in range(8)])
+        self.controls.productDescription('S2-16D-2')
+        start = time.perf_counter()
+        self.controls.productTimeSeries('S2-16D-2', ['EVI'], '2020-01-01', '2020-01-31', points)
+        self.assertEqual(self.fake.requests['wtss/timeseries'], 8)
+        self.assertLess(time.perf_counter() - start, 8 * 0.2)
+
+    def test_06_describe_once(self):
+        """Test the chunks of a time series use the coverage already described."""
+        self.controls.chunk_points = 2
+        points = MultiPoint([(-45.0 + index * 0.01, -12.0) for index in range(8)])
+        self.controls.productTimeSeries('S2-16D-2', ['NDVI'], '2020-01-01', '2020-03-31', points)
+        self.controls.productTimeSeries('S2-16D-2', ['EVI'], '2020-01-01', '2020-03-31', points)
+        self.assertEqual(self.fake.requests['wtss/timeseries'], 8)
+        self.assertEqual(self.fake.requests['wtss/describe'], 1)
+
+    def test_07_prefetched_stac_items(self):
+        """Test the plot click reads the STAC items prefetched for the coverage id after a plot."""
+        from wtss_plugin.helpers.pystac_helper import STAC_ARGS
+        products = self.controls.listProducts()
+        coverage = products['Synthetic S2-16D-2']
+        geometry = MultiPoint([(-45.0004, -12.0004)])
+        time_series = self.controls.productTimeSeries(coverage, ['NDVI'], '2020-01-01', '2020-03-31', geometry)
+        stac_args = STAC_ARGS()
+        stac_args.coverage = coverage
+        stac_args.geometry = geometry
+        stac_args.set_timeline(time_series)
+        with mock.patch.object(Config, 'STAC_HOST', self.fake.stac_url):
+            stac_args.prefetch_items(coverage, geometry, stac_args.timeline)
+        searches = self.fake.requests['stac/search']
+        date = stac_args.timeline[0].strftime('%Y-%m-%d')
+        items = stac_args.get_items(date)
+        self.assertIsNotNone(items)
+        self.assertGreater(len(items), 0)
+        self.assertEqual(self.fake.requests['stac/search'], searches)
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisFakeServerTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
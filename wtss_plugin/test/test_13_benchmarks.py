@@ -0,0 +1,58 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import copy
+import unittest
+
+from wtss_plugin.test.benchmarks.bench_suite import CASES, compare, run_suite
+
+
+class wtss_qgisBenchmarksTest(unittest.TestCase):
+    """Test the benchmark suite runs and detects slowdowns."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.results = run_suite(samples = [1, 3], dates = 5, min_time = 0, max_rounds = 2)
+
+    def test_01_all_cases(self):
+        """Test every case is measured or skipped with a reason."""
+        names = {benchmark['name'] for benchmark in self.results['benchmarks']}
+        self.assertEqual(names, set(CASES))
+        for benchmark in self.results['benchmarks']:
+            self.assertTrue('stats' in benchmark or 'skipped' in benchmark)
+
+    def test_02_compare_baseline(self):
+        """Test the cases slower than the tolerance are reported."""
+        baseline = copy.deepcopy(self.results)
+        self.assertEqual(compare(self.results, baseline, tolerance = 0.2), [])
+        measured = [benchmark for benchmark in baseline['benchmarks'] if 'stats' in benchmark]
+        measured[0]['stats']['min'] = self.results['benchmarks'][0]['stats']['min'] / 2
+        regressions = compare(self.results, baseline, tolerance = 0.2)
+        self.assertEqual([(benchmark['name'], benchmark['samples']) for benchmark in regressions],
+                         [(measured[0]['name'], measured[0]['samples'])])
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisBenchmarksTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,114 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import glob
+import json
+import os
+import pstats
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from wtss_plugin.controller.wtss_qgis_trace import Tracer
+
+
+class wtss_qgisTraceTest(unittest.TestCase):
+    """Test the timing spans and the profiling mode."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.folder = tempfile.TemporaryDirectory()
+        self.tracer = Tracer(os.path.join(self.folder.name, 'trace.jsonl'), enabled = True, max_size = 2048)
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.folder.cleanup()
+
+    def test_01_nested_spans(self):
+        """Test the spans are written with their parent stage."""
+        with self.tracer.span('plot', coverage = 'S2-16D-2'):
+            with self.tracer.span('plot.render'):
+                pass
+        with self.assertRaises(KeyError):
+            with self.tracer.span('export'):
+                raise KeyError('band')
+        with open(self.tracer.path) as trace_file:
+            events = [json.loads(line) for line in trace_file]
+        self.assertEqual([(event['name'], event['parent']) for event in events],
+                         [('plot.render', 'plot'), ('plot', None), ('export', None)])
+        self.assertEqual(events[1]['attributes'], {'coverage': 'S2-16D-2'})
+        self.assertEqual(events[2]['error'], 'KeyError')
+        self.assertEqual(len(self.tracer.events('plot')), 1)
+
+    def test_02_rolling_file(self):
+        """Test the trace file is rotated above the max size."""
+        for index in range(50):
+            with self.tracer.span('wtss.http', chunk = index):
+                pass
+        self.assertLessEqual(os.path.getsize(self.tracer.path), self.tracer.max_size)
+        self.assertTrue(os.path.exists(self.tracer.path + '.1'))
+
+    def test_03_profile(self):
+        """Test a profiled action is saved only when profiling is enabled."""
+        with self.tracer.profile('plot'):
+            sum(range(1000))
+        self.assertEqual(glob.glob(os.path.join(self.folder.name, '*.prof')), [])
+        self.tracer.setProfiling(True)
+        with self.tracer.profile('plot'):
+            sorted(range(1000), reverse = True)
+        profiles = glob.glob(os.path.join(self.folder.name, 'plot-*.prof'))
+        self.assertEqual(len(profiles), 1)
+        self.assertGreater(pstats.Stats(profiles[0]).total_calls, 0)
+
+    def test_04_profile_threads(self):
+        """Test an action run by a task, its pool workers and a callback is saved in one file."""
+
+        def worker_stage(values):
+            return sorted(values)
+
+        def task_stage(session):
+            with self.tracer.stage(session):
+                with ThreadPoolExecutor(max_workers = 2) as executor:
+                    list(executor.map(self.tracer.wrap(worker_stage), [range(100), range(200)]))
+
+        self.tracer.setProfiling(True)
+        session = self.tracer.startProfile('plot')
+        task = threading.Thread(target = task_stage, args = (session,))
+        task.start()
+        task.join()
+        with self.tracer.stage(session):
+            sum(range(1000))
+        self.tracer.saveProfile(session)
+        profiles = glob.glob(os.path.join(self.folder.name, 'plot-*.prof'))
+        self.assertEqual(len(profiles), 1)
+        functions = {function for _, _, function in pstats.Stats(profiles[0]).stats}
+        self.assertIn('worker_stage', functions)
+        self.assertIn('submit', functions)
+        self.assertIn('<built-in method builtins.sum>', functions)
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisTraceTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -0,0 +1,121 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from shapely.geometry import MultiPoint
+
+from wtss_plugin.config import Config
+from wtss_plugin.controller.wtss_qgis_controller import WTSS_Controls
+from wtss_plugin.controller.wtss_qgis_metrics import (HttpMetrics,
+                                                      format_diagnostics,
+                                                      http_metrics,
+                                                      percentile)
+from wtss_plugin.controller.wtss_qgis_session import SessionWTSS
+from wtss_plugin.test.fake_server import FakeServer
+
+
+class wtss_qgisMetricsTest(unittest.TestCase):
+    """Test the HTTP metrics of the WTSS and STAC requests."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.fake = FakeServer().start()
+        self.cache = mock.patch.object(Config, 'CACHE_ENABLED', False)
+        self.cache.start()
+        http_metrics.reset()
+        self.controls = WTSS_Controls()
+        self.controls.setService(self.fake.wtss_url)
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.cache.stop()
+        self.fake.stop()
+
+    def endpoint(self, suffix):
+        """Return the metrics of the endpoint ending with a path."""
+        endpoints = http_metrics.snapshot()['endpoints']
+        matches = [endpoints[key] for key in endpoints if key.endswith(suffix)]
+        self.assertEqual(len(matches), 1, list(endpoints))
+        return matches[0]
+
+    def test_01_percentiles(self):
+        """Test the nearest rank percentiles and the reservoir size."""
+        self.assertEqual(percentile([], 0.5), 0.0)
+        self.assertEqual(percentile([1.0], 0.99), 1.0)
+        self.assertEqual(percentile([float(value) for value in range(1, 101)], 0.9), 90.0)
+        metrics = HttpMetrics(max_samples = 10)
+        for latency in range(100):
+            metrics.record('get', 'host', '/path', 200, latency / 1000, size = 10)
+        endpoint = metrics.snapshot()['endpoints']['GET host/path']
+        self.assertEqual(endpoint['count'], 100)
+        self.assertEqual(endpoint['bytes'], 1000)
+        self.assertEqual(len(metrics._endpoints['GET host/path'].latencies), 10)
+        self.assertAlmostEqual(endpoint['latency_ms']['max'], 99.0)
+        self.assertAlmostEqual(endpoint['latency_ms']['mean'], 49.5)
+
+    def test_02_time_series_requests(self):
+        """Test the time series requests are counted with their status and size."""
+        points = MultiPoint([(-45.0004, -12.0004), (-45.0104, -12.0104)])
+        self.controls.productTimeSeries('S2-16D-2', ['NDVI'], '2020-01-01', '2020-03-31', points)
+        endpoint = self.endpoint('/S2-16D-2/timeseries')
+        self.assertEqual(endpoint['count'], self.fake.requests['wtss/timeseries'])
+        self.assertEqual(endpoint['statuses'], {'200': endpoint['count']})
+        self.assertGreater(endpoint['bytes'], 0)
+        self.assertGreater(endpoint['latency_ms']['p50'], 0.0)
+
+    def test_03_retries_and_errors(self):
+        """Test the retries of the metadata requests and the failed requests are counted."""
+        self.fake.fail_next(2, status = 503, route = 'wtss/describe')
+        SessionWTSS(self.fake.wtss_url)['S2-16D-2']
+        self.assertEqual(self.endpoint('/S2-16D-2')['retries'], 2)
+        url = self.fake.wtss_url
+        self.fake.stop()
+        with self.assertRaises(Exception):
+            SessionWTSS(url)['S2-16D-2']
+        endpoint = self.endpoint('/wtss/')
+        self.assertEqual(endpoint['errors'], 1)
+        self.assertEqual(endpoint['statuses'].get('ConnectionError'), 1)
+
+    def test_04_diagnostics_snapshot(self):
+        """Test the diagnostics are exported as JSON and formatted as a report."""
+        self.controls.listProducts()
+        diagnostics = self.controls.diagnostics()
+        self.assertGreater(diagnostics['http']['requests'], 0)
+        self.assertIn('hit_ratio', diagnostics['time_series_cache'])
+        with tempfile.TemporaryDirectory() as folder:
+            path = http_metrics.save(os.path.join(folder, 'diagnostics.json'), diagnostics)
+            with open(path) as snapshot_file:
+                self.assertEqual(json.load(snapshot_file)['http']['requests'], diagnostics['http']['requests'])
+        self.assertIn('Time series cache', format_diagnostics(diagnostics))
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisMetricsTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
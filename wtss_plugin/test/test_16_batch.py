@@ -0,0 +1,212 @@
+#
+# This file is part of Python QGIS Plugin for WTSS.
+# Copyright (C) 2024 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""Python QGIS Plugin for WTSS."""
+
+__author__ = 'brazildatacube@dpi.inpe.br'
+__date__ = '2026-10-17'
+__copyright__ = 'Copyright 2026, INPE'
+
+import csv
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import box, mapping
+
+from wtss_plugin.config import Config
+from wtss_plugin.controller.wtss_qgis_timeseries import TimeSeriesStore
+from wtss_plugin.helpers.batch_helper import (BatchExtraction, main,
+                                              query_geometries,
+                                              read_geometries)
+from wtss_plugin.test.fake_server import FakeServer
+
+
+class wtss_qgisBatchTest(unittest.TestCase):
+    """Test the headless batch extraction against the local fake server."""
+
+    def setUp(self):
+        """Runs before each test."""
+        self.fake = FakeServer().start()
+        self.cache = mock.patch.object(Config, 'CACHE_ENABLED', False)
+        self.cache.start()
+        self.folder = tempfile.TemporaryDirectory()
+        self.points_file = os.path.join(self.folder.name, 'points.csv')
+        with open(self.points_file, 'w', newline = '') as points_file:
+            writer = csv.writer(points_file)
+            writer.writerow(['id', 'Lon', 'Lat'])
+            for index in range(25):
+                writer.writerow([index, -45.0004 - index * 0.01, -12.0004])
+
+    def tearDown(self):
+        """Runs after each test."""
+        self.folder.cleanup()
+        self.cache.stop()
+        self.fake.stop()
+
+    def test_01_read_geometries(self):
+        """Test the points are read by column name with their ids and grouped by query."""
+        features = list(read_geometries(self.points_file))
+        self.assertEqual(len(features), 25)
+        self.assertEqual(features[1][0], 1)
+        self.assertEqual((features[1][1].x, features[1][1].y), (-45.0104, -12.0004))
+        self.assertEqual(next(read_geometries(self.points_file, id_column = 'ID'))[0], '0')
+        queries = list(query_geometries(features + [('polygon', box(-45.0, -12.0, -44.99, -11.99))], batch_size = 10))
+        self.assertEqual([len(geometry.geoms) for _, geometry in queries[:3]], [10, 10, 5])
+        self.assertEqual(queries[2][0], list(range(20, 25)))
+        self.assertEqual(queries[3][1].geom_type, 'Polygon')
+        self.assertEqual(queries[3][0], ['polygon'])
+        geojson_file = os.path.join(self.folder.name, 'polygons.geojson')
+        with open(geojson_file, 'w') as geojson:
+            json.dump({"type": "FeatureCollection", "features": [
+                {"type": "Feature", "properties": {"name": "field"}, "geometry": mapping(box(-45.0, -12.0, -44.99, -11.99))}
+            ]}, geojson)
+        self.assertEqual([geometry.geom_type for _, geometry in read_geometries(geojson_file)], ['Polygon'])
+        self.assertEqual([feature_id for feature_id, _ in read_geometries(geojson_file, id_column = 'name')], ['field'])
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_02_parquet(self):
+        """Test the series of all queries are written in the order of the input."""
+        import pyarrow.parquet as pq
+        batch = BatchExtraction('S2-16D-2', ['NDVI', 'EVI'], '2020-01-01', '2020-03-31', host = self.fake.wtss_url, workers = 3)
+        output = os.path.join(self.folder.name, 'series.parquet')
+        reports = []
+        geometries = query_geometries(read_geometries(self.points_file), batch_size = 4)
+        report = batch.run(geometries, output, log = reports.append)
+        self.assertEqual(report['queries'], 7)
+        self.assertEqual(report['series'], 25)
+        self.assertEqual(report['failed'], 0)
+        self.assertGreater(report['series_per_second'], 0)
+        self.assertEqual(len(reports), 7)
+        self.assertFalse(os.path.exists(output + '.part'))
+        table = pq.read_table(output).to_pandas()
+        self.assertEqual(len(table), 25 * 2 * 6)
+        first = table.drop_duplicates('sample_id')
+        self.assertEqual(list(first['sample_id']), list(range(1, 26)))
+        self.assertEqual(list(first['feature_id']), list(range(25)))
+        self.assertTrue((first['longitude'].diff().dropna() < 0).all())
+        row = table.iloc[0]
+        expected = FakeServer.value(row['longitude'], row['latitude'], row['band'], row['datetime'].strftime('%Y-%m-%d'))
+        self.assertEqual(row['value'], expected)
+
+    def test_03_csv_and_failures(self):
+        """Test the CSV has a row by sample and the failed queries are counted."""
+        self.fake.fail_next(1, status = 400, route = 'wtss/timeseries')
+        output = os.path.join(self.folder.name, 'series.csv')
+        report_file = os.path.join(self.folder.name, 'report.json')
+        status = main([
+            '--coverage', 'S2-16D-2', '--bands', 'NDVI', '--start-date', '2020-01-01', '--end-date', '2020-03-31',
+            '--input', self.points_file, '--output', output, '--host', self.fake.wtss_url,
+            '--batch-size', '5', '--workers', '1', '--report', report_file, '--quiet'
+        ])
+        self.assertEqual(status, 1)
+        with open(output, newline = '') as csv_file:
+            rows = list(csv.reader(csv_file))
+        self.assertEqual(rows[0][:2], ['sample_id', 'feature_id'])
+        self.assertEqual(len(rows), 1 + 20)
+        self.assertEqual(rows[-1][0], '20')
+        self.assertEqual(rows[-1][1], '24')
+        with open(report_file) as json_file:
+            report = json.load(json_file)['report']
+        self.assertEqual((report['queries'], report['failed'], report['series']), (5, 1, 20))
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_04_same_pixel(self):
+        """Test the points of the same pixel have a series each, joined to the input by the id column."""
+        import pyarrow.parquet as pq
+        features = [('a', shapely.Point(-45.0004, -12.0004)), ('b', shapely.Point(-45.0005, -12.0005)),
+                    ('c', shapely.Point(-45.0104, -12.0004)), ('d', box(-45.0, -12.0, -44.998, -11.998))]
+        batch = BatchExtraction('S2-16D-2', ['NDVI'], '2020-01-01', '2020-03-31', host = self.fake.wtss_url)
+        output = os.path.join(self.folder.name, 'series.parquet')
+        report = batch.run(query_geometries(features), output)
+        self.assertEqual(report['series'], 3 + 4)
+        table = pq.read_table(output).to_pandas().drop_duplicates('sample_id')
+        self.assertEqual(list(table['feature_id']), ['a', 'b', 'c', 'd', 'd', 'd', 'd'])
+        coordinates = table[['longitude', 'latitude']].values.tolist()
+        self.assertEqual(coordinates[0], coordinates[1])
+        self.assertNotEqual(table.iloc[0]['longitude'], table.iloc[2]['longitude'])
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_05_point_not_answered(self):
+        """Test a point without a pixel in the response has no series and is counted."""
+        import pyarrow.parquet as pq
+        features = [('inside', shapely.Point(-45.0004, -12.0004)), ('outside', shapely.Point(10, 50))]
+        batch = BatchExtraction('S2-16D-2', ['NDVI'], '2020-01-01', '2020-03-31', host = self.fake.wtss_url)
+        output = os.path.join(self.folder.name, 'series.parquet')
+        report = batch.run(query_geometries(features), output)
+        self.assertEqual((report['series'], report['unmatched']), (1, 1))
+        table = pq.read_table(output).to_pandas()
+        self.assertEqual(set(table['feature_id']), {'inside'})
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, 'pyarrow is not installed')
+    def test_06_nodata_and_interpolate(self):
+        """Test both formats write the nodata values as missing, or interpolated with the flag."""
+        import pyarrow.parquet as pq
+        for interpolate, expected in [(False, None), (True, 200.0)]:
+            batch = BatchExtraction('S2-16D-2', ['NDVI'], '2020-01-01', '2020-03-31', host = self.fake.wtss_url,
+                                    interpolate = interpolate)
+            batch.describe()
+            cube = TimeSeriesStore(
+                ['NDVI'], pd.DatetimeIndex(batch.dates[:3]), np.array([-45.0]), np.array([-12.0]),
+                np.array([[[100, -9999, 300]]], dtype = np.int16), coverage = 'S2-16D-2'
+            )
+            parquet_file = os.path.join(self.folder.name, 'series.parquet')
+            with batch.open_writer(parquet_file, 'parquet') as write:
+                write(cube, 0, ['a'])
+            self.assertEqual(pq.read_table(parquet_file).column('value').to_pylist()[1], expected)
+            csv_file = os.path.join(self.folder.name, 'series.csv')
+            with batch.open_writer(csv_file, 'csv') as write:
+                write(cube, 0, ['a'])
+            with open(csv_file, newline = '') as series_file:
+                time_series = list(csv.DictReader(series_file))[0]['time_series']
+            self.assertIn("'NDVI': [100.0, 200.0, 300.0]" if interpolate else "'NDVI': [100.0, nan, 300.0]", time_series)
+
+    def test_07_unknown_band(self):
+        """Test the bands are checked before querying."""
+        batch = BatchExtraction('S2-16D-2', ['NDWI'], '2020-01-01', '2020-03-31', host = self.fake.wtss_url)
+        with self.assertRaises(ValueError):
+            batch.describe()
+
+    def test_08_headless_import(self):
+        """Test the batch engine does not import Qt nor QGIS, even where they are installed."""
+        code = (
+            "import sys\n"
+            "class Blocker:\n"
+            "    def find_spec(self, name, path = None, target = None):\n"
+            "        if name.split('.')[0] in ('PyQt5', 'qgis'):\n"
+            "            sys.exit(f'{name} imported')\n"
+            "sys.meta_path.insert(0, Blocker())\n"
+            "import wtss_plugin.helpers.batch_helper\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        process = subprocess.run([sys.executable, '-c', code], cwd = root, capture_output = True)
+        self.assertEqual(process.returncode, 0, process.stderr.decode())
+
+
+if __name__ == "__main__":
+    suite = unittest.makeSuite(wtss_qgisBatchTest)
+    runner = unittest.TextTestRunner(verbosity=2)
+    runner.run(suite)
@@ -23,9 +23,7 @@ import time
 from datetime import datetime
 from pathlib import Path
 
-import pystac_client
 import qgis.utils
-import requests
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
@@ -37,12 +35,17 @@ from qgis.gui import QgsMapToolEmitPoint, QgsMapToolPan
 from qgis.PyQt.QtCore import QCoreApplication, QSettings, QTranslator
 from qgis.PyQt.QtGui import QIcon, QMovie
 from qgis.PyQt.QtWidgets import QAction
-from shapely import MultiPoint, Point
-from shapely.wkt import dumps, loads
 
-from .config import Config
+from .config import Config, lazy_import
 # Import the controls for the plugin
 from .controller.wtss_qgis_controller import Controls, WTSS_Controls
+# Import the lazy catalogue of geometries from project layers
+from .controller.wtss_qgis_geometries import (GeometryCatalogue,
+                                              GeometryListModel,
+                                              build_multipoint)
+# Import the background tasks dispatcher
+from .controller.wtss_qgis_tasks import WTSS_Tasks
+from .controller.wtss_qgis_trace import tracer
 # Import files exporting controls
 from .helpers.files_export_helper import FilesExport
 # Import the STAC args
@@ -52,6 +55,9 @@ from .resources import *
 # Import the code for the dialog
 from .wtss_qgis_dialog import wtss_qgisDialog
 
+# The heavy dependencies are loaded on first use, not when QGIS starts
+shapely = lazy_import('shapely')
+
 
 class WTSSQgis:
     """QGIS Plugin Implementation."""
@@ -209,44 +215,25 @@ class WTSSQgis:
 
     def buildMultiPoint(self, featureMultiPoints):
         """Build a MultiPoint Object based on features list of a layer."""
-        multipoint_geometry = MultiPoint()
-        for feat in featureMultiPoints:
-            geoms = loads(feat.geometry().asWkt()).geoms
-            for geom in geoms:
-                multipoint_geometry = MultiPoint(list(multipoint_geometry.geoms) + [geom])
-        return multipoint_geometry
+        return build_multipoint(featureMultiPoints)
+
+    def initGeometryControls(self):
+        """Init the layer and geometry selection using a lazy catalogue."""
+        self.geometry_catalogue = GeometryCatalogue()
+        self.available_geometries = []
+        self.dlg.available_layers.activated.connect(self.getGeometriesFromSelectLayer)
+        self.dlg.available_geometries.setEditable(True)
+        self.dlg.available_geometries.setInsertPolicy(QComboBox.NoInsert)
+        self.dlg.available_geometries.activated.connect(self.selectGeometry)
+        self.dlg.available_geometries.lineEdit().textEdited.connect(self.searchGeometries)
 
     def getAvailableGeometries(self):
         """Get available layer from tree root."""
-        instance_layers = QgsProject.instance().mapLayers().values()
-        self.available_geometries = {}
-        for layer in instance_layers:
-            if isinstance(layer, QgsVectorLayer):
-                if  layer.geometryType() == 2:
-                    available_items = []
-                    for feature in layer.getFeatures():
-                        geometry = feature.geometry()
-                        if geometry is not None and not geometry.isEmpty():
-                            available_items.append({
-                                'geometry': loads(geometry.asWkt()).geoms[0],
-                                'attributes': dict(zip(layer.fields().names(), feature.attributes()))
-                            })
-                    self.available_geometries[layer.name()] = available_items
-                elif layer.geometryType() == 0 and layer.name() != Config.TEMPORARY_LAYER_NAME:
-                    try:
-                        geometry = self.buildMultiPoint(layer.getFeatures())
-                        self.available_geometries[layer.name()] = [{
-                            'geometry': geometry,
-                            'attributes': {'type': 'MultiPoint Geometry'}
-                        }]
-                    except:
-                        pass
+        self.available_geometries = self.geometry_catalogue.refresh(QgsProject.instance())
         self.dlg.available_layers.clear()
-        available_layers_ = list(self.available_geometries.keys())
-        self.dlg.available_layers.addItems(available_layers_)
+        self.dlg.available_layers.addItems(self.available_geometries)
         self.dlg.available_layers.setCurrentIndex(0)
-        self.dlg.available_layers.activated.connect(self.getGeometriesFromSelectLayer)
-        if len(available_layers_) > 0:
+        if len(self.available_geometries) > 0:
             self.getGeometriesFromSelectLayer()
 
     def initControls(self):
@@ -255,7 +242,11 @@ class WTSSQgis:
         self.dlg.setFixedSize(self.dlg.size().width(), self.dlg.size().height())
         self.basic_controls = Controls()
         self.wtss_controls = WTSS_Controls()
+        self.wtss_tasks.busyChanged.connect(self.setLoading)
+        # The connection check can still be in flight
+        self.setLoading(self.wtss_tasks.running() > 0)
         self.files_controls = FilesExport()
+        self.initGeometryControls()
         self.enabled_click = True
         self.addCanvasControlPoint(self.enabled_click)
         self.dlg.location_tabs.currentChanged.connect(self.changeGeometryType)
@@ -266,16 +257,18 @@ class WTSSQgis:
         self.changeGeometryType(0)
 
     def wtss_connection_ok(self):
-        try:
-            _ = requests.get(Config.WTSS_HOST)
-            return True
-        except requests.ConnectionError as e:
-            controls = Controls()
-            controls.alert(
-                "error",
-                "WTSS Connection Error!", str(e)
-            )
-            return False
+        """Request the WTSS host, raise the connection error when it can not be reached."""
+        from .controller.wtss_qgis_session import http_session
+        http_session().get(Config.WTSS_HOST)
+        return True
+
+    def connectionError(self, error):
+        """Show the error of the connection check."""
+        controls = Controls()
+        controls.alert(
+            "error",
+            "WTSS Connection Error!", str(error)
+        )
 
     def initLoadingControls(self):
         """Enable loading label."""
@@ -283,7 +276,10 @@ class WTSSQgis:
         self.movie.start()
         self.dlg.loading_label.setStyleSheet("background-color: rgba(216, 216, 216, 0.5)")
         self.dlg.loading_label.setMovie(self.movie)
+        # Keep the dialog usable while the background tasks are running
+        self.dlg.loading_label.setAttribute(Qt.WA_TransparentForMouseEvents)
         self.endLoading()
+        self.setExportProgress(None)
 
     def startLoading(self):
         """Start loading label."""
@@ -293,6 +289,33 @@ class WTSSQgis:
         """End loading label."""
         self.dlg.loading_label.setVisible(False)
 
+    def setLoading(self, busy):
+        """Show the loading label while there are tasks in flight."""
+        if busy:
+            self.startLoading()
+        else:
+            self.endLoading()
+
+    def setExportProgress(self, progress):
+        """Show the progress of an export in place of the export options.
+
+        :param progress<float>: the percent done, None when the export ends.
+        """
+        exporting = progress is not None
+        self.dlg.export_progress.setVisible(exporting)
+        self.dlg.export_result_as_type.setVisible(not exporting)
+        self.dlg.export_result.setEnabled(not exporting)
+        self.dlg.export_progress.setValue(int(progress or 0))
+
+    def exportError(self, error):
+        """Hide the export progress and show the error."""
+        self.setExportProgress(None)
+        self.taskError(error)
+
+    def taskError(self, error):
+        """Show the error raised by a background task."""
+        self.basic_controls.alert("error", "WTSS Request Error!", str(error))
+
     def initIcons(self):
         """Get icons from file system."""
         icon = QIcon(str(Path(Config.BASE_DIR) / 'assets' / 'interrogation-icon.png'))
@@ -347,10 +370,16 @@ class WTSSQgis:
         QgsProject.instance().layersAdded.connect(self.updateRasterHistory)
 
     def initRasterPathControls(self):
-        """Init raster path location controls."""
+        """Init raster path location and chip mode controls."""
         self.dlg.user_output_path_raster.setEnabled(False)
         self.dlg.user_output_path_raster.setText(stac_args.raster_vrt_folder)
         self.dlg.change_output_path_raster.clicked.connect(self.updateOutputRasterPath)
+        self.dlg.chip_mode.setChecked(stac_args.chip_mode)
+        self.dlg.chip_mode.toggled.connect(self.setChipMode)
+
+    def setChipMode(self, enabled):
+        """Build chips of the queried geometry instead of full scene virtual rasters."""
+        stac_args.chip_mode = bool(enabled)
 
     def initRGBoptions(self):
         """Load RGB options with not enabled controls."""
@@ -361,6 +390,43 @@ class WTSSQgis:
         self.dlg.blue_input.setEnabled(False)
         self.dlg.blue_input.activated.connect(self.loadRGBOptions)
 
+    def initDiagnosticsControls(self):
+        """Init the diagnostics tab with the HTTP metrics and the cache usage."""
+        self.dlg.profile_actions.setChecked(tracer.profiling)
+        self.dlg.profile_actions.toggled.connect(tracer.setProfiling)
+        self.dlg.refresh_diagnostics.clicked.connect(self.refreshDiagnostics)
+        self.dlg.reset_diagnostics.clicked.connect(self.resetDiagnostics)
+        self.dlg.export_diagnostics.clicked.connect(self.exportDiagnostics)
+        self.dlg.main_tabs.currentChanged.connect(
+            lambda index: self.refreshDiagnostics() if self.dlg.main_tabs.widget(index) is self.dlg.diagnostics_tab else None
+        )
+
+    def refreshDiagnostics(self):
+        """Show the HTTP metrics and the cache usage."""
+        from .controller.wtss_qgis_metrics import format_diagnostics
+        self.dlg.diagnostics_text.setPlainText(format_diagnostics(self.wtss_controls.diagnostics()))
+
+    def resetDiagnostics(self):
+        """Remove the HTTP metrics recorded."""
+        from .controller.wtss_qgis_metrics import http_metrics
+        http_metrics.reset()
+        self.refreshDiagnostics()
+
+    def exportDiagnostics(self):
+        """Export the HTTP metrics and the cache usage as a JSON snapshot."""
+        from .controller.wtss_qgis_metrics import http_metrics
+        name = QFileDialog.getSaveFileName(
+            parent=self.dlg,
+            caption='Save diagnostics as JSON',
+            directory='wtss-diagnostics.{stamp}.json'.format(stamp=datetime.now().strftime('%Y%m%d-%H%M%S')),
+            filter='*.json'
+        )
+        if name[0] != '':
+            try:
+                http_metrics.save(name[0], self.wtss_controls.diagnostics())
+            except OSError as error:
+                self.basic_controls.alert("error", "OSError", str(error))
+
     def setCRS(self):
         """Set the CRS in project instance."""
         QgsProject.instance().setCrs(QgsCoordinateReferenceSystem(int("4326")))
@@ -384,8 +450,19 @@ class WTSSQgis:
         return self.products[str(self.dlg.coverage_selection.currentText())]
 
     def listCoverages(self):
+        """Request the available coverages in a background task."""
+        self.products = {}
+        self.dlg.coverage_selection.clear()
+        self.wtss_tasks.submit(
+            "WTSS: list coverages",
+            self.wtss_controls.listProducts,
+            on_finished = self.loadCoverages,
+            on_error = self.taskError
+        )
+
+    def loadCoverages(self, products):
         """Fill the blank spaces with coverage metadata for selection."""
-        self.products = self.wtss_controls.listProducts()
+        self.products = products
         self.dlg.coverage_selection.clear()
         self.dlg.coverage_selection.addItems(list(self.products.keys()))
         self.dlg.coverage_selection.setCurrentIndex(0)
@@ -396,26 +473,43 @@ class WTSSQgis:
         """Show a information coverage window."""
         selected_coverage = self.getSelectedCoverage()
         if selected_coverage:
-            self.basic_controls.alert(
-                "info",
-                "Coverage {}".format(selected_coverage),
-                self.basic_controls.formatCoverageDescription(
-                    self.wtss_controls.productDescription(selected_coverage)
-                )
+            self.wtss_tasks.submit(
+                f"WTSS: describe {selected_coverage}",
+                self.wtss_controls.productDescription, selected_coverage,
+                on_finished = lambda description: self.basic_controls.alert(
+                    "info",
+                    "Coverage {}".format(selected_coverage),
+                    self.basic_controls.formatCoverageDescription(description)
+                ),
+                on_error = self.taskError
             )
 
+    def describeCoverage(self, coverage):
+        """Get the coverage metadata from WTSS and STAC, runs in background."""
+        description = self.wtss_controls.productDescription(coverage)
+        from .controller.wtss_qgis_cache import stac_collections
+        return coverage, description, stac_collections.collection(coverage, Config.STAC_HOST)
+
     def selectAtributtes(self):
+        """Request the coverage metadata in a background task."""
+        selected_coverage = self.getSelectedCoverage()
+        self.wtss_tasks.submit(
+            f"WTSS: describe {selected_coverage}",
+            self.describeCoverage, selected_coverage,
+            on_finished = self.loadCoverageAttributes,
+            on_error = self.taskError
+        )
+
+    def loadCoverageAttributes(self, result):
         """Get attributes based on coverage metadata and create the check list."""
+        coverage, description, metadata = result
+        if coverage != self.getSelectedCoverage():
+            # The selection changed while the metadata was requested
+            return
         self.widget = QWidget()
         self.vbox = QVBoxLayout()
-        description = self.wtss_controls.productDescription(
-            self.getSelectedCoverage()
-        )
-        stac_args.coverage = self.getSelectedCoverage()
-        stac_args.set_channels(
-            pystac_client.Client.open(Config.STAC_HOST),
-            config = "true_color"
-        )
+        stac_args.coverage = coverage
+        stac_args.load_channels(metadata, config = "true_color")
         timeline = description.get("timeline", [])
         timeline = sorted(
             description.get("timeline",[]),
@@ -437,7 +531,8 @@ class WTSSQgis:
             band_common_name = band.get('common_name')
             band_title = f"{str(band_name)} ({str(band_common_name)})"
             band.get('scale_factor', 0)
-            self.bands_checks[band_name] = band
+            # Copy the band metadata, the description is shared by the metadata cache
+            self.bands_checks[band_name] = dict(band)
             self.bands_checks[band_name]['check'] = QCheckBox(band_title)
             self.bands_checks[band_name]['check'].stateChanged.connect(self.checkFilters)
             self.vbox.addWidget(self.bands_checks.get(band_name).get('check'))
@@ -491,10 +586,11 @@ class WTSSQgis:
         elif index == 1:
             # 0 => Geometry tab selected
             self.getAvailableGeometries()
-            if len(list(self.available_geometries.keys())) > 0:
+            if len(self.available_geometries) > 0:
                 self.wkt_string = False
                 self.geom_search = True
-                self.addCanvasControlPoint(False)
+                # A click on the map selects the polygon under it
+                self.addCanvasControlPoint(True, on_click = self.selectGeometryAtPoint)
             else:
                 self.basic_controls.alert("warning", "Warning!", "No geometry to select!")
                 self.dlg.location_tabs.setCurrentIndex(0)
@@ -509,60 +605,138 @@ class WTSSQgis:
 
     def getGeometriesFromSelectLayer(self):
         """Get available polygons from selected layers."""
-        selected_layer_items = self.available_geometries[self.dlg.available_layers.currentText()]
-        self.available_items_from_layer = {}
-        for item in selected_layer_items:
-            key = f'{self.dlg.available_layers.currentText()}: ('
-            for attr in item['attributes']:
-                value = str(item["attributes"][attr])
-                value = (value[:30] + '...') if (len(value) > 30) else value
-                key += f'{attr}:{value},'
-            key += ")"
-            self.available_items_from_layer[key] = item['geometry']
-        self.dlg.available_geometries.clear()
-        self.dlg.available_geometries.addItems(list(self.available_items_from_layer.keys()))
+        model = self.geometry_catalogue.model(self.dlg.available_layers.currentText())
+        if model.rowCount() == 0:
+            model.fetchMore()
+        self.dlg.available_geometries.setModel(model)
+        completer = QCompleter(model, self.dlg.available_geometries)
+        completer.setFilterMode(Qt.MatchContains)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setCompletionMode(QCompleter.PopupCompletion)
+        completer.activated[str].connect(self.selectGeometryByLabel)
+        self.dlg.available_geometries.setCompleter(completer)
         self.dlg.available_geometries.setCurrentIndex(0)
-        self.dlg.available_geometries.activated.connect(self.selectGeometry)
+        self.selectGeometry()
+
+    def searchGeometries(self, text):
+        """Load all feature labels of the selected layer before searching."""
+        model = self.dlg.available_geometries.model()
+        if isinstance(model, GeometryListModel) and model.canFetchMore():
+            model.fetchAll()
+
+    def selectGeometryByLabel(self, label):
+        """Select the geometry chosen in the search popup."""
+        self.dlg.available_geometries.setCurrentIndex(self.dlg.available_geometries.findText(label))
         self.selectGeometry()
 
     def selectGeometry(self):
         """Select geometry from selected layer."""
-        self.selected_geometry = self.available_items_from_layer[self.dlg.available_geometries.currentText()]
+        self.selected_geometry = None
+        if self.dlg.available_geometries.currentIndex() >= 0:
+            self.selected_geometry = self.geometry_catalogue.geometry(
+                self.dlg.available_layers.currentText(),
+                self.dlg.available_geometries.currentData(Qt.UserRole)
+            )
         self.checkFilters()
 
+    def selectGeometryAtPoint(self, pointTool):
+        """Select the feature of the selected layer under the clicked point."""
+        layer_name = self.dlg.available_layers.currentText()
+        model = self.dlg.available_geometries.model()
+        if not layer_name or not isinstance(model, GeometryListModel):
+            return
+        fid = self.geometry_catalogue.featureAt(layer_name, float(pointTool.x()), float(pointTool.y()))
+        row = model.rowOf(fid) if fid is not None else -1
+        if row >= 0:
+            self.dlg.available_geometries.setCurrentIndex(row)
+            self.selectGeometry()
+
     def validateWKT(self):
         """Check if has a WKT string."""
         try:
-            self.selected_geometry = loads(str(self.dlg.selected_wkt.text()))
+            self.selected_geometry = shapely.from_wkt(str(self.dlg.selected_wkt.text()))
             if self.selected_geometry.geo_type() not in ['Polygon', 'MultiPoint']:
                 raise("Geometry not accepted")
             self.checkFilters()
         except Exception as e:
             self.basic_controls.alert("error", "Error reading WKT string!", str(e))
 
-    def loadTimeSeries(self):
-        """Load time series product data from selected values."""
-        try:
+    def fetchTimeSeries(self, coverage, bands, start_date, end_date, geometry, with_summarize = False, profile = None):
+        """Get the time series and the summarized values, runs in background."""
+        with tracer.stage(profile), tracer.span('load_time_series', coverage = coverage):
             time_series = self.wtss_controls.productTimeSeries(
-                self.getSelectedCoverage(),
-                list(self.loadAtributtes()),
-                str(self.dlg.start_date.date().toString('yyyy-MM-dd')),
-                str(self.dlg.end_date.date().toString('yyyy-MM-dd')),
-                geometry = self.selected_geometry
+                coverage, bands, start_date, end_date,
+                geometry = geometry
             )
+            summarize = None
+            if with_summarize and time_series != None and self.files_controls.checkResult(time_series):
+                with tracer.span('wtss.summarize', coverage = coverage):
+                    summarize = time_series.summarize()
+        return time_series, summarize
+
+    def fetchSTACItems(self, coverage, geometry, timeline):
+        """Search the STAC items of a plotted timeline, runs in background."""
+        with tracer.span('stac.prefetch_items', coverage = coverage):
+            stac_args.prefetch_items(coverage, geometry, timeline)
+
+    def prefetchSTACItems(self, coverage, geometry, timeline):
+        """Search the STAC items of a plotted timeline in its own background task.
+
+        Until it finishes, or when it fails, the plot click searches the
+        items of the clicked date.
+        """
+        self.wtss_tasks.submit(
+            f"STAC: items of {coverage}",
+            self.fetchSTACItems,
+            coverage,
+            geometry,
+            timeline
+        )
+
+    def loadTimeSeries(self, on_loaded, with_summarize = False, profile = None):
+        """Load time series product data from selected values in a background task.
+
+        :param on_loaded<callable>: called with the time series and the summarized values.
+        :param with_summarize<bool>: also request the summarized values for geometries.
+        :param profile<ProfileSession>: the profile of the action, the caller saves it
+            after ``on_loaded``, it is saved here when the time series are not loaded.
+        """
+        geometry = self.selected_geometry
+
+        def loaded(result):
+            time_series, summarize = result
             if time_series == None:
+                tracer.saveProfile(profile)
                 self.basic_controls.alert("error", "requests.exceptions.HTTPError", "500 Server Error: INTERNAL SERVER ERROR!")
             else:
-                self.save_on_history()
-            return time_series
-        except:
-            return None
+                self.save_on_history(geometry)
+                with tracer.stage(profile):
+                    on_loaded(time_series, summarize)
+
+        def failed(error):
+            tracer.saveProfile(profile)
+            self.taskError(error)
+
+        self.wtss_tasks.submit(
+            f"WTSS: time series of {self.getSelectedCoverage()}",
+            self.fetchTimeSeries,
+            self.getSelectedCoverage(),
+            list(self.loadAtributtes()),
+            str(self.dlg.start_date.date().toString('yyyy-MM-dd')),
+            str(self.dlg.end_date.date().toString('yyyy-MM-dd')),
+            geometry,
+            with_summarize = with_summarize,
+            profile = profile,
+            on_finished = loaded,
+            on_error = failed
+        )
 
-    def loadSTACArgs(self, time_series) -> None:
+    def loadSTACArgs(self, time_series, geometry) -> None:
         """Load selected arguments for STAC search."""
         try:
             stac_args.qgis_project = QgsProject.instance()
-            stac_args.geometry = self.selected_geometry
+            stac_args.tasks = self.wtss_tasks
+            stac_args.geometry = geometry
             stac_args.set_timeline(time_series)
             self.loadRGBOptions()
         except:
@@ -590,14 +764,96 @@ class WTSSQgis:
                 filter='*.csv'
             )
             if name[0] != '':
-                time_series = self.loadTimeSeries()
-                if time_series.total_locations() > 0:
-                    self.files_controls.generateCSV(name[0], time_series, bands_description = self.loadSelectedBands())
-                else:
-                    self.basic_controls.alert("warning", "Warning", "The times series service returns empty, no data to show!")
+                self.exportInBackground('Export time series to CSV', self.files_controls.generateCSV, name[0])
+        except AttributeError as error:
+            self.basic_controls.alert("error", "AttributeError", str(error))
+
+    def exportParquet(self):
+        """Export to file system times series data in Parquet."""
+        try:
+            import pyarrow
+        except ImportError:
+            self.basic_controls.alert("error", "ImportError", "Install the pyarrow package to export Parquet files!")
+            return
+        try:
+            name = QFileDialog.getSaveFileName(
+                parent=self.dlg,
+                caption='Save as Parquet',
+                directory=('{coverage}.{end}.parquet').format(
+                    coverage=self.getSelectedCoverage(),
+                    end=str(self.dlg.end_date.date().toString('yyyy.MM.dd'))
+                ),
+                filter='*.parquet'
+            )
+            if name[0] != '':
+                self.exportInBackground('Export time series to Parquet', self.files_controls.generateParquet, name[0])
+        except AttributeError as error:
+            self.basic_controls.alert("error", "AttributeError", str(error))
+
+    def exportNetCDF(self):
+        """Export to file system times series data in NetCDF."""
+        try:
+            import netCDF4
+        except ImportError:
+            self.basic_controls.alert("error", "ImportError", "Install the netCDF4 package to export NetCDF files!")
+            return
+        try:
+            name = QFileDialog.getSaveFileName(
+                parent=self.dlg,
+                caption='Save as NetCDF',
+                directory=('{coverage}.{end}.nc').format(
+                    coverage=self.getSelectedCoverage(),
+                    end=str(self.dlg.end_date.date().toString('yyyy.MM.dd'))
+                ),
+                filter='*.nc'
+            )
+            if name[0] != '':
+                self.exportInBackground('Export time series to NetCDF', self.files_controls.generateNetCDF, name[0])
         except AttributeError as error:
             self.basic_controls.alert("error", "AttributeError", str(error))
 
+    def exportInBackground(self, description, generate, file_name):
+        """Load the time series and write the file in a background task.
+
+        :param description<str>: the task description shown in QGIS.
+        :param generate<callable>: the ``FilesExport`` method that writes the file.
+        :param file_name<str>: the file path.
+        """
+        bands_description = self.loadSelectedBands()
+        profile = tracer.startProfile('export')
+
+        def write(file_name, time_series, **kwargs):
+            with tracer.stage(profile), tracer.span('export', description = description):
+                with tracer.span('export.store'):
+                    time_series.store()
+                with tracer.span('export.write', file_name = file_name):
+                    return generate(file_name, time_series, **kwargs)
+
+        def written(result):
+            tracer.saveProfile(profile)
+            self.setExportProgress(None)
+
+        def failed(error):
+            tracer.saveProfile(profile)
+            self.exportError(error)
+
+        def export(time_series, summarize):
+            if time_series.total_locations() > 0:
+                self.setExportProgress(0)
+                self.wtss_tasks.submit(
+                    description, write,
+                    file_name, time_series,
+                    bands_description = bands_description,
+                    on_finished = written,
+                    on_error = failed,
+                    on_progress = self.setExportProgress
+                )
+            else:
+                tracer.saveProfile(profile)
+                self.basic_controls.alert("warning", "Warning", "The times series service returns empty, no data to show!")
+
+        self.loadTimeSeries(export, profile = profile)
+
     def exportJSON(self):
         """Export the response of WTSS data."""
         try:
@@ -611,11 +867,24 @@ class WTSSQgis:
                 filter='*.json'
             )
             if name[0] != '':
-                time_series = self.loadTimeSeries()
-                if time_series.total_locations() > 0:
-                    self.files_controls.generateJSON(name[0], time_series)
-                else:
-                    self.basic_controls.alert("warning", "Warning", "The times series service returns empty, no data to show!")
+                self.exportInBackground('Export time series to JSON', self.files_controls.generateJSON, name[0])
+        except AttributeError as error:
+            self.basic_controls.alert("error", "AttributeError", str(error))
+
+    def exportGeoJSONSeq(self):
+        """Export the time series as newline-delimited GeoJSON features."""
+        try:
+            name = QFileDialog.getSaveFileName(
+                parent=self.dlg,
+                caption='Save as GeoJSONSeq',
+                directory=('{coverage}.{end}.geojsonl').format(
+                    coverage=self.getSelectedCoverage(),
+                    end=str(self.dlg.end_date.date().toString('yyyy.MM.dd'))
+                ),
+                filter='*.geojsonl'
+            )
+            if name[0] != '':
+                self.exportInBackground('Export time series to GeoJSONSeq', self.files_controls.generateGeoJSONSeq, name[0])
         except AttributeError as error:
             self.basic_controls.alert("error", "AttributeError", str(error))
 
@@ -645,33 +914,61 @@ class WTSSQgis:
 
     def plotMatLib(self):
         """Generate the plot image using native method for WTSS.py."""
-        try:
-            time_series = self.loadTimeSeries()
-            if time_series.total_locations() > 0:
-                self.files_controls.generateMatPlotFig(time_series)
-        except:
-            self.basic_controls.alert("error", "AttributeError", "The times series service returns empty, no data to show!")
+        profile = tracer.startProfile('plot_matplotlib')
+
+        def plot(time_series, summarize):
+            try:
+                if time_series.total_locations() > 0:
+                    self.files_controls.generateMatPlotFig(time_series)
+            except:
+                self.basic_controls.alert("error", "AttributeError", "The times series service returns empty, no data to show!")
+            finally:
+                tracer.saveProfile(profile)
+
+        self.loadTimeSeries(plot, profile = profile)
 
     def plotTimeSeries(self):
         """Generate the plot image with time series data."""
-        time_series = self.loadTimeSeries()
-        if time_series.total_locations() > 0:
-            self.loadSTACArgs(time_series)
-            self.files_controls.generatePlotFig(
-                time_series,
-                select_coverage = str(self.dlg.coverage_selection.currentText()),
-                bands_description = self.loadSelectedBands()
-            )
-        else:
-            self.basic_controls.alert("error", "AttributeError", "The times series service returns empty, no data to show!")
+        select_coverage = str(self.dlg.coverage_selection.currentText())
+        # The title labels the plot, the STAC collection is the coverage id
+        coverage = self.getSelectedCoverage()
+        bands_description = self.loadSelectedBands()
+        geometry = self.selected_geometry
+        profile = tracer.startProfile('plot')
+
+        def plot(time_series, summarize):
+            if time_series.total_locations() > 0:
+                self.loadSTACArgs(time_series, geometry)
+                try:
+                    with tracer.span('plot', coverage = select_coverage):
+                        self.files_controls.generatePlotFig(
+                            time_series,
+                            select_coverage = select_coverage,
+                            bands_description = bands_description,
+                            summarize = summarize
+                        )
+                finally:
+                    tracer.saveProfile(profile)
+                self.prefetchSTACItems(coverage, geometry, time_series.store().timeline)
+            else:
+                tracer.saveProfile(profile)
+                self.basic_controls.alert("error", "AttributeError", "The times series service returns empty, no data to show!")
+
+        self.loadTimeSeries(plot, with_summarize = True, profile = profile)
 
     def exportAsType(self):
         """Export result based on combo box selection."""
         ext = self.dlg.export_result_as_type.currentText()
         if ext == "CSV":
             self.exportCSV()
+        elif ext == "Parquet":
+            self.exportParquet()
+        elif ext == "NetCDF":
+            self.exportNetCDF()
         elif ext == "JSON":
             self.exportJSON()
+        elif ext == "GeoJSONSeq":
+            self.exportGeoJSONSeq()
         elif ext == "Python":
             self.exportPython()
         elif ext == "MatPlotLib":
@@ -779,9 +1076,9 @@ class WTSSQgis:
                 self.points_layer_data_provider = self.points_layer.dataProvider()
                 self.set_draw_point(longitude, latitude)
 
-    def save_on_history(self):
+    def save_on_history(self, geometry):
         """Get lng/lat coordinates and save on history list."""
-        self.locations[self.selected_geometry.wkt] = self.selected_geometry
+        self.locations[geometry.wkt] = geometry
         locations_keys = list(self.locations.keys())
         self.dlg.history_list.clear()
         self.dlg.history_list.addItems(locations_keys)
@@ -800,20 +1097,24 @@ class WTSSQgis:
             self.dlg.input_longitude.setValue(x)
             self.dlg.input_latitude.setValue(y)
         try:
-            self.selected_geometry = Point(x, y)
+            self.selected_geometry = shapely.Point(x, y)
             self.draw_point(x, y)
         except AttributeError:
             pass
 
-    def addCanvasControlPoint(self, enable):
-        """Generate a canvas area to get mouse position."""
+    def addCanvasControlPoint(self, enable, on_click = None):
+        """Generate a canvas area to get mouse position.
+
+        :param enable<bool>: use the click tool, the pan tool when False.
+        :param on_click<callable>: called with the clicked point, ``display_point`` when not given.
+        """
         self.point_tool = None
         self.pan_map = None
         self.canvas = self.iface.mapCanvas()
         if enable:
             self.setCRS()
             self.point_tool = QgsMapToolEmitPoint(self.canvas)
-            self.point_tool.canvasClicked.connect(self.display_point)
+            self.point_tool.canvasClicked.connect(on_click or self.display_point)
             self.canvas.setMapTool(self.point_tool)
         else:
             self.pan_map = QgsMapToolPan(self.canvas)
@@ -830,7 +1131,8 @@ class WTSSQgis:
         try:
             if (self.getSelectedCoverage() != '' and len(self.loadAtributtes()) > 0):
                 if self.geom_search:
-                    if (str(self.dlg.available_layers.currentText()) != '' and str(self.dlg.available_geometries.currentText()) != ''):
+                    if (str(self.dlg.available_layers.currentText()) != '' and str(self.dlg.available_geometries.currentText()) != ''
+                            and self.selected_geometry != None):
                         self.enabledSearchButtons(True)
                     else:
                         self.enabledSearchButtons(False)
@@ -855,6 +1157,9 @@ class WTSSQgis:
         # Remove mouse click
         self.addCanvasControlPoint(False)
         #
+        # Cancel the requests in flight
+        self.wtss_tasks.cancelAll()
+        #
         # Restore sys.path
         if Config.PYTHONPATH_WTSS_PLUGIN:
             try:
@@ -877,27 +1182,48 @@ class WTSSQgis:
         try:
             # Init Application
             self.dlg = wtss_qgisDialog()
-            if self.wtss_connection_ok():
-                # Init Controls
-                self.initControls()
-                # Virtual Raster History
-                self.initRasterHistory()
-                # Output vrt path
-                self.initRasterPathControls()
-                # RGB Options
-                self.initRGBoptions()
-                # History
-                self.initHistory()
-                # Add icons to buttons
-                self.initIcons()
-                # Start loading label
-                self.initLoadingControls()
-                # Add functions to buttons
-                self.initButtons()
-                # show the dialog
-                self.dialogShow()
-                # Methods to finish session
-                self.dlg.finished.connect(self.finish_session)
+            self.wtss_tasks = WTSS_Tasks()
+            # The dialog is started when the WTSS host answers
+            self.wtss_tasks.submit(
+                "WTSS: check connection",
+                self.wtss_connection_ok,
+                on_finished = self.startDialog,
+                on_error = self.connectionError
+            )
+        except Exception as e:
+            # Exception raises error message and closes dialog
+            controls = Controls()
+            controls.alert("error", "Error while starting plugin!", str(e))
+            self.dlg.close()
+
+    def startDialog(self, connected = True):
+        """Init the controls and show the dialog after the connection check.
+
+        :param connected<bool>: the result of the connection check.
+        """
+        try:
+            # Start loading label
+            self.initLoadingControls()
+            # Init Controls
+            self.initControls()
+            # Virtual Raster History
+            self.initRasterHistory()
+            # Output vrt path
+            self.initRasterPathControls()
+            # RGB Options
+            self.initRGBoptions()
+            # History
+            self.initHistory()
+            # Add icons to buttons
+            self.initIcons()
+            # Add functions to buttons
+            self.initButtons()
+            # HTTP metrics and profiling
+            self.initDiagnosticsControls()
+            # show the dialog
+            self.dialogShow()
+            # Methods to finish session
+            self.dlg.finished.connect(self.finish_session)
         except Exception as e:
             # Exception raises error message and closes dialog
             controls = Controls()